@@ -13,8 +13,11 @@ import webbrowser
 import asyncio
 import os
 import subprocess
-import requests
+import sys
 from dotenv import dotenv_values
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Backend.Endpoints import service_url, is_overridden
+from Backend.HttpClient import http_client
 
 # Load environment variables with absolute path
 env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
@@ -80,7 +83,9 @@ useragent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML
 
 # Initialize Groq client only if API key exists
 client = None
-if GroqAPIKey:
+if GroqAPIKey and is_overridden("groq"):
+    client = Groq(api_key=GroqAPIKey, base_url=service_url("groq"))
+elif GroqAPIKey:
     client = Groq(api_key=GroqAPIKey)
 
 professional_responses = [
@@ -196,7 +201,7 @@ def PlaySongInApp(song_name, app_name):
     return PlayYoutube(search_query)
 
 
-def OpenApp(app, sess=requests.session()):
+def OpenApp(app, sess=http_client):
     # Platform-specific app opening
     if CURRENT_PLATFORM == "windows" and APPOPENER_AVAILABLE:
         try:
@@ -0,0 +1,269 @@
+"""
+Chat Archive
+Rotates old conversation history into compressed, immutable segment files with a time range and term filter header
+"""
+import os
+import re
+import sys
+import json
+import mmap
+import zlib
+import time
+import struct
+import hashlib
+import argparse
+import datetime
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+from dotenv import dotenv_values
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Backend.ConversationStore import conversation_store
+
+# Load environment variables with absolute path
+env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
+env_vars = dotenv_values(env_path)
+
+# Messages older than this many days move to the archive (0 disables rotation)
+ArchiveAfterDays = float(env_vars.get("ArchiveAfterDays", 30))
+ArchiveSegmentMessages = int(env_vars.get("ArchiveSegmentMessages", 5000))
+
+ARCHIVE_DIR = os.path.join("Data", "Archive")
+MAGIC = b"JCHS1\n"
+BLOOM_BITS_PER_TERM = 10
+BLOOM_HASHES = 4
+
+
+def terms(text: str) -> List[str]:
+    """Lower-case word terms used by the segment filters and search"""
+    return re.findall(r"\w{2,}", text.lower())
+
+
+def _bloom_positions(term: str, bits: int) -> List[int]:
+    digest = hashlib.blake2b(term.encode("utf-8"), digest_size=4 * BLOOM_HASHES).digest()
+    return [value % bits for value in struct.unpack(f"<{BLOOM_HASHES}I", digest)]
+
+
+class Segment:
+    """
+    One immutable archive file
+
+    Layout: MAGIC | header length (uint32) | JSON header | bloom filter | zlib-compressed JSON lines.
+    The header holds the time range, message count and filter size, so a search can rule a segment
+    out by reading only its first few hundred bytes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm[:len(MAGIC)] != MAGIC:
+                    raise ValueError(f"{path} is not a chat archive segment")
+                position = len(MAGIC)
+                (header_length,) = struct.unpack("<I", mm[position:position + 4])
+                position += 4
+                self.header = json.loads(mm[position:position + header_length])
+                position += header_length
+                self.bloom = bytes(mm[position:position + self.header["bloom_bytes"]])
+                self.body_offset = position + self.header["bloom_bytes"]
+
+    @property
+    def start(self) -> float:
+        return self.header["start"]
+
+    @property
+    def end(self) -> float:
+        return self.header["end"]
+
+    def may_contain(self, query_terms: List[str]) -> bool:
+        """False when at least one term is certainly absent from the segment"""
+        bits = self.header["bloom_bytes"] * 8
+        for term in query_terms:
+            for position in _bloom_positions(term, bits):
+                if not self.bloom[position >> 3] & (1 << (position & 7)):
+                    return False
+        return True
+
+    def lines(self) -> Iterator[str]:
+        """Raw JSON lines of the body"""
+        with open(self.path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                body = zlib.decompress(mm[self.body_offset:])
+        for line in body.decode("utf-8").split("\n"):
+            if line:
+                yield line
+
+    def records(self) -> Iterator[Dict]:
+        for line in self.lines():
+            yield json.loads(line)
+
+    @staticmethod
+    def write(path: str, records: List[Dict]):
+        """Write records (oldest first) as a new segment; the file is created atomically and made read-only"""
+        unique_terms = set()
+        for record in records:
+            unique_terms.update(terms(record["content"]))
+        bloom_bytes = max(128, (len(unique_terms) * BLOOM_BITS_PER_TERM + 7) // 8)
+        bloom = bytearray(bloom_bytes)
+        for term in unique_terms:
+            for position in _bloom_positions(term, bloom_bytes * 8):
+                bloom[position >> 3] |= 1 << (position & 7)
+
+        header = json.dumps({
+            "start": records[0]["ts"],
+            "end": records[-1]["ts"],
+            "count": len(records),
+            "bloom_bytes": bloom_bytes,
+        }).encode("utf-8")
+        body = zlib.compress(b"".join((json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8") for r in records), 9)
+
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(header)) + header + bytes(bloom) + body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        os.chmod(path, 0o444)
+
+
+class ChatArchive:
+    """Directory of archive segments plus rotation out of the conversation store"""
+
+    def __init__(self, directory: str = ARCHIVE_DIR, store=conversation_store):
+        """
+        Initialize the archive
+
+        Args:
+            directory (str): Folder holding the segment files
+            store: Conversation store old messages are rotated out of
+        """
+        self.directory = directory
+        self.store = store
+        self.lock = threading.Lock()
+
+    def segments(self) -> List[Segment]:
+        if not os.path.isdir(self.directory):
+            return []
+        found = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(".seg"):
+                try:
+                    found.append(Segment(os.path.join(self.directory, name)))
+                except (OSError, ValueError) as e:
+                    print(f"Skipping unreadable archive segment {name}: {e}")
+        return found
+
+    def rotate(self, older_than_days: float = ArchiveAfterDays, segment_size: int = ArchiveSegmentMessages) -> int:
+        """
+        Move messages older than the cutoff into new segments
+
+        Segments are written and synced before the messages are dropped from the store. Messages without a
+        timestamp (ts 0) are left in the store: their age is unknown.
+
+        Returns:
+            int: Number of messages archived
+        """
+        if older_than_days <= 0:
+            return 0
+        cutoff = time.time() - older_than_days * 86400
+        with self.lock:
+            records = [r for r in self.store.older_than(cutoff) if r.get("ts", 0) > 0]
+            if not records:
+                return 0
+            os.makedirs(self.directory, exist_ok=True)
+            for index in range(0, len(records), segment_size):
+                chunk = records[index:index + segment_size]
+                start = datetime.datetime.fromtimestamp(chunk[0]["ts"]).strftime("%Y%m%d-%H%M%S")
+                name = f"chat-{start}-{int(time.time() * 1000)}-{index // segment_size:04d}.seg"
+                Segment.write(os.path.join(self.directory, name), chunk)
+            self.store.drop_older_than(cutoff)
+        print(f"Archived {len(records)} chat messages older than {older_than_days:g} days")
+        return len(records)
+
+    def rotate_in_background(self):
+        """Run rotation on a daemon thread so startup does not wait for it"""
+        def run():
+            try:
+                self.rotate()
+            except Exception as e:
+                print(f"Error archiving chat history: {e}")
+        threading.Thread(target=run, name="chat-archive", daemon=True).start()
+
+    def search(self, text: str, start: Optional[float] = None, end: Optional[float] = None,
+               limit: int = 50) -> Tuple[List[Dict], int, int]:
+        """
+        Find archived messages containing every term of text
+
+        Args:
+            text (str): Words to look for
+            start (float): Only messages at or after this timestamp
+            end (float): Only messages before this timestamp
+            limit (int): Maximum number of results (newest segments are searched first)
+
+        Returns:
+            Tuple[List[Dict], int, int]: (matching records, segments scanned, segments total)
+        """
+        query_terms = terms(text)
+        results = []
+        segments = self.segments()
+        scanned = 0
+        for segment in reversed(segments):
+            if start is not None and segment.end < start:
+                continue
+            if end is not None and segment.start >= end:
+                continue
+            if query_terms and not segment.may_contain(query_terms):
+                continue
+            scanned += 1
+            for line in segment.lines():
+                # Cheap substring test first; only candidate lines are parsed and tokenized
+                lowered = line.lower()
+                if not all(term in lowered for term in query_terms):
+                    continue
+                record = json.loads(line)
+                if start is not None and record["ts"] < start or end is not None and record["ts"] >= end:
+                    continue
+                record_terms = set(terms(record["content"]))
+                if all(term in record_terms for term in query_terms):
+                    results.append(record)
+            if len(results) >= limit:
+                break
+        results.sort(key=lambda record: record["ts"], reverse=True)
+        return results[:limit], scanned, len(segments)
+
+
+# Global instance for easy access
+chat_archive = ChatArchive()
+
+
+def _parse_date(value: Optional[str]) -> Optional[float]:
+    return datetime.datetime.strptime(value, "%Y-%m-%d").timestamp() if value else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rotate and search the chat archive")
+    parser.add_argument("--rotate", action="store_true", help="Archive messages older than --days")
+    parser.add_argument("--days", type=float, default=ArchiveAfterDays, help="Age in days for --rotate")
+    parser.add_argument("--search", metavar="TEXT", help="Find archived messages containing all words of TEXT")
+    parser.add_argument("--from", dest="start", metavar="YYYY-MM-DD", help="Only messages from this date")
+    parser.add_argument("--to", dest="end", metavar="YYYY-MM-DD", help="Only messages before this date")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--list", action="store_true", help="List archive segments")
+    args = parser.parse_args()
+
+    if args.rotate:
+        chat_archive.rotate(args.days)
+        conversation_store.close()
+    if args.list:
+        for segment in chat_archive.segments():
+            print(f"{os.path.basename(segment.path)}  {segment.header['count']:>6} messages  "
+                  f"{datetime.datetime.fromtimestamp(segment.start):%Y-%m-%d} .. "
+                  f"{datetime.datetime.fromtimestamp(segment.end):%Y-%m-%d}")
+    if args.search:
+        started = time.perf_counter()
+        matches, scanned, total = chat_archive.search(args.search, _parse_date(args.start), _parse_date(args.end),
+                                                      args.limit)
+        for record in matches:
+            print(f"[{datetime.datetime.fromtimestamp(record['ts']):%Y-%m-%d %H:%M}] {record['role']}: {record['content']}")
+        print(f"{len(matches)} matches, scanned {scanned} of {total} segments "
+              f"in {(time.perf_counter() - started) * 1000:.1f} ms")
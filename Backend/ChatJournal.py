@@ -0,0 +1,308 @@
+"""
+Append-only Conversation Journal
+Stores chat turns as JSON lines with group-committed fsync and background compaction
+"""
+import os
+import json
+import time
+import threading
+from typing import Callable, Dict, List, Optional
+
+JOURNAL_PATH = os.path.join("Data", "ChatLog.jsonl")
+# Old whole-file logs; the second one is what r"Data\ChatLog.json" created on non-Windows systems
+LEGACY_PATHS = [os.path.join("Data", "ChatLog.json"), "Data\\ChatLog.json"]
+
+READ_BLOCK = 64 * 1024
+
+
+class ChatJournal:
+    """Append-only JSONL chat log with group commit, tail reads and compaction"""
+
+    def __init__(self, path: str = JOURNAL_PATH, legacy_paths: Optional[List[str]] = None,
+                 commit_interval: float = 0.05, compact_interval: float = 300.0):
+        """
+        Initialize the journal
+
+        Args:
+            path (str): Journal file (one JSON record per line)
+            legacy_paths (List[str]): ChatLog.json files migrated into the journal on first use
+            commit_interval (float): Group-commit window in seconds; appends within it share one fsync
+            compact_interval (float): Seconds between background compaction checks (0 disables)
+        """
+        self.path = path
+        self.legacy_paths = LEGACY_PATHS if legacy_paths is None else legacy_paths
+        self.commit_interval = commit_interval
+        self.compact_interval = compact_interval
+
+        self.lock = threading.Lock()
+        self.commit_cond = threading.Condition(self.lock)
+        # Guards the file descriptor against being swapped by compaction during an fsync
+        self.fd_lock = threading.Lock()
+        self.written_seq = 0
+        self.committed_seq = 0
+        self.dead_records = 0
+        self.closed = False
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._migrate_legacy()
+        self.fd = self._open()
+
+        self.committer = threading.Thread(target=self._commit_loop, name="chat-journal-commit", daemon=True)
+        self.committer.start()
+        if self.compact_interval > 0:
+            self.compactor = threading.Thread(target=self._compact_loop, name="chat-journal-compact", daemon=True)
+            self.compactor.start()
+
+    # ---- setup -----------------------------------------------------------
+
+    def _open(self) -> int:
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        # A crash mid-write can leave a torn last line; start the next record on a fresh line
+        size = os.fstat(fd).st_size
+        if size:
+            with open(self.path, "rb") as f:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    os.write(fd, b"\n")
+                    self.dead_records += 1
+        return fd
+
+    def _migrate_legacy(self):
+        """Import existing ChatLog.json files once, then rename them so they are not imported again"""
+        if os.path.exists(self.path):
+            return
+        seen = set()
+        records = []
+        migrated = []
+        # The old log kept no timestamps; the import time keeps the messages live instead of dating them 1970
+        now = time.time()
+        for legacy in self.legacy_paths:
+            full = os.path.abspath(legacy)
+            if full in seen or not os.path.isfile(legacy):
+                continue
+            seen.add(full)
+            try:
+                with open(legacy, "r", encoding="utf-8") as f:
+                    messages = json.load(f)
+            except (ValueError, OSError) as e:
+                print(f"Skipping unreadable chat log {legacy}: {e}")
+                messages = []
+            records.extend(
+                {"role": m["role"], "content": m["content"], "ts": now, "session": "imported"}
+                for m in messages if isinstance(m, dict) and "role" in m and "content" in m
+            )
+            migrated.append(legacy)
+
+        if not migrated:
+            return
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(b"".join(self._encode(record) for record in records))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        for legacy in migrated:
+            os.replace(legacy, legacy + ".migrated")
+        print(f"Migrated {len(records)} chat messages into {self.path}")
+
+    @staticmethod
+    def _encode(record: Dict) -> bytes:
+        return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+    @staticmethod
+    def _decode(line: bytes) -> Optional[Dict]:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None  # torn or corrupt line
+        return record if isinstance(record, dict) else None
+
+    # ---- writes ----------------------------------------------------------
+
+    def _write(self, payload: bytes, sync: bool, dead: int = 0):
+        with self.lock:
+            os.write(self.fd, payload)
+            self.written_seq += 1
+            self.dead_records += dead
+            seq = self.written_seq
+            self.commit_cond.notify_all()
+            if sync:
+                while self.committed_seq < seq and not self.closed:
+                    self.commit_cond.wait()
+
+    def append(self, role: str, content: str, sync: bool = False):
+        """Append one message; with sync=True wait until it is on disk"""
+        self.append_many([{"role": role, "content": content}], sync)
+
+    def append_many(self, messages: List[Dict[str, str]], sync: bool = False, session: Optional[str] = None,
+                    ts: Optional[float] = None):
+        """
+        Append messages as one write (a turn's user and assistant messages land together)
+
+        Args:
+            messages (List[Dict[str, str]]): Messages with 'role' and 'content'
+            sync (bool): Wait for the group commit that makes them durable
+            session (str): Optional session id stored with each record
+            ts (float): Timestamp stored with each record (the current time when None)
+        """
+        now = time.time() if ts is None else ts
+        extra = {"session": session} if session else {}
+        payload = b"".join(
+            self._encode({"role": m["role"], "content": m["content"], "ts": now, **extra}) for m in messages
+        )
+        if payload:
+            self._write(payload, sync)
+
+    def clear(self, sync: bool = False):
+        """Start an empty history; older records are dropped at the next compaction"""
+        self._write(self._encode({"op": "clear", "ts": time.time()}), sync, dead=1)
+
+    def _commit_loop(self):
+        """Background group commit: one fsync covers every write made during the commit window"""
+        while True:
+            with self.lock:
+                while self.committed_seq == self.written_seq and not self.closed:
+                    self.commit_cond.wait()
+                if self.closed:
+                    return
+            time.sleep(self.commit_interval)
+            with self.lock:
+                target = self.written_seq
+            with self.fd_lock:
+                if self.closed:
+                    return
+                os.fsync(self.fd)
+            with self.lock:
+                self.committed_seq = max(self.committed_seq, target)
+                self.commit_cond.notify_all()
+
+    def flush(self):
+        """Block until everything written so far is durable"""
+        with self.lock:
+            target = self.written_seq
+            self.commit_cond.notify_all()
+            while self.committed_seq < target and not self.closed:
+                self.commit_cond.wait()
+
+    # ---- reads -----------------------------------------------------------
+
+    def tail(self, n: int) -> List[Dict[str, str]]:
+        """
+        Return the last n messages without parsing the whole file
+
+        Reads fixed-size blocks backwards from the end and stops at n messages or a clear marker.
+        """
+        if n <= 0:
+            return []
+        messages = []
+        with open(self.path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            remainder = b""
+            while position > 0 and len(messages) < n:
+                step = min(READ_BLOCK, position)
+                position -= step
+                f.seek(position)
+                block = f.read(step) + remainder
+                lines = block.split(b"\n")
+                # The first piece may be a partial line; keep it for the next (earlier) block
+                remainder = lines.pop(0) if position > 0 else b""
+                for line in reversed(lines):
+                    if not line.strip():
+                        continue
+                    record = self._decode(line)
+                    if record is None:
+                        continue
+                    if record.get("op") == "clear":
+                        return list(reversed(messages))
+                    if "role" in record:
+                        messages.append({"role": record["role"], "content": record["content"]})
+                        if len(messages) == n:
+                            break
+        return list(reversed(messages))
+
+    def _read_records(self, limit: Optional[int] = None):
+        """Yield live records (after the last clear) from the first `limit` bytes of the file"""
+        live = []
+        with open(self.path, "rb") as f:
+            data = f.read() if limit is None else f.read(limit)
+        for line in data.split(b"\n"):
+            if not line.strip():
+                continue
+            record = self._decode(line)
+            if record is None:
+                continue
+            if record.get("op") == "clear":
+                live = []
+            elif "role" in record:
+                live.append(record)
+        return live
+
+    def read_all(self) -> List[Dict[str, str]]:
+        """Return every live message in order"""
+        return [{"role": r["role"], "content": r["content"]} for r in self._read_records()]
+
+    def is_empty(self) -> bool:
+        return not self.tail(1)
+
+    # ---- compaction ------------------------------------------------------
+
+    def compact(self, keep: Optional[Callable[[Dict], bool]] = None):
+        """
+        Rewrite the journal without cleared or corrupt records
+
+        The bulk of the file is rewritten without holding the lock; only records appended
+        meanwhile are copied under the lock before the atomic swap.
+
+        Args:
+            keep: Optional filter; live records it rejects are dropped as well (e.g. archived ones)
+        """
+        with self.lock, self.fd_lock:
+            self._flush_locked()
+            snapshot_end = os.fstat(self.fd).st_size
+            self.dead_records = 0
+
+        live = self._read_records(snapshot_end)
+        if keep is not None:
+            live = [record for record in live if keep(record)]
+        temp_path = self.path + ".compact"
+        with open(temp_path, "wb") as out:
+            out.write(b"".join(self._encode(record) for record in live))
+            with self.lock, self.fd_lock:
+                with open(self.path, "rb") as f:
+                    f.seek(snapshot_end)
+                    out.write(f.read())
+                out.flush()
+                os.fsync(out.fileno())
+                os.replace(temp_path, self.path)
+                os.close(self.fd)
+                self.fd = self._open()
+                self.committed_seq = self.written_seq
+                self.commit_cond.notify_all()
+
+    def _flush_locked(self):
+        """fsync with both locks held"""
+        os.fsync(self.fd)
+        self.committed_seq = self.written_seq
+        self.commit_cond.notify_all()
+
+    def _compact_loop(self):
+        while not self.closed:
+            time.sleep(self.compact_interval)
+            try:
+                # Cleared history and torn lines from crashes are the only dead records
+                if not self.closed and self.dead_records:
+                    self.compact()
+            except Exception as e:
+                print(f"Chat journal compaction failed: {e}")
+
+    def close(self):
+        with self.lock, self.fd_lock:
+            if self.closed:
+                return
+            self._flush_locked()
+            self.closed = True
+            self.commit_cond.notify_all()
+            os.close(self.fd)
@@ -0,0 +1,214 @@
+"""
+Incremental Chat Transcript
+Keeps the formatted transcript (Database.data) in sync by appending only new turns, with an offset index for paging
+"""
+import os
+import sys
+import json
+import hashlib
+import threading
+from array import array
+from typing import Callable, Dict, List, Optional
+from dotenv import dotenv_values
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Backend.ConversationStore import conversation_store
+
+# Load environment variables with absolute path
+env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
+env_vars = dotenv_values(env_path)
+
+Username = env_vars.get("Username", "User")
+Assistantname = env_vars.get("Assistantname", "Assistant")
+# Messages shown when the GUI opens; older ones are available through page()
+TranscriptTailMessages = int(env_vars.get("TranscriptTailMessages", 50))
+
+TRANSCRIPT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               "Frontend", "Files", "Database.data")
+
+
+def clean_lines(text: str) -> str:
+    """Drop empty lines and surrounding whitespace (same cleanup as GUI.AnswerModifier)"""
+    return "\n".join(line.strip() for line in text.split("\n") if line.strip())
+
+
+class ChatTranscript:
+    """Append-only formatted transcript with a per-message byte offset index"""
+
+    def __init__(self, path: str = TRANSCRIPT_PATH, username: str = Username, assistantname: str = Assistantname,
+                 modifier: Callable[[str], str] = clean_lines, store=conversation_store):
+        """
+        Initialize the transcript
+
+        Args:
+            path (str): Transcript file; the index and sync state live next to it (.idx / .state)
+            username (str): Label for user messages
+            assistantname (str): Label for assistant messages
+            modifier (Callable[[str], str]): Cleanup applied to each formatted message
+            store: Conversation store the transcript follows
+        """
+        self.store = store
+        self.path = path
+        self.index_path = path + ".idx"
+        self.state_path = path + ".state"
+        self.labels = {"user": username, "assistant": assistantname}
+        self.modifier = modifier
+        self.offsets = array("Q")
+        self.state = self._empty_state()
+        self.loaded = False
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _empty_state() -> Dict:
+        # cursor: timestamp of the last rendered message; cursor_count: rendered messages sharing that timestamp
+        return {"messages": 0, "size": 0, "last_hash": None, "cursor": 0, "cursor_count": 0}
+
+    @staticmethod
+    def _hash(message: Dict[str, str]) -> str:
+        return hashlib.sha1(f"{message['role']}\0{message['content']}".encode("utf-8")).hexdigest()
+
+    def _format(self, message: Dict[str, str]) -> str:
+        label = self.labels.get(message["role"])
+        if label is None:
+            return ""
+        text = self.modifier(f"{label}: {message['content']}")
+        return text + "\n" if text else ""
+
+    def _load(self) -> bool:
+        """Load the index and state; False when they do not describe the transcript on disk"""
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+            offsets = array("Q")
+            with open(self.index_path, "rb") as f:
+                offsets.frombytes(f.read())
+            self.offsets = offsets
+            size = os.path.getsize(self.path)
+        except (OSError, ValueError):
+            return False
+        self.loaded = True
+        return (size == self.state.get("size") and len(self.offsets) == self.state.get("messages")
+                and "cursor" in self.state)
+
+    def _save_state(self):
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(temp_path, self.state_path)
+
+    def _reset(self):
+        self.offsets = array("Q")
+        self.state = self._empty_state()
+        for path in (self.path, self.index_path):
+            with open(path, "wb"):
+                pass
+
+    def sync(self) -> int:
+        """
+        Bring the transcript up to date with the conversation store
+
+        Only messages stored after the last rendered one are read, formatted and appended, so archive
+        rotation of older history does not touch the transcript. It is rebuilt when the last rendered
+        message is no longer in the store (the history was cleared) or the files are out of step.
+
+        Returns:
+            int: Number of messages appended
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.lock:
+            return self._sync_locked()
+
+    def _new_messages(self) -> Optional[List[Dict]]:
+        """Messages after the cursor, or None when the cursor no longer matches the store"""
+        if not self._load():
+            return None
+        if not self.state["messages"]:
+            return self.store.since(0)
+        later = self.store.since(self.state["cursor"])
+        seen = self.state["cursor_count"]
+        if len(later) < seen or self._hash(later[seen - 1]) != self.state["last_hash"]:
+            return None
+        return later[seen:]
+
+    def _sync_locked(self) -> int:
+        new_messages = self._new_messages()
+        if new_messages is None:
+            self._reset()
+            new_messages = self.store.since(0)
+        if not new_messages:
+            self._save_state()
+            return 0
+
+        chunks = []
+        new_offsets = array("Q")
+        position = self.state["size"]
+        for message in new_messages:
+            data = self._format(message).encode("utf-8")
+            new_offsets.append(position)
+            chunks.append(data)
+            position += len(data)
+
+        with open(self.path, "ab") as f:
+            f.write(b"".join(chunks))
+        with open(self.index_path, "ab") as f:
+            f.write(new_offsets.tobytes())
+        self.offsets.extend(new_offsets)
+
+        cursor = new_messages[-1]["ts"]
+        cursor_count = 0
+        for message in reversed(new_messages):
+            if message["ts"] != cursor:
+                break
+            cursor_count += 1
+        if cursor_count == len(new_messages) and cursor == self.state["cursor"]:
+            cursor_count += self.state["cursor_count"]
+        self.state = {"messages": len(self.offsets), "size": position, "last_hash": self._hash(new_messages[-1]),
+                      "cursor": cursor, "cursor_count": cursor_count}
+        self.loaded = True
+        self._save_state()
+        return len(new_messages)
+
+    def __len__(self) -> int:
+        with self.lock:
+            if not self.loaded:
+                self._load()
+            return len(self.offsets)
+
+    def page(self, start: int, count: int) -> str:
+        """
+        Read the formatted text of messages [start, start + count)
+
+        Args:
+            start (int): Index of the first message (negative counts from the end)
+            count (int): Number of messages
+
+        Returns:
+            str: Transcript text of those messages
+        """
+        with self.lock:
+            if not self.loaded:
+                self._load()
+            total = len(self.offsets)
+            if start < 0:
+                start = max(0, total + start)
+            end = min(total, start + count)
+            if start >= end:
+                return ""
+            begin = self.offsets[start]
+            stop = self.offsets[end] if end < total else self.state["size"]
+            try:
+                with open(self.path, "rb") as f:
+                    f.seek(begin)
+                    return f.read(stop - begin).decode("utf-8")
+            except OSError:
+                return ""
+
+    def tail(self, count: int) -> str:
+        """Formatted text of the last count messages"""
+        return self.page(-count, count) if count > 0 else ""
+
+
+# Global instance for easy access
+chat_transcript = ChatTranscript()
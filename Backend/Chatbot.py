@@ -1,12 +1,14 @@
-import json  # Ensure the import is used
-from json import load, dump
 from dotenv import dotenv_values
 import requests
 import datetime
 import os
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from Backend.GeminiAPI import gemini_api, chat_completion
+from Backend.LLMRouter import llm_router
+from Backend.ContextBuilder import ContextBuilder, ChatContextTokens, HistoryWindow
+from Backend.ConversationStore import conversation_store
+from Backend.LongTermMemory import recall
+from Backend.ConversationSummary import prompt_history
 
 # Get the correct path to .env file
 base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -26,17 +28,6 @@ You have excellent emotional intelligence and can understand and respond to huma
 *** Do not provide notes in the output, just answer the question and never mention your training data. ***
 """
 
-try:
-    with open(r"Data\ChatLog.json", "r") as f:
-        messages = load(f)
-except FileNotFoundError:
-    with open(r"Data\ChatLog.json", "w") as f:
-        dump([], f)
-except json.JSONDecodeError:
-    print("ChatLog.json is empty or corrupted. Initializing with an empty list.")
-    with open(r"Data\ChatLog.json", "w") as f:
-        dump([], f)
-
 def RealtimeInformation():
     current_date_time = datetime.datetime.now()
     day = current_date_time.strftime("%A")
@@ -62,8 +53,8 @@ def ChatBot(Query):
     """ This function sends the user's query to the chatbot and returns the AI's response """
 
     try:
-        with open(r"Data\ChatLog.json", "r") as f:
-            messages = load(f)
+        # Running summary of older turns (if one has been made) plus the turns it does not cover
+        summary, messages = prompt_history(HistoryWindow)
 
         # Handle special emotional cases with more sophisticated responses
         # Be more specific to avoid triggering on translation requests
@@ -98,12 +89,12 @@ def ChatBot(Query):
             User said: {Query}
             """
             
-            # Try to use Gemini for emotionally intelligent response
-            if gemini_api.model:
+            # Use the fastest healthy LLM for an emotionally intelligent response
+            if llm_router.available():
                 emotional_messages = [
                     {"role": "user", "content": emotional_prompt}
                 ]
-                emotional_response = chat_completion(emotional_messages, temperature=0.8)
+                emotional_response = llm_router.chat_completion(emotional_messages, request_type="emotional", temperature=0.8)
                 if emotional_response:
                     Answer = emotional_response
                 else:
@@ -113,85 +104,49 @@ def ChatBot(Query):
                 # Fallback response
                 Answer = "I appreciate your sentiment and the connection you feel. As an AI assistant, I'm designed to be a helpful companion for information and tasks. I care about helping you achieve your goals. Is there something specific I can assist you with today?"
         else:
-            # Regular query processing with Gemini API
-            if gemini_api.model:
-                # Prepare conversation history for context-aware responses
-                conversation_history = [
-                    {"role": "user", "content": System},
-                    {"role": "assistant", "content": "Understood. I'm ready to help with emotional intelligence and empathy."}
-                ]
+            # Regular query processing with the latency-aware router (Gemini / Groq)
+            if llm_router.available():
+                # Fill the prompt budget: system prompt and query first, then as many recent turns as fit
+                context = ContextBuilder(ChatContextTokens)
+                # Date and time are sent with every request, as the original Groq path did
+                context.system(f"{System}\n{RealtimeInformation()}",
+                               "Understood. I'm ready to help with emotional intelligence and empathy.")
+                if summary:
+                    context.retrieved(f"Summary of our conversation so far: {summary}")
+                context.history(messages)
                 
-                # Add recent chat history for context (last 3 exchanges for faster processing)
-                recent_chats = messages[-3:] if len(messages) > 3 else messages
-                for entry in recent_chats:
-                    conversation_history.append({
-                        "role": entry["role"], 
-                        "content": entry["content"]
-                    })
+                # Older turns related to this query, beyond the recent history
+                memories = recall(Query, exclude_recent=len(messages) // 2)
+                if memories:
+                    context.retrieved("Earlier in our conversations:\n" + "\n\n".join(memories))
                 
                 # Add current query with emotional context awareness
-                conversation_history.append({
-                    "role": "user", 
-                    "content": f"Consider emotional context in your response: {Query}"
-                })
+                context.query(f"Consider emotional context in your response: {Query}")
+                conversation_history = context.build()
                 
-                # Get response from Gemini with optimized parameters for speed
-                Answer = chat_completion(conversation_history, temperature=0.5, max_tokens=512)
+                # Whichever provider answers first wins; slow ones get hedged
+                Answer = llm_router.chat_completion(conversation_history, request_type="chat", temperature=0.5, max_tokens=512)
                 
-                # Fallback to basic response if Gemini fails
+                # Fallback to basic response if every provider fails
                 if not Answer:
                     Answer = f"I understand you're asking about {Query}. As an AI, I'm here to help with information and tasks while being empathetic to your needs."
             else:
-                # Original Groq fallback (if configured)
-                messages.append({"role": "user", "content": f"{Query}"})
-                
-                try:
-                    from groq import Groq
-                    client = Groq(api_key=GroqAPIKey)
-                    
-                    SystemChatBot = [
-                        {"role": "system", "content": System}
-                    ]
-                    
-                    completion = client.chat.completions.create(
-                        model="llama-3.3-70b-versatile",
-                        messages=SystemChatBot + [{"role": "system", "content": RealtimeInformation()}] + messages,
-                        max_tokens=1024,
-                        temperature=0.7,
-                        top_p=1,
-                        stream=True,
-                        stop=None
-                    )
-
-                    Answer = ""
-
-                    for chunk in completion:
-                        if chunk.choices[0].delta.content:
-                            Answer += chunk.choices[0].delta.content
-
-                    Answer = Answer.replace("</s>", "")
-                except Exception as e:
-                    # Final fallback
-                    Answer = f"I understand you're asking about {Query}. As an AI, I'm here to help with information and tasks while being empathetic to your needs."
-
-        # Save conversation to chat log
-        messages.append({"role": "user", "content": Query})
-        messages.append({"role": "assistant", "content": Answer})
+                Answer = f"I understand you're asking about {Query}. As an AI, I'm here to help with information and tasks while being empathetic to your needs."
 
-        with open(r"Data\ChatLog.json", "w") as f:
-            dump(messages, f, indent=4)
+        # Append this turn to the chat journal
+        conversation_store.append_many([
+            {"role": "user", "content": Query},
+            {"role": "assistant", "content": Answer}
+        ])
 
         return Answer  # Return the answer to the main function
 
     except requests.exceptions.RequestException as e:
+        # The stored history is kept: a failed turn says nothing about the earlier ones
         print(f"Connection error: {e}")
-        with open(r"Data\ChatLog.json", "w") as f:
-            dump([], f, indent=4)
         return "Connection error, please try again."
     except Exception as e:
         print(f"Error: {e}")
-        with open(r"Data\ChatLog.json", "w") as f:
-            dump([], f, indent=4)
         return "An error occurred, please try again."
 
 if __name__ == "__main__":
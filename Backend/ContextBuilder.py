@@ -0,0 +1,145 @@
+"""
+Token-budgeted Context Builder
+Assembles chat/search prompts from system prompt, recent turns and retrieved material within a token budget
+"""
+import os
+from typing import Dict, List, Optional
+from dotenv import dotenv_values
+
+# Load environment variables with absolute path
+env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
+env_vars = dotenv_values(env_path)
+
+# Per-request prompt budgets (estimated tokens)
+ChatContextTokens = int(env_vars.get("ChatContextTokens", 1500))
+GeneralContextTokens = int(env_vars.get("GeneralContextTokens", 1000))
+SearchContextTokens = int(env_vars.get("SearchContextTokens", 2500))
+# Most recent messages read from the chat log before the budget is applied
+HistoryWindow = int(env_vars.get("HistoryWindow", 50))
+
+# Priorities: lower values are paid for first
+PRIORITY_REQUIRED = 0
+PRIORITY_RETRIEVED = 1
+PRIORITY_HISTORY = 2
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast local token estimate (no tokenizer download)
+
+    English BPE vocabularies average about 4 characters or 0.75 words per token;
+    taking the larger of the two keeps short-word and long-word text both safe.
+    """
+    if not text:
+        return 0
+    return max(1, int(max(len(text) / 4.0, len(text.split()) * 4.0 / 3.0)) + 1)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly max_tokens, preferring a line or sentence boundary"""
+    if max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    cut = text[:max_tokens * 4]
+    while cut and estimate_tokens(cut) > max_tokens:
+        cut = cut[:int(len(cut) * 0.9)]
+
+    boundary = max(cut.rfind("\n"), cut.rfind(". "))
+    if boundary > len(cut) // 2:
+        cut = cut[:boundary + 1]
+    return cut.rstrip()
+
+
+class ContextBuilder:
+    """Collects prompt parts and keeps the ones that fit a token budget, by priority"""
+
+    def __init__(self, budget: int):
+        """
+        Initialize the builder
+
+        Args:
+            budget (int): Maximum estimated tokens for the assembled messages
+        """
+        self.budget = budget
+        self.parts = []
+        self.used_tokens = 0
+        self.dropped = 0
+
+    def add(self, role: str, content: str, priority: int = PRIORITY_HISTORY, truncatable: bool = False,
+            rank: int = 0):
+        """
+        Add a message candidate
+
+        Args:
+            role (str): Message role ('user' or 'assistant')
+            content (str): Message text
+            priority (int): Lower priorities are included first
+            truncatable (bool): Whether the part may be shortened to fit the remaining budget
+            rank (int): Tie-breaker within a priority; lower ranks are included first
+        """
+        if content:
+            self.parts.append({
+                "role": role,
+                "content": content,
+                "priority": priority,
+                "truncatable": truncatable,
+                "rank": rank,
+                "order": len(self.parts),
+            })
+        return self
+
+    def system(self, content: str, acknowledgement: Optional[str] = None):
+        """Add the system prompt (sent as a user turn, plus an optional assistant acknowledgement)"""
+        self.add("user", content, PRIORITY_REQUIRED, truncatable=True)
+        if acknowledgement:
+            self.add("assistant", acknowledgement, PRIORITY_REQUIRED)
+        return self
+
+    def history(self, turns: List[Dict[str, str]], max_turns: Optional[int] = None,
+                priority: int = PRIORITY_HISTORY):
+        """Add past turns; the newest are kept first when the budget runs out"""
+        if max_turns is not None:
+            turns = turns[-max_turns:] if max_turns > 0 else []
+        total = len(turns)
+        for index, entry in enumerate(turns):
+            self.add(entry["role"], entry["content"], priority, rank=total - index)
+        return self
+
+    def retrieved(self, content: str, role: str = "user", priority: int = PRIORITY_RETRIEVED):
+        """Add retrieved material (search results, memories); shortened to fit if necessary"""
+        return self.add(role, content, priority, truncatable=True)
+
+    def query(self, content: str):
+        """Add the current request; always included"""
+        return self.add("user", content, PRIORITY_REQUIRED, rank=-1)
+
+    def build(self) -> List[Dict[str, str]]:
+        """Spend the budget by priority and return the kept messages in their original order"""
+        remaining = self.budget
+        kept = []
+        closed = set()
+        self.dropped = 0
+
+        # Required parts are paid for before anything optional, the query ahead of the system prompt
+        for part in sorted(self.parts, key=lambda p: (p["priority"], p["rank"])):
+            cost = estimate_tokens(part["content"])
+            content = part["content"]
+            if part["priority"] in closed:
+                self.dropped += 1
+                continue
+            if cost > remaining:
+                if part["truncatable"] and remaining > 16:
+                    content = truncate_to_tokens(content, remaining)
+                    cost = estimate_tokens(content)
+                elif part["priority"] != PRIORITY_REQUIRED:
+                    # Keep history contiguous: once a newer turn misses, older ones are dropped too
+                    closed.add(part["priority"])
+                    self.dropped += 1
+                    continue
+            remaining -= cost
+            kept.append((part["order"], {"role": part["role"], "content": content}))
+
+        self.used_tokens = self.budget - remaining
+        return [message for _, message in sorted(kept, key=lambda item: item[0])]
@@ -0,0 +1,596 @@
+"""
+Conversation Store
+One API for chat history, backed by SQLite (WAL, indexed, FTS5 search) or the append-only journal
+"""
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import sqlite3
+import argparse
+import datetime
+import threading
+from typing import Dict, List, Optional
+from dotenv import dotenv_values
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Backend.ChatJournal import ChatJournal, JOURNAL_PATH, LEGACY_PATHS
+
+# Load environment variables with absolute path
+env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
+env_vars = dotenv_values(env_path)
+
+# "sqlite" (default) or "journal"
+ConversationBackend = (env_vars.get("ConversationBackend") or "sqlite").strip().lower()
+# Most recent messages the shared in-memory view keeps; older reads go to the backend's indexes
+ConversationMemoryMessages = int(env_vars.get("ConversationMemoryMessages", 1000))
+DATABASE_PATH = os.path.join("Data", "ChatLog.db")
+# Not ChatLog.json: an old log found there is imported again whenever the history is empty
+EXPORT_PATH = os.path.join("Data", "ChatLogExport.json")
+
+# Every process run is its own session
+SESSION_ID = f"{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+
+class ConversationStore:
+    """Common interface of the conversation backends"""
+
+    session = SESSION_ID
+
+    def append_many(self, messages: List[Dict[str, str]], sync: bool = False, ts: Optional[float] = None):
+        """Store messages as one turn, stamped with ts (the current time when None)"""
+        raise NotImplementedError
+
+    def append(self, role: str, content: str, sync: bool = False):
+        self.append_many([{"role": role, "content": content}], sync)
+
+    def tail(self, n: int, session: Optional[str] = None) -> List[Dict[str, str]]:
+        """Last n messages, oldest first (optionally only from one session)"""
+        raise NotImplementedError
+
+    def count(self, session: Optional[str] = None) -> int:
+        """Number of stored messages (optionally only from one session)"""
+        raise NotImplementedError
+
+    def read_all(self) -> List[Dict[str, str]]:
+        raise NotImplementedError
+
+    def recent(self, n: int) -> List[Dict]:
+        """Last n messages, oldest first, including 'ts' and 'session'"""
+        raise NotImplementedError
+
+    def since(self, start: float, end: Optional[float] = None) -> List[Dict]:
+        """Messages with start <= timestamp < end, including 'ts' and 'session'"""
+        raise NotImplementedError
+
+    def search(self, text: str, limit: int = 20) -> List[Dict]:
+        """Messages mentioning text, newest first"""
+        raise NotImplementedError
+
+    def clear(self, sync: bool = False):
+        raise NotImplementedError
+
+    def save_summary(self, session: str, summary: str, covered: int):
+        """Store the running summary of a session and how many of its messages it covers"""
+        raise NotImplementedError
+
+    def load_summary(self, session: str) -> Optional[Dict]:
+        """Return {'summary', 'covered'} for a session, or None"""
+        raise NotImplementedError
+
+    def older_than(self, cutoff: float) -> List[Dict]:
+        """
+        Every stored message with a timestamp before cutoff, oldest first, including 'ts' and 'session'
+
+        Undated messages (ts 0, from imports that kept no time) are never returned, so they are never archived.
+        """
+        raise NotImplementedError
+
+    def drop_older_than(self, cutoff: float):
+        """Remove messages with a timestamp before cutoff (after they have been archived); undated ones stay"""
+        raise NotImplementedError
+
+    def is_empty(self) -> bool:
+        return not self.tail(1)
+
+    def export_json(self, path: str = EXPORT_PATH) -> int:
+        """Write the live history in the old ChatLog.json format; returns the message count"""
+        if os.path.abspath(path) in {os.path.abspath(p) for p in LEGACY_PATHS}:
+            raise ValueError(f"{path} is imported as an old chat log; export to another file")
+        messages = self.read_all()
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(messages, f, indent=4, ensure_ascii=False)
+        os.replace(temp_path, path)
+        return len(messages)
+
+    def close(self):
+        pass
+
+
+class JournalConversationStore(ConversationStore):
+    """Conversation store on top of the append-only JSONL journal (no indexes: since/search scan)"""
+
+    def __init__(self, path: str = JOURNAL_PATH):
+        self.journal = ChatJournal(path)
+        # Summaries are replaced rather than appended, so they live in a small file next to the journal
+        self.summaries_path = os.path.splitext(path)[0] + ".summaries.json"
+        try:
+            with open(self.summaries_path, "r", encoding="utf-8") as f:
+                self.summaries = json.load(f)
+        except (OSError, ValueError):
+            self.summaries = {}
+
+    def append_many(self, messages, sync=False, ts=None):
+        self.journal.append_many(messages, sync, session=self.session, ts=ts)
+
+    def tail(self, n, session=None):
+        if session is None:
+            return self.journal.tail(n)
+        records = [r for r in self.journal._read_records() if r.get("session") == session]
+        return [{"role": r["role"], "content": r["content"]} for r in records[-n:]] if n > 0 else []
+
+    def count(self, session=None):
+        return sum(1 for r in self.journal._read_records() if session is None or r.get("session") == session)
+
+    def read_all(self):
+        return self.journal.read_all()
+
+    def recent(self, n):
+        return self.since(float("-inf"))[-n:] if n > 0 else []
+
+    def since(self, start, end=None):
+        return [
+            {"role": r["role"], "content": r["content"], "ts": r.get("ts", 0), "session": r.get("session")}
+            for r in self.journal._read_records()
+            if r.get("ts", 0) >= start and (end is None or r.get("ts", 0) < end)
+        ]
+
+    def search(self, text, limit=20):
+        needle = text.lower()
+        matches = [
+            {"role": r["role"], "content": r["content"], "ts": r.get("ts", 0), "session": r.get("session")}
+            for r in self.journal._read_records() if needle in r["content"].lower()
+        ]
+        return list(reversed(matches))[:limit]
+
+    def clear(self, sync=False):
+        self.journal.clear(sync)
+
+    def save_summary(self, session, summary, covered):
+        self.summaries[session] = {"summary": summary, "covered": covered}
+        temp_path = self.summaries_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.summaries, f, ensure_ascii=False)
+        os.replace(temp_path, self.summaries_path)
+
+    def load_summary(self, session):
+        return self.summaries.get(session)
+
+    def older_than(self, cutoff):
+        return [r for r in self.since(float("-inf"), cutoff) if r["ts"] > 0]
+
+    def drop_older_than(self, cutoff):
+        self.journal.compact(keep=lambda record: record.get("ts", 0) >= cutoff or record.get("ts", 0) <= 0)
+
+    def close(self):
+        self.journal.close()
+
+
+class SQLiteConversationStore(ConversationStore):
+    """Conversation store in SQLite with WAL, session/timestamp indexes and FTS5 full-text search"""
+
+    def __init__(self, path: str = DATABASE_PATH, journal_path: str = JOURNAL_PATH):
+        """
+        Initialize the store, importing the journal / old ChatLog.json on first use
+
+        Args:
+            path (str): SQLite database file
+            journal_path (str): Journal imported (then renamed *.migrated) when the database is new
+        """
+        self.path = path
+        self.local = threading.local()
+        self.write_lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        db = self._db()
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY,
+                session TEXT NOT NULL,
+                ts REAL NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_messages_session_ts ON messages(session, ts);
+            CREATE INDEX IF NOT EXISTS idx_messages_ts ON messages(ts);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS summaries (
+                session TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                covered INTEGER NOT NULL,
+                ts REAL NOT NULL
+            );
+        """)
+        self.fts = self._create_fts(db)
+        self._migrate(journal_path)
+
+    def _db(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers run alongside the writer"""
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self.local.db = db
+        return db
+
+    @staticmethod
+    def _create_fts(db: sqlite3.Connection) -> bool:
+        try:
+            db.executescript("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts
+                    USING fts5(content, content='messages', content_rowid='id');
+                CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+                    INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+                    INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                END;
+            """)
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"Warning: SQLite FTS5 not available, search falls back to LIKE: {e}")
+            return False
+
+    def _migrate(self, journal_path: str):
+        db = self._db()
+        if db.execute("SELECT 1 FROM messages LIMIT 1").fetchone():
+            return
+        if not os.path.exists(journal_path) and not any(os.path.isfile(p) for p in LEGACY_PATHS):
+            return
+        # Opening the journal also migrates an old ChatLog.json into it
+        journal = ChatJournal(journal_path, compact_interval=0)
+        records = journal._read_records()
+        journal.close()
+        # Records without a timestamp (older journals) are dated to the import rather than to 1970
+        now = time.time()
+        with self.write_lock:
+            db.execute("BEGIN")
+            db.executemany(
+                "INSERT INTO messages(session, ts, role, content) VALUES (?, ?, ?, ?)",
+                [(r.get("session", "imported"), r.get("ts") or now, r["role"], r["content"]) for r in records]
+            )
+            db.execute("COMMIT")
+        os.replace(journal_path, journal_path + ".migrated")
+        print(f"Imported {len(records)} chat messages into {self.path}")
+
+    def _cleared_before(self) -> int:
+        row = self._db().execute("SELECT value FROM meta WHERE key = 'cleared_before'").fetchone()
+        return int(row[0]) if row else 0
+
+    def append_many(self, messages, sync=False, ts=None):
+        now = time.time() if ts is None else ts
+        rows = [(self.session, now, m["role"], m["content"]) for m in messages]
+        if not rows:
+            return
+        db = self._db()
+        with self.write_lock:
+            db.execute("BEGIN IMMEDIATE")
+            db.executemany("INSERT INTO messages(session, ts, role, content) VALUES (?, ?, ?, ?)", rows)
+            db.execute("COMMIT")
+
+    def tail(self, n, session=None):
+        if n <= 0:
+            return []
+        if session is None:
+            rows = self._db().execute(
+                "SELECT role, content FROM messages WHERE id > ? ORDER BY id DESC LIMIT ?",
+                (self._cleared_before(), n)
+            ).fetchall()
+        else:
+            rows = self._db().execute(
+                "SELECT role, content FROM messages WHERE session = ? AND id > ? ORDER BY ts DESC, id DESC LIMIT ?",
+                (session, self._cleared_before(), n)
+            ).fetchall()
+        return [{"role": role, "content": content} for role, content in reversed(rows)]
+
+    def count(self, session=None):
+        if session is None:
+            row = self._db().execute("SELECT COUNT(*) FROM messages WHERE id > ?", (self._cleared_before(),))
+        else:
+            row = self._db().execute("SELECT COUNT(*) FROM messages WHERE session = ? AND id > ?",
+                                     (session, self._cleared_before()))
+        return row.fetchone()[0]
+
+    def read_all(self):
+        rows = self._db().execute(
+            "SELECT role, content FROM messages WHERE id > ? ORDER BY id", (self._cleared_before(),)
+        ).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+
+    def recent(self, n):
+        if n <= 0:
+            return []
+        rows = self._db().execute(
+            "SELECT role, content, ts, session FROM messages WHERE id > ? ORDER BY id DESC LIMIT ?",
+            (self._cleared_before(), n)
+        ).fetchall()
+        return [{"role": r, "content": c, "ts": ts, "session": s} for r, c, ts, s in reversed(rows)]
+
+    def since(self, start, end=None):
+        rows = self._db().execute(
+            "SELECT role, content, ts, session FROM messages WHERE ts >= ? AND ts < ? AND id > ? ORDER BY ts, id",
+            (start, end if end is not None else float("inf"), self._cleared_before())
+        ).fetchall()
+        return [{"role": r, "content": c, "ts": ts, "session": s} for r, c, ts, s in rows]
+
+    def search(self, text, limit=20):
+        db = self._db()
+        if self.fts:
+            # Quote every term so user text cannot inject FTS5 query syntax
+            terms = " ".join('"' + term.replace('"', '""') + '"' for term in text.split())
+            if not terms:
+                return []
+            rows = db.execute(
+                """SELECT m.role, m.content, m.ts, m.session FROM messages_fts
+                   JOIN messages m ON m.id = messages_fts.rowid
+                   WHERE messages_fts MATCH ? AND m.id > ? ORDER BY m.id DESC LIMIT ?""",
+                (terms, self._cleared_before(), limit)
+            ).fetchall()
+        else:
+            rows = db.execute(
+                "SELECT role, content, ts, session FROM messages WHERE content LIKE ? AND id > ? ORDER BY id DESC LIMIT ?",
+                (f"%{text}%", self._cleared_before(), limit)
+            ).fetchall()
+        return [{"role": r, "content": c, "ts": ts, "session": s} for r, c, ts, s in rows]
+
+    def clear(self, sync=False):
+        """Hide everything logged so far from reads (rows are kept for export/audit)"""
+        db = self._db()
+        with self.write_lock:
+            db.execute(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES ('cleared_before', (SELECT COALESCE(MAX(id), 0) FROM messages))"
+            )
+
+    def save_summary(self, session, summary, covered):
+        db = self._db()
+        with self.write_lock:
+            db.execute("INSERT OR REPLACE INTO summaries(session, summary, covered, ts) VALUES (?, ?, ?, ?)",
+                       (session, summary, covered, time.time()))
+
+    def older_than(self, cutoff):
+        # Cleared messages are archived too; clearing only hides them from the assistant
+        rows = self._db().execute(
+            "SELECT role, content, ts, session FROM messages WHERE ts > 0 AND ts < ? ORDER BY ts, id", (cutoff,)
+        ).fetchall()
+        return [{"role": r, "content": c, "ts": ts, "session": s} for r, c, ts, s in rows]
+
+    def drop_older_than(self, cutoff):
+        db = self._db()
+        with self.write_lock:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute("DELETE FROM messages WHERE ts > 0 AND ts < ?", (cutoff,))
+            db.execute("COMMIT")
+
+    def load_summary(self, session):
+        row = self._db().execute("SELECT summary, covered FROM summaries WHERE session = ?", (session,)).fetchone()
+        return {"summary": row[0], "covered": row[1]} if row else None
+
+    def close(self):
+        db = getattr(self.local, "db", None)
+        if db is not None:
+            db.close()
+            self.local.db = None
+
+
+class ConversationService(ConversationStore):
+    """
+    Process-wide in-memory view of the conversation over a storage backend
+
+    The most recent messages are kept in memory; reads they fully answer are served from there, and
+    writes update memory immediately, then go to the backend on a writer thread so a turn never waits
+    for disk. Reads reaching further back (older sessions, long time ranges) use the backend's indexes.
+    """
+
+    def __init__(self, backend: ConversationStore, window: int = ConversationMemoryMessages):
+        """
+        Initialize the service
+
+        Args:
+            backend (ConversationStore): Store the history is loaded from and written through to
+            window (int): Most recent messages kept in memory
+        """
+        self.backend = backend
+        self.window = max(1, window)
+        self.lock = threading.Lock()
+        self.records: List[Dict] = backend.recent(self.window + 1)
+        # Whether memory still holds the whole live history, and every message of this process's session
+        self.complete = len(self.records) <= self.window
+        self.session_complete = True
+        self.records = self.records[-self.window:]
+        self.summaries: Dict[str, Optional[Dict]] = {}
+        self.pending = queue.Queue()
+        self.listeners = []
+        self.writer = threading.Thread(target=self._write_loop, name="conversation-writer", daemon=True)
+        self.writer.start()
+        atexit.register(self.flush)
+
+    def _write_loop(self):
+        while True:
+            op, payload = self.pending.get()
+            try:
+                if op == "append":
+                    messages, ts = payload
+                    self.backend.append_many(messages, ts=ts)
+                    for listener in self.listeners:
+                        listener(messages)
+                elif op == "clear":
+                    self.backend.clear()
+                elif op == "summary":
+                    self.backend.save_summary(*payload)
+            except Exception as e:
+                print(f"Error writing conversation: {e}")
+            finally:
+                self.pending.task_done()
+
+    def add_listener(self, listener):
+        """Call listener(messages) on the writer thread after each append has been stored"""
+        self.listeners.append(listener)
+
+    def append_many(self, messages, sync=False, ts=None):
+        messages = [{"role": m["role"], "content": m["content"]} for m in messages]
+        if not messages:
+            return
+        now = time.time() if ts is None else ts
+        with self.lock:
+            self.records.extend({**m, "ts": now, "session": self.session} for m in messages)
+            self._trim()
+            # The backend stores the same timestamp, so reads agree whether memory or the backend answers
+            self.pending.put(("append", (messages, now)))
+        if sync:
+            self.flush()
+
+    def _trim(self):
+        """Drop the oldest in-memory messages beyond the window (caller holds the lock)"""
+        excess = len(self.records) - self.window
+        if excess > 0:
+            if any(r["session"] == self.session for r in self.records[:excess]):
+                self.session_complete = False
+            del self.records[:excess]
+            self.complete = False
+
+    def tail(self, n, session=None):
+        if n <= 0:
+            return []
+        with self.lock:
+            records = self.records if session is None else [r for r in self.records if r["session"] == session]
+            # Memory answers when it holds the n latest matches, or every match there is
+            covered = (len(records) >= n or self.complete
+                       or (session is not None and session == self.session and self.session_complete))
+            if covered:
+                return [{"role": r["role"], "content": r["content"]} for r in records[-n:]]
+        self.flush()
+        return self.backend.tail(n, session)
+
+    def count(self, session=None):
+        with self.lock:
+            if self.complete or (session is not None and session == self.session and self.session_complete):
+                return sum(1 for r in self.records if session is None or r["session"] == session)
+        self.flush()
+        return self.backend.count(session)
+
+    def read_all(self):
+        with self.lock:
+            if self.complete:
+                return [{"role": r["role"], "content": r["content"]} for r in self.records]
+        self.flush()
+        return self.backend.read_all()
+
+    def since(self, start, end=None):
+        with self.lock:
+            # Memory answers ranges that start after its oldest message (equal timestamps may straddle the cut)
+            if self.complete or (self.records and start > self.records[0]["ts"]):
+                return [dict(r) for r in self.records
+                        if r["ts"] >= start and (end is None or r["ts"] < end)]
+        self.flush()
+        return self.backend.since(start, end)
+
+    def search(self, text, limit=20):
+        # Full-text search stays with the backend's index; let queued writes land first
+        self.flush()
+        return self.backend.search(text, limit)
+
+    def clear(self, sync=False):
+        with self.lock:
+            self.records = []
+            self.complete = True
+            self.session_complete = True
+            self.pending.put(("clear", None))
+            # The session summary described the cleared history
+            if self.summaries.get(self.session) or self.backend.load_summary(self.session):
+                self.summaries[self.session] = None
+                self.pending.put(("summary", (self.session, "", 0)))
+        if sync:
+            self.flush()
+
+    def save_summary(self, session, summary, covered):
+        with self.lock:
+            self.summaries[session] = {"summary": summary, "covered": covered}
+            self.pending.put(("summary", (session, summary, covered)))
+
+    def load_summary(self, session):
+        with self.lock:
+            if session in self.summaries:
+                return self.summaries[session]
+        summary = self.backend.load_summary(session)
+        with self.lock:
+            self.summaries.setdefault(session, summary)
+            return self.summaries[session]
+
+    def older_than(self, cutoff):
+        self.flush()
+        return self.backend.older_than(cutoff)
+
+    def drop_older_than(self, cutoff):
+        self.flush()
+        self.backend.drop_older_than(cutoff)
+        with self.lock:
+            self.records = [r for r in self.records if r["ts"] >= cutoff or r["ts"] <= 0]
+
+    def is_empty(self):
+        with self.lock:
+            return not self.records
+
+    def flush(self):
+        """Block until every queued write has reached the backend"""
+        # Listeners run on the writer thread, after their append has been stored; waiting there would deadlock
+        if threading.current_thread() is self.writer:
+            return
+        self.pending.join()
+
+    def close(self):
+        self.flush()
+        self.backend.close()
+
+
+def open_store(backend: str = ConversationBackend) -> ConversationStore:
+    """Create the configured conversation store"""
+    if backend == "journal":
+        return JournalConversationStore()
+    return SQLiteConversationStore()
+
+
+# Global instance for easy access; every module shares this one in-memory view
+conversation_store = ConversationService(open_store())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect the conversation store")
+    parser.add_argument("--tail", type=int, metavar="N", help="Show the last N messages")
+    parser.add_argument("--search", metavar="TEXT", help="Show messages mentioning TEXT")
+    parser.add_argument("--since-hours", type=float, metavar="H", help="Show messages from the last H hours")
+    parser.add_argument("--export", metavar="PATH", nargs="?", const=EXPORT_PATH,
+                        help="Export the history in ChatLog.json format")
+    args = parser.parse_args()
+
+    if args.tail:
+        for message in conversation_store.tail(args.tail):
+            print(f"{message['role']}: {message['content']}")
+    if args.search:
+        for message in conversation_store.search(args.search):
+            print(f"[{datetime.datetime.fromtimestamp(message['ts']):%Y-%m-%d %H:%M}] {message['role']}: {message['content']}")
+    if args.since_hours:
+        for message in conversation_store.since(time.time() - args.since_hours * 3600):
+            print(f"[{datetime.datetime.fromtimestamp(message['ts']):%Y-%m-%d %H:%M}] {message['role']}: {message['content']}")
+    if args.export:
+        try:
+            count = conversation_store.export_json(args.export)
+            print(f"Exported {count} messages to {args.export}")
+        except ValueError as e:
+            print(f"Error exporting history: {e}")
+    conversation_store.close()
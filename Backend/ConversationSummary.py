@@ -0,0 +1,137 @@
+"""
+Rolling Conversation Summaries
+Folds older turns of the current session into a running summary in the background, so prompts stay a constant size
+"""
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from dotenv import dotenv_values
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Backend.LLMRouter import llm_router
+from Backend.ConversationStore import conversation_store
+from Backend.ContextBuilder import HistoryWindow
+
+# Load environment variables with absolute path
+env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
+env_vars = dotenv_values(env_path)
+
+Username = env_vars.get("Username", "User")
+Assistantname = env_vars.get("Assistantname", "Assistant")
+
+# Newest messages always kept verbatim in the prompt
+SummaryKeepRecent = int(env_vars.get("SummaryKeepRecent", 6))
+# Older messages are folded into the summary once this many have piled up beyond the recent ones
+SummaryBatch = int(env_vars.get("SummaryBatch", 8))
+SummaryMaxWords = int(env_vars.get("SummaryMaxWords", 150))
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between {user} and the assistant {assistant}.
+Update the summary with the new messages below. Keep names, facts, preferences, decisions and open requests;
+drop small talk. Write plain prose of at most {words} words and reply with the summary only.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}"""
+
+
+class ConversationSummarizer:
+    """Keeps a per-session running summary up to date off the critical path"""
+
+    def __init__(self, store=conversation_store, keep_recent: int = SummaryKeepRecent, batch: int = SummaryBatch,
+                 max_words: int = SummaryMaxWords):
+        """
+        Initialize the summarizer
+
+        Args:
+            store: Conversation store the messages and summaries live in
+            keep_recent (int): Newest messages never summarized
+            batch (int): Unsummarized older messages needed before a summary update runs
+            max_words (int): Length limit given to the model
+        """
+        self.store = store
+        self.keep_recent = keep_recent
+        self.batch = batch
+        self.max_words = max_words
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summarizer")
+        self.lock = threading.Lock()
+        self.running = False
+
+    def _session_count(self) -> int:
+        return self.store.count(session=self.store.session)
+
+    def _current(self, total: int) -> Optional[Dict]:
+        """The stored summary, unless the history it covers has since been cleared"""
+        summary = self.store.load_summary(self.store.session)
+        if not summary or not summary["summary"] or summary["covered"] > total:
+            return None
+        return summary
+
+    def prompt_history(self, window: int = HistoryWindow) -> Tuple[Optional[str], List[Dict[str, str]]]:
+        """
+        History for a prompt: the cached summary plus the messages it does not cover
+
+        Never waits for summarization; without a summary this is just the last `window` messages.
+
+        Returns:
+            Tuple[Optional[str], List[Dict[str, str]]]: (summary text or None, raw messages)
+        """
+        total = self._session_count()
+        summary = self._current(total)
+        if not summary:
+            return None, self.store.tail(window)
+        # Only the newest messages the summary does not cover are read
+        return summary["summary"], self.store.tail(min(window, total - summary["covered"]),
+                                                   session=self.store.session)
+
+    def on_append(self, _messages: List[Dict[str, str]]):
+        """Store listener: schedule a summary update when enough older messages have piled up"""
+        with self.lock:
+            if self.running or not llm_router.available():
+                return
+            total = self._session_count()
+            summary = self._current(total)
+            covered = summary["covered"] if summary else 0
+            if total - self.keep_recent - covered < self.batch:
+                return
+            self.running = True
+            # Messages not yet in the summary, oldest first (messages[covered:total] of the session)
+            messages = self.store.tail(total - covered, session=self.store.session)
+        self.executor.submit(self._update, messages, summary, total)
+
+    def _update(self, messages: List[Dict[str, str]], summary: Optional[Dict], total: int):
+        try:
+            covered = summary["covered"] if summary else 0
+            target = total - self.keep_recent
+            new_messages = messages[:target - covered]
+            labels = {"user": Username, "assistant": Assistantname}
+            new_lines = "\n".join(f"{labels.get(m['role'], m['role'])}: {m['content']}"
+                                  for m in new_messages)
+            prompt = SUMMARY_PROMPT.format(user=Username, assistant=Assistantname, words=self.max_words,
+                                           summary=summary["summary"] if summary else "(none yet)",
+                                           messages=new_lines)
+            text = llm_router.chat_completion([{"role": "user", "content": prompt}], request_type="summary",
+                                              temperature=0.2, max_tokens=self.max_words * 2)
+            # Skip the result if the history was cleared while the model was busy
+            current = self._session_count()
+            if (text and current >= target
+                    and self.store.tail(current - target + 1, session=self.store.session)[0] == new_messages[-1]):
+                self.store.save_summary(self.store.session, text.strip(), target)
+        except Exception as e:
+            print(f"Error updating conversation summary: {e}")
+        finally:
+            with self.lock:
+                self.running = False
+
+
+# Global instance for easy access
+conversation_summarizer = ConversationSummarizer()
+conversation_store.add_listener(conversation_summarizer.on_append)
+
+
+def prompt_history(window: int = HistoryWindow) -> Tuple[Optional[str], List[Dict[str, str]]]:
+    """Summary and raw messages to put in a prompt."""
+    return conversation_summarizer.prompt_history(window)
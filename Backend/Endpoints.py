@@ -0,0 +1,59 @@
+"""
+Service Endpoints
+Base URLs of every external API, overridable from .env so backends can point at the local mock server
+"""
+import os
+from typing import Optional
+from dotenv import dotenv_values
+
+# Load environment variables with absolute path
+env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
+env_vars = dotenv_values(env_path)
+
+# Setting MockAPIBase (e.g. http://127.0.0.1:8765, see utils/mock_server.py) points every service at the mock;
+# a per-service <Name>BaseURL key takes precedence over it
+MockAPIBase = (env_vars.get("MockAPIBase") or "").rstrip("/")
+
+# service name -> (.env override key, public base URL)
+SERVICES = {
+    "cohere": ("CohereBaseURL", "https://api.cohere.com"),
+    "gemini": ("GeminiBaseURL", "https://generativelanguage.googleapis.com"),
+    "groq": ("GroqBaseURL", "https://api.groq.com"),
+    "murf": ("MurfBaseURL", "https://api.murf.ai"),
+    "huggingface": ("HuggingFaceBaseURL", "https://api-inference.huggingface.co"),
+    "geocoding": ("GeocodingBaseURL", "https://geocoding-api.open-meteo.com"),
+    "weather": ("WeatherBaseURL", "https://api.open-meteo.com"),
+    "search": ("SearchBaseURL", "https://www.google.com"),
+    "duckduckgo": ("DuckDuckGoBaseURL", "https://html.duckduckgo.com"),
+    "currency": ("CurrencyBaseURL", "https://api.frankfurter.app"),
+    "stocks": ("StocksBaseURL", "https://query1.finance.yahoo.com"),
+    "sports": ("SportsBaseURL", "https://www.thesportsdb.com"),
+}
+
+
+def _override(name: str) -> Optional[str]:
+    key, _ = SERVICES[name]
+    value = env_vars.get(key)
+    if value:
+        return value.strip().strip('"').strip("'").rstrip("/")
+    if MockAPIBase:
+        return f"{MockAPIBase}/{name}"
+    return None
+
+
+def is_overridden(name: str) -> bool:
+    """True when the service has been pointed away from its public endpoint"""
+    return _override(name) is not None
+
+
+def service_url(name: str) -> str:
+    """
+    Get the base URL of a service
+
+    Args:
+        name (str): One of the keys of SERVICES
+
+    Returns:
+        str: Base URL without a trailing slash
+    """
+    return _override(name) or SERVICES[name][1]
@@ -0,0 +1,325 @@
+"""
+Extractive QA
+Answers typed factual questions ("capital of X", "who is the CEO of Y") straight from search snippets by ranking
+their sentences and voting on the answer span, so the LLM is only called when the snippets are not conclusive
+"""
+import os
+import re
+import sys
+import random
+import sqlite3
+import argparse
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from dotenv import dotenv_values
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Backend.LLMRouter import llm_router
+from Backend.PageFetcher import BM25, tokenize
+
+# Load environment variables with absolute path
+env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
+env_vars = dotenv_values(env_path)
+
+ExtractiveEnabled = (env_vars.get("ExtractiveEnabled") or "true").strip().lower() not in ("0", "false", "no", "off")
+# Answers below this confidence (0-1) go to the LLM instead
+ExtractiveMinConfidence = float(env_vars.get("ExtractiveMinConfidence", 0.75))
+# Share of direct answers that are also put to the LLM in the background to measure agreement
+ExtractiveAuditRate = float(env_vars.get("ExtractiveAuditRate", 0.1))
+
+DB_PATH = os.path.join("Data", "ExtractiveQA.db")
+TOP_SENTENCES = 6
+MAX_ANSWER_WORDS = 35
+
+MONTHS = ("January|February|March|April|May|June|July|August|September|October|November|December|"
+          "Jan|Feb|Mar|Apr|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec")
+# (answer type, question pattern); the first match wins
+QUESTION_TYPES = [
+    ("date", re.compile(r"^(?:when\b|what (?:year|date)\b|which year\b|in what year\b)|\b(?:date of|year of|born on)\b")),
+    ("number", re.compile(r"^how (?:many|much|tall|old|far|long|big|high|deep)\b|\b(?:population of|net worth|"
+                          r"number of|height of|age of|length of|distance)\b")),
+    ("place", re.compile(r"^where\b|\b(?:capital (?:city )?of|headquarter(?:s|ed)|located|birthplace)\b")),
+    # Role words only type "name of the ..." questions; elsewhere they are the topic ("why did the president ...")
+    ("person", re.compile(r"^(?:who|whom|whose)\b|\bname of (?:the )?(?:current )?(?:ceo|founder|co-founder|"
+                          r"president|prime minister|chief minister|governor|chairman|owner|author|director|captain|"
+                          r"coach|inventor|spouse|wife|husband)\b")),
+]
+# Questions asking for a reason, a process or a yes/no verdict have no extractable span
+UNTYPED_QUESTION = re.compile(r"^(?:why|how(?! (?:many|much|tall|old|far|long|big|high|deep)\b)|did|does|do|is|are|"
+                              r"was|were|can|could|should|would|will|has|have|explain|describe)\b")
+WH_WORDS = frozenset({"who", "whom", "whose", "what", "when", "where", "which", "how", "many", "much", "current",
+                      "name", "tell", "me", "please", "today", "now", "currently", "latest"})
+NAME_PATTERN = re.compile(r"\b[A-Z][\w'’.-]*(?:\s+(?:(?:de|da|van|von|bin|al|of|la|le)\s+)?[A-Z][\w'’.-]*)*")
+DATE_PATTERN = re.compile(rf"\b(?:\d{{1,2}} (?:{MONTHS})\.?,? \d{{4}}|(?:{MONTHS})\.? \d{{1,2}},? \d{{4}}|"
+                          rf"(?:{MONTHS}) \d{{4}}|(?:1[0-9]|20)\d{{2}})\b")
+NUMBER_PATTERN = re.compile(r"(?<![\w.])\d[\d,]*(?:\.\d+)?(?:\s*(?:million|billion|trillion|crore|lakh|thousand|"
+                            r"hundred|percent|%|km|kilometres|kilometers|miles|metres|meters|m|feet|ft|kg|years|"
+                            r"years old|cm|inches))?\b")
+# Capitalized words that start sentences or label things rather than name an answer
+NOT_NAMES = frozenset("""The A An In On At It He She They This That These Those His Her Its Their As By For From
+Of To With And But Or If When Where Who What Which How Why Is Are Was Were Be Been Also However According Today
+Yesterday Monday Tuesday Wednesday Thursday Friday Saturday Sunday CEO President Prime Minister Chief Inc Ltd
+Wikipedia News Read More Official Website Home Search Result Results""".split())
+# Calendar words are never a person or place on their own ("until July 2024"); inside a name they stay ("Theresa May")
+CALENDAR_WORDS = frozenset(MONTHS.split("|")) | {"Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday",
+                                                 "Sunday"}
+DATE_PREFIX = re.compile(rf"^(?:(?:{MONTHS}) \d{{1,2}}, \d{{4}}|\d{{1,2}} (?:{MONTHS}) \d{{4}}|\d+ \w+ ago)\s*[—–-]+\s*")
+AUDIT_PROMPT = """Question: {question}
+
+Search snippets:
+{snippets}
+
+Answer the question in as few words as possible, using only the snippets."""
+
+
+def question_type(question: str) -> Optional[str]:
+    """Expected answer type of a question (date, number, place, person), or None when it is not typed"""
+    text = " ".join(question.lower().split())
+    if UNTYPED_QUESTION.search(text):
+        return None
+    for name, pattern in QUESTION_TYPES:
+        if pattern.search(text):
+            return name
+    return None
+
+
+def split_sentences(snippets: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Sentences of every snippet, each with the URL it came from"""
+    sentences = []
+    for snippet in snippets:
+        text = DATE_PREFIX.sub("", " ".join(snippet.get("text", "").split()))
+        for sentence in re.split(r"(?<=[.!?])\s+(?=[A-Z0-9\"'])|\s+(?:\.\.\.|…)\s*", text):
+            sentence = sentence.strip(" .…")
+            if len(sentence.split()) >= 3:
+                sentences.append({"url": snippet.get("url", ""), "text": sentence})
+    return sentences
+
+
+def candidates(sentence: str, kind: str, question_terms: set) -> List[str]:
+    """Answer spans of the expected type in a sentence, excluding words the question already contains"""
+    if kind == "date":
+        return DATE_PATTERN.findall(sentence)
+    if kind == "number":
+        # Years are dates, not quantities
+        return [n.strip() for n in NUMBER_PATTERN.findall(sentence) if not re.fullmatch(r"(?:1[0-9]|20)\d{2}", n)]
+    spans = []
+    # Dates are blanked first so their month names cannot join or become a name
+    sentence = DATE_PATTERN.sub(lambda match: " " * len(match.group(0)), sentence)
+    for match in NAME_PATTERN.finditer(sentence):
+        # Label words split a run ("Microsoft CEO Satya Nadella" is two names)
+        for part in re.split(rf"\b(?:{'|'.join(NOT_NAMES)})\b", match.group(0)):
+            span = part.strip(" .,'’")
+            if span and span not in CALENDAR_WORDS and not set(tokenize(span)) <= question_terms:
+                spans.append(span)
+    return spans
+
+
+class ExtractiveQA:
+    """Sentence ranking (BM25 plus question-term coverage) and cross-source voting on typed answer spans"""
+
+    def __init__(self, path: str = DB_PATH, min_confidence: float = ExtractiveMinConfidence,
+                 audit_rate: float = ExtractiveAuditRate):
+        """
+        Initialize the answerer
+
+        Args:
+            path (str): SQLite file for the fire-rate and accuracy counters
+            min_confidence (float): Confidence needed to answer without the LLM
+            audit_rate (float): Share of direct answers checked against the LLM in the background
+        """
+        self.path = path
+        self.min_confidence = min_confidence
+        self.audit_rate = audit_rate
+        self.local = threading.local()
+        self.write_lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db().execute("""
+            CREATE TABLE IF NOT EXISTS stats (
+                kind TEXT NOT NULL,
+                outcome TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (kind, outcome)
+            )
+        """)
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            self.local.db = db
+        return db
+
+    def _count(self, kind: str, outcome: str):
+        try:
+            with self.write_lock:
+                self._db().execute(
+                    "INSERT INTO stats(kind, outcome, count) VALUES (?, ?, 1) "
+                    "ON CONFLICT(kind, outcome) DO UPDATE SET count = count + 1", (kind, outcome))
+        except sqlite3.Error as e:
+            print(f"Error recording extractive QA stats: {e}")
+
+    def extract(self, question: str, snippets: List[Dict[str, str]]) -> Optional[Dict]:
+        """
+        Best answer span for a question
+
+        Args:
+            question (str): User question
+            snippets (List[Dict[str, str]]): Dicts with 'url' and 'text' (result descriptions, page passages)
+
+        Returns:
+            Optional[Dict]: 'kind', 'span', 'sentence' (the best snippet sentence opening with the span, or None),
+            'url', 'sources' and 'confidence', or None for untyped questions and snippets without a candidate
+        """
+        kind = question_type(question)
+        if not kind:
+            return None
+        sentences = split_sentences(snippets)
+        if not sentences:
+            return None
+        question_terms = set(tokenize(question)) - WH_WORDS
+        if not question_terms:
+            return None
+
+        # Lexical relevance, normalized to the best sentence, blended with coverage of the question terms
+        lexical = BM25([tokenize(s["text"]) for s in sentences]).scores(list(question_terms))
+        best_lexical = max(lexical) or 1.0
+        scored = []
+        for sentence, score in zip(sentences, lexical):
+            coverage = len(question_terms & set(tokenize(sentence["text"]))) / len(question_terms)
+            scored.append((0.5 * score / best_lexical + 0.5 * coverage, coverage, sentence))
+        scored.sort(key=lambda item: -item[0])
+
+        # Every top sentence votes for its spans with its score; a source counts once per span
+        weights: Dict[str, float] = defaultdict(float)
+        sources: Dict[str, set] = defaultdict(set)
+        evidence: Dict[str, Tuple[float, float, Dict[str, str]]] = {}
+        # Best sentence that opens with the span, i.e. states it as its subject ("Canberra is the capital ...")
+        leads: Dict[str, str] = {}
+        for score, coverage, sentence in scored[:TOP_SENTENCES]:
+            if score <= 0:
+                break
+            host = urlsplit(sentence["url"]).netloc or sentence["url"]
+            for span in dict.fromkeys(candidates(sentence["text"], kind, question_terms)):
+                key = span.lower()
+                if host not in sources[key]:
+                    weights[key] += score
+                    sources[key].add(host)
+                if key not in evidence or score > evidence[key][0]:
+                    evidence[key] = (score, coverage, sentence)
+                if key not in leads and sentence["text"].lower().startswith(key):
+                    leads[key] = sentence["text"]
+        if not weights:
+            return None
+
+        # A span also collects the votes of the spans it contains ("1998" backs "September 4, 1998",
+        # "Nadella" backs "Satya Nadella")
+        inside = {key: [other for other in weights if other == key or re.search(rf"\b{re.escape(other)}\b", key)]
+                  for key in weights}
+        totals = {key: sum(weights[other] for other in inside[key]) for key in weights}
+        backers = {key: set().union(*(sources[other] for other in inside[key])) for key in weights}
+        ranked = sorted(weights, key=lambda key: (-totals[key], -len(key)))
+        best = ranked[0]
+        rivals = [totals[key] for key in ranked[1:] if key not in inside[best] and best not in inside[key]]
+        margin = (totals[best] - max(rivals, default=0.0)) / totals[best]
+        support = min(1.0, len(backers[best]) / 2)
+        score, coverage, sentence = evidence[best]
+        confidence = 0.35 * coverage + 0.4 * support + 0.25 * margin
+        span = next(s for s in candidates(sentence["text"], kind, question_terms) if s.lower() == best)
+        return {"kind": kind, "span": span, "sentence": leads.get(best), "url": sentence["url"],
+                "sources": len(backers[best]), "confidence": round(confidence, 3)}
+
+    def answer(self, question: str, snippets: List[Dict[str, str]]) -> Optional[str]:
+        """
+        Direct answer when the snippets settle the question, otherwise None (the caller asks the LLM)
+
+        Every call is counted per question type; a sample of direct answers is audited against the LLM.
+        """
+        kind = question_type(question) or "untyped"
+        self._count(kind, "asked")
+        result = self.extract(question, snippets)
+        if not result or result["confidence"] < self.min_confidence:
+            return None
+        self._count(kind, "fired")
+        print(f"Extractive answer '{result['span']}' ({result['kind']}, confidence {result['confidence']:.2f}, "
+              f"{result['sources']} sources)")
+        if self.audit_rate > 0 and random.random() < self.audit_rate and llm_router.available():
+            threading.Thread(target=self.audit, args=(question, snippets, result), name="extractive-audit",
+                             daemon=True).start()
+        sentence = result["sentence"]
+        # Only a sentence stating the span as its subject is read out; otherwise the span alone
+        if sentence and len(sentence.split()) <= MAX_ANSWER_WORDS:
+            return sentence if sentence.endswith((".", "!", "?")) else sentence + "."
+        return f"{result['span']}."
+
+    def audit(self, question: str, snippets: List[Dict[str, str]], result: Dict):
+        """Ask the LLM the same question and record whether it agrees with the extracted span"""
+        try:
+            listing = "\n".join(f"- {s['text']}" for s in snippets[:8])
+            reply = llm_router.chat_completion(
+                [{"role": "user", "content": AUDIT_PROMPT.format(question=question, snippets=listing)}],
+                request_type="audit", temperature=0.0, max_tokens=40)
+            if not reply:
+                return
+            span_terms, reply_terms = set(tokenize(result["span"])), set(tokenize(reply))
+            agreed = bool(span_terms) and len(span_terms & reply_terms) / len(span_terms) >= 0.5
+            self._count(result["kind"], "agreed" if agreed else "disagreed")
+            if not agreed:
+                print(f"Extractive audit: '{result['span']}' vs LLM '{reply.strip()[:80]}' for '{question}'")
+        except Exception as e:
+            print(f"Error auditing extractive answer: {e}")
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per question type: asked, fired, fire rate, audited answers and their agreement with the LLM"""
+        report: Dict[str, Dict[str, float]] = {}
+        for kind, outcome, count in self._db().execute("SELECT kind, outcome, count FROM stats"):
+            for name in (kind, "total"):
+                counts = report.setdefault(name, {"asked": 0, "fired": 0, "agreed": 0, "disagreed": 0})
+                counts[outcome] += count
+        for counts in report.values():
+            counts["fire_rate"] = counts["fired"] / counts["asked"] if counts["asked"] else 0.0
+            audited = counts["agreed"] + counts["disagreed"]
+            counts["accuracy"] = counts["agreed"] / audited if audited else None
+        return report
+
+
+# Global instance for easy access
+extractive_qa = ExtractiveQA()
+
+
+def extractive_answer(question: str, snippets: List[Dict[str, str]]) -> Optional[str]:
+    """Answer from the snippets alone, or None when the LLM is needed."""
+    if not ExtractiveEnabled:
+        return None
+    try:
+        return extractive_qa.answer(question, snippets)
+    except Exception as e:
+        print(f"Error in extractive answering: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extractive answers from search snippets")
+    parser.add_argument("question", nargs="?", help="Search the question and show the extracted answer")
+    parser.add_argument("--stats", action="store_true", help="Show fire rate and audited accuracy per question type")
+    args = parser.parse_args()
+
+    if args.question:
+        from Backend.SearchFanout import search_fanout
+        results = search_fanout.search(args.question, 5)
+        snippets = [{"url": r["url"], "text": f"{r['title']}. {r['description']}"} for r in results]
+        result = extractive_qa.extract(args.question, snippets)
+        print(result or "No typed answer found")
+    if args.stats:
+        for name, counts in sorted(extractive_qa.stats().items(), key=lambda item: item[0] == "total"):
+            accuracy = f"{counts['accuracy']:.0%}" if counts["accuracy"] is not None else "n/a"
+            print(f"{name:>8}: {counts['fired']}/{counts['asked']} answered directly ({counts['fire_rate']:.0%}), "
+                  f"audited accuracy {accuracy} ({counts['agreed']}/{counts['agreed'] + counts['disagreed']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,21 @@
 import google.generativeai as genai
 import os
 from dotenv import dotenv_values
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union, Sequence
+from concurrent.futures import ThreadPoolExecutor
 import PIL.Image
+import PIL.ImageOps
 import base64
+import hashlib
 import io
 import time
+import threading
+from collections import OrderedDict
 import wave
 import struct
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Backend.Endpoints import service_url, is_overridden
 
 # Load environment variables
 env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
@@ -15,18 +23,32 @@ env_vars = dotenv_values(env_path)
 GEMINI_API_KEY = env_vars.get("GEMINI_API_KEY")
 
 # Configure the API
-if GEMINI_API_KEY:
+if GEMINI_API_KEY and is_overridden("gemini"):
+    # Alternate endpoints (e.g. the local mock server) are only reachable over REST
+    genai.configure(api_key=GEMINI_API_KEY, transport="rest",
+                    client_options={"api_endpoint": service_url("gemini")})
+elif GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
 
 # Simple cache for responses
 _response_cache = {}
 
+# Image analysis cache keyed by (image content hash, prompt), least recently used evicted first
+_image_cache = OrderedDict()
+_image_cache_lock = threading.Lock()
+IMAGE_CACHE_SIZE = 256
+
+# Longest image side sent to the vision model; larger images are downsampled before upload
+ImageMaxSide = int(env_vars.get("GeminiImageMaxSide", 1024))
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.gif', '.tiff')
+
 class GeminiAPI:
     """A class to interact with Google's Gemini API for various AI capabilities."""
     
     def __init__(self):
         """Initialize the Gemini API client."""
         self.model = None
+        self.vision_model = None
         if GEMINI_API_KEY:
             # Use the faster model for general queries
             self.model = genai.GenerativeModel('models/gemini-2.0-flash')
@@ -71,7 +93,8 @@ class GeminiAPI:
             print(f"Error generating text: {e}")
             return None
     
-    def chat_completion(self, messages: List[Dict[str, str]], temperature: float = 0.7, max_tokens: int = 1024) -> Optional[str]:
+    def chat_completion(self, messages: List[Dict[str, str]], temperature: float = 0.7, max_tokens: int = 1024,
+                        timeout: Optional[float] = None) -> Optional[str]:
         """
         Generate a chat completion based on conversation history.
         
@@ -79,6 +102,7 @@ class GeminiAPI:
             messages (List[Dict[str, str]]): List of message dictionaries with 'role' and 'content'
             temperature (float): Controls randomness in generation
             max_tokens (int): Maximum number of tokens to generate
+            timeout (Optional[float]): Seconds to wait for the API before giving up
             
         Returns:
             Optional[str]: Generated response or None if failed
@@ -111,7 +135,7 @@ class GeminiAPI:
             response = chat.send_message(chat_history[-1]['parts'][0], generation_config=genai.types.GenerationConfig(
                 temperature=temperature,
                 max_output_tokens=max_tokens
-            ))
+            ), request_options={'timeout': timeout} if timeout else None)
             
             # Cache the response
             _response_cache[cache_key] = (time.time(), response.text)
@@ -121,12 +145,45 @@ class GeminiAPI:
             print(f"Error in chat completion: {e}")
             return None
     
-    def analyze_image(self, image_path: str, prompt: str = "Describe this image") -> Optional[str]:
+    @staticmethod
+    def _read_image(image: Union[str, bytes]) -> bytes:
+        """Original bytes of an image given as a path or as bytes"""
+        if isinstance(image, str):
+            with open(image, 'rb') as image_file:
+                return image_file.read()
+        return bytes(image)
+    
+    @staticmethod
+    def _prepare_image(raw: bytes, max_side: int = ImageMaxSide) -> Dict[str, Any]:
+        """
+        Downsample an encoded image to the model's useful resolution and re-encode it compactly.
+        
+        Returns:
+            Dict[str, Any]: {'mime_type': ..., 'data': encoded bytes}
+        """
+        img = PIL.Image.open(io.BytesIO(raw))
+        img = PIL.ImageOps.exif_transpose(img)
+        if max(img.size) > max_side:
+            img.thumbnail((max_side, max_side), PIL.Image.LANCZOS)
+        
+        if img.mode in ('RGBA', 'LA', 'P'):
+            # Keep transparency (screenshots, icons) lossless
+            img = img.convert('RGBA')
+            mime_type, save_kwargs = 'image/png', {'format': 'PNG', 'optimize': True}
+        else:
+            img = img.convert('RGB')
+            mime_type, save_kwargs = 'image/jpeg', {'format': 'JPEG', 'quality': 85, 'optimize': True}
+        
+        buffer = io.BytesIO()
+        img.save(buffer, **save_kwargs)
+        return {'mime_type': mime_type, 'data': buffer.getvalue()}
+    
+    def analyze_image(self, image_path: Union[str, bytes], prompt: str = "Describe this image") -> Optional[str]:
         """
         Analyze an image using Gemini's vision capabilities.
         
         Args:
-            image_path (str): Path to the image file
+            image_path (Union[str, bytes]): Path to the image file, or the encoded image bytes
             prompt (str): Prompt for image analysis
             
         Returns:
@@ -136,16 +193,56 @@ class GeminiAPI:
             if not self.vision_model:
                 raise ValueError("Gemini Vision model not available.")
             
-            # Load and process image
-            img = PIL.Image.open(image_path)
+            # The same image content with the same prompt is answered from cache, before any decoding
+            raw = self._read_image(image_path)
+            cache_key = (hashlib.sha256(raw).hexdigest(), prompt)
+            with _image_cache_lock:
+                if cache_key in _image_cache:
+                    _image_cache.move_to_end(cache_key)
+                    return _image_cache[cache_key]
+            
+            # Downsample and re-encode only on a miss
+            prepared = self._prepare_image(raw)
             
             # Generate content
-            response = self.vision_model.generate_content([prompt, img])
+            response = self.vision_model.generate_content([
+                prompt,
+                {'mime_type': prepared['mime_type'], 'data': prepared['data']}
+            ])
+            
+            with _image_cache_lock:
+                _image_cache[cache_key] = response.text
+                while len(_image_cache) > IMAGE_CACHE_SIZE:
+                    _image_cache.popitem(last=False)
             return response.text
         except Exception as e:
             print(f"Error analyzing image: {e}")
             return None
     
+    def analyze_images(self, images: Union[str, Sequence[str]], prompt: str = "Describe this image",
+                       max_workers: int = 4) -> Dict[str, Optional[str]]:
+        """
+        Analyze many images concurrently with bounded parallelism.
+        
+        Args:
+            images (Union[str, Sequence[str]]): A directory of images, or a list of image paths
+            prompt (str): Prompt for image analysis
+            max_workers (int): Maximum number of requests in flight
+            
+        Returns:
+            Dict[str, Optional[str]]: Analysis result per image path (None for failures)
+        """
+        if isinstance(images, str):
+            images = sorted(
+                os.path.join(images, name) for name in os.listdir(images)
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+        if not images:
+            return {}
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(images)))) as executor:
+            results = executor.map(lambda path: self.analyze_image(path, prompt), images)
+            return dict(zip(images, results))
+    
     def solve_math_problem(self, problem: str, direct_answer: bool = True) -> Optional[str]:
         """
         Solve mathematical problems using Gemini.
@@ -207,12 +304,61 @@ class GeminiAPI:
             print(f"Error debugging code: {e}")
             return None
     
-    def speech_to_text(self, audio_file_path: str) -> Optional[str]:
+    @staticmethod
+    def _audio_to_inline(audio: Union[str, bytes, Any], sample_rate: int = 16000, channels: int = 1) -> Dict[str, Any]:
+        """
+        Turn a file path, encoded audio bytes, raw 16-bit PCM bytes or a numpy buffer into Gemini inline data.
+        
+        Raw PCM and numpy buffers are wrapped in a WAV header in memory, so nothing touches the disk.
+        """
+        if isinstance(audio, str):
+            if not os.path.exists(audio):
+                raise FileNotFoundError(f"Audio file not found: {audio}")
+            with open(audio, 'rb') as audio_file:
+                audio_data = audio_file.read()
+            
+            # Determine MIME type based on file extension
+            if audio.lower().endswith('.mp3'):
+                mime_type = 'audio/mp3'
+            elif audio.lower().endswith('.wav'):
+                mime_type = 'audio/wav'
+            elif audio.lower().endswith('.flac'):
+                mime_type = 'audio/flac'
+            else:
+                mime_type = 'audio/wav'  # default
+            return {'mime_type': mime_type, 'data': audio_data}
+        
+        if hasattr(audio, 'dtype') and hasattr(audio, 'tobytes'):
+            # numpy buffer: float samples are in [-1, 1], integer samples are already PCM
+            if audio.dtype.kind == 'f':
+                audio = (audio.clip(-1.0, 1.0) * 32767)
+            pcm = audio.astype('<i2').tobytes()
+        else:
+            pcm = bytes(audio)
+            if pcm[:4] == b'RIFF' and pcm[8:12] == b'WAVE':
+                return {'mime_type': 'audio/wav', 'data': pcm}
+            if pcm[:4] == b'fLaC':
+                return {'mime_type': 'audio/flac', 'data': pcm}
+            if pcm[:3] == b'ID3':
+                return {'mime_type': 'audio/mp3', 'data': pcm}
+        
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wf:
+            wf.setnchannels(channels)
+            wf.setsampwidth(2)  # 16-bit
+            wf.setframerate(sample_rate)
+            wf.writeframes(pcm)
+        return {'mime_type': 'audio/wav', 'data': buffer.getvalue()}
+    
+    def speech_to_text(self, audio: Union[str, bytes, Any], sample_rate: int = 16000, channels: int = 1) -> Optional[str]:
         """
         Convert speech to text using Gemini's audio processing capabilities.
         
         Args:
-            audio_file_path (str): Path to the audio file (WAV format recommended)
+            audio: Path to an audio file (WAV format recommended), encoded WAV/MP3/FLAC bytes,
+                raw 16-bit PCM bytes or a numpy buffer (int16, or float in [-1, 1])
+            sample_rate (int): Sample rate of raw PCM / numpy input
+            channels (int): Channel count of raw PCM / numpy input
             
         Returns:
             Optional[str]: Transcribed text or None if failed
@@ -221,32 +367,17 @@ class GeminiAPI:
             if not self.model:
                 raise ValueError("Gemini API not configured. Check your API key.")
             
-            # Check if file exists
-            if not os.path.exists(audio_file_path):
-                raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
-            
-            # For Gemini, we can directly pass the audio file
+            # For Gemini, we can directly pass the audio bytes
             # Gemini supports various audio formats
-            with open(audio_file_path, 'rb') as audio_file:
-                audio_data = audio_file.read()
+            inline_audio = self._audio_to_inline(audio, sample_rate, channels)
             
             # Create a prompt for speech recognition
             prompt = "Listen to this audio and transcribe exactly what is being said. Provide only the transcription without any additional text."
             
-            # Determine MIME type based on file extension
-            if audio_file_path.lower().endswith('.mp3'):
-                mime_type = 'audio/mp3'
-            elif audio_file_path.lower().endswith('.wav'):
-                mime_type = 'audio/wav'
-            elif audio_file_path.lower().endswith('.flac'):
-                mime_type = 'audio/flac'
-            else:
-                mime_type = 'audio/wav'  # default
-            
             # Use the model to process audio
             response = self.model.generate_content([
                 prompt,
-                {'mime_type': mime_type, 'data': audio_data}
+                inline_audio
             ])
             
             # Add debug information
@@ -256,6 +387,25 @@ class GeminiAPI:
         except Exception as e:
             print(f"Error in speech to text conversion: {e}")
             return None
+    
+    def batch_speech_to_text(self, clips: Sequence[Union[str, bytes, Any]], max_workers: int = 4,
+                             sample_rate: int = 16000, channels: int = 1) -> List[Optional[str]]:
+        """
+        Transcribe many clips concurrently with bounded parallelism.
+        
+        Args:
+            clips: File paths, audio bytes or numpy buffers (see speech_to_text)
+            max_workers (int): Maximum number of requests in flight
+            sample_rate (int): Sample rate of raw PCM / numpy clips
+            channels (int): Channel count of raw PCM / numpy clips
+            
+        Returns:
+            List[Optional[str]]: Transcriptions in the same order as clips (None for failures)
+        """
+        if not clips:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(clips)))) as executor:
+            return list(executor.map(lambda clip: self.speech_to_text(clip, sample_rate, channels), clips))
 
 # Global instance for easy access
 gemini_api = GeminiAPI()
@@ -269,10 +419,15 @@ def chat_completion(messages: List[Dict[str, str]], temperature: float = 0.7, ma
     """Get chat completion from Gemini."""
     return gemini_api.chat_completion(messages, temperature, max_tokens)
 
-def analyze_image(image_path: str, prompt: str = "Describe this image") -> Optional[str]:
+def analyze_image(image_path: Union[str, bytes], prompt: str = "Describe this image") -> Optional[str]:
     """Analyze an image using Gemini Vision."""
     return gemini_api.analyze_image(image_path, prompt)
 
+def analyze_images(images: Union[str, Sequence[str]], prompt: str = "Describe this image",
+                   max_workers: int = 4) -> Dict[str, Optional[str]]:
+    """Analyze a directory or list of images concurrently using Gemini Vision."""
+    return gemini_api.analyze_images(images, prompt, max_workers)
+
 def solve_math_problem(problem: str, direct_answer: bool = True) -> Optional[str]:
     """Solve a math problem using Gemini."""
     return gemini_api.solve_math_problem(problem, direct_answer)
@@ -285,6 +440,11 @@ def debug_code(code: str, error: str = "", language: str = "Python") -> Optional
     """Debug code using Gemini."""
     return gemini_api.debug_code(code, error, language)
 
-def speech_to_text(audio_file_path: str) -> Optional[str]:
-    """Convert speech to text using Gemini."""
-    return gemini_api.speech_to_text(audio_file_path)
\ No newline at end of file
+def speech_to_text(audio: Union[str, bytes, Any], sample_rate: int = 16000, channels: int = 1) -> Optional[str]:
+    """Convert speech (file path, audio bytes or numpy buffer) to text using Gemini."""
+    return gemini_api.speech_to_text(audio, sample_rate, channels)
+
+def batch_speech_to_text(clips: Sequence[Union[str, bytes, Any]], max_workers: int = 4,
+                         sample_rate: int = 16000, channels: int = 1) -> List[Optional[str]]:
+    """Transcribe many clips concurrently using Gemini."""
+    return gemini_api.batch_speech_to_text(clips, max_workers, sample_rate, channels)
\ No newline at end of file
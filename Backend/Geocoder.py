@@ -0,0 +1,353 @@
+"""
+Geocoder
+Resolves place names to coordinates from a bundled offline gazetteer first, then a persistent cache of remote lookups
+"""
+import os
+import re
+import sys
+import time
+import bisect
+import sqlite3
+import argparse
+import difflib
+import threading
+import unicodedata
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional
+from dotenv import dotenv_values
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Backend.Endpoints import service_url
+from Backend.HttpClient import http_client
+
+# Load environment variables with absolute path
+env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
+env_vars = dotenv_values(env_path)
+
+# Remote "not found" answers are remembered this long; found places are kept indefinitely
+GeocodeNegativeHours = float(env_vars.get("GeocodeNegativeHours", 24))
+# All spelling variations of a remote lookup run at once and share this deadline (seconds)
+GeocodeDeadline = float(env_vars.get("GeocodeDeadline", 5.0))
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), "..", "Data", "Gazetteer.tsv")
+CACHE_PATH = os.path.join("Data", "GeocodeCache.db")
+MIN_PREFIX = 5
+MIN_FUZZY_SCORE = 0.85
+
+
+def normalize_place(name: str) -> str:
+    """Lookup key of a place name: accents, case, punctuation and a leading 'the' removed"""
+    text = unicodedata.normalize("NFKD", name)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    text = text.replace("&", " and ").replace("'", "")
+    text = re.sub(r"[^\w\s]", " ", text)
+    text = " ".join(text.split())
+    if text.startswith("the "):
+        text = text[4:]
+    return text
+
+
+def _trigrams(key: str) -> List[str]:
+    padded = f"  {key} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+class Gazetteer:
+    """Countries, Indian states/UTs and major cities with coordinates, indexed for exact, prefix and fuzzy lookup"""
+
+    def __init__(self, path: str = GAZETTEER_PATH):
+        """
+        Initialize the gazetteer (the file is read on the first lookup)
+
+        Args:
+            path (str): Tab-separated gazetteer file
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.places: Optional[List[Dict]] = None
+
+    def _ensure_loaded(self):
+        if self.places is not None:
+            return
+        with self.lock:
+            if self.places is not None:
+                return
+            places = []
+            keys: Dict[str, int] = {}
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        if not line.strip() or line.startswith("#"):
+                            continue
+                        name, kind, region, latitude, longitude, aliases = line.rstrip("\n").split("\t")
+                        index = len(places)
+                        places.append({"name": name, "kind": kind, "region": region,
+                                       "latitude": float(latitude), "longitude": float(longitude)})
+                        # Earlier rows win when names collide
+                        for alias in [name] + [a for a in aliases.split("|") if a]:
+                            keys.setdefault(normalize_place(alias), index)
+            except (OSError, ValueError) as e:
+                print(f"Error loading gazetteer: {e}")
+            # Key -> place index, a sorted key list for prefix search and a trigram index for fuzzy search
+            self.keys = keys
+            self.sorted_keys = sorted(keys)
+            self.trigram_index: Dict[str, List[int]] = {}
+            for position, key in enumerate(self.sorted_keys):
+                for gram in set(_trigrams(key)):
+                    self.trigram_index.setdefault(gram, []).append(position)
+            self.places = places
+
+    def _exact(self, key: str) -> Optional[Dict]:
+        index = self.keys.get(key)
+        return self.places[index] if index is not None else None
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """Places whose name or alias starts with prefix, best ranked first"""
+        self._ensure_loaded()
+        key = normalize_place(prefix)
+        if not key:
+            return []
+        start = bisect.bisect_left(self.sorted_keys, key)
+        indexes = set()
+        for candidate in self.sorted_keys[start:]:
+            if not candidate.startswith(key):
+                break
+            indexes.add(self.keys[candidate])
+        return [self.places[i] for i in sorted(indexes)[:limit]]
+
+    def fuzzy(self, name: str) -> Optional[Dict]:
+        """Closest place for a misspelt name, or None when nothing is close enough"""
+        self._ensure_loaded()
+        key = normalize_place(name)
+        if len(key) < 4:
+            return None
+        grams = _trigrams(key)
+        shared = Counter(position for gram in set(grams) for position in self.trigram_index.get(gram, ()))
+        best, best_score = None, MIN_FUZZY_SCORE
+        for position, count in shared.most_common(20):
+            if count < len(grams) // 3:
+                break
+            candidate = self.sorted_keys[position]
+            score = difflib.SequenceMatcher(None, key, candidate).ratio()
+            if score > best_score:
+                best, best_score = candidate, score
+        return self._exact(best) if best else None
+
+    def lookup(self, name: str) -> Optional[Dict]:
+        """
+        Find a place by name, alias, unambiguous prefix or close spelling
+
+        "Hyderabad, India" style names are also tried without the part after the comma.
+
+        Returns:
+            Optional[Dict]: Place with 'name', 'kind', 'region', 'latitude', 'longitude', or None
+        """
+        self._ensure_loaded()
+        candidates = [name] + ([name.split(",")[0]] if "," in name else [])
+        for candidate in candidates:
+            key = normalize_place(candidate)
+            if not key:
+                continue
+            place = self._exact(key)
+            if place:
+                return place
+            if len(key) >= MIN_PREFIX:
+                completions = self.complete(key, limit=1)
+                if completions:
+                    return completions[0]
+            place = self.fuzzy(key)
+            if place:
+                return place
+        return None
+
+
+class Geocoder:
+    """Name -> coordinates: offline gazetteer, then a persistent cache of remote results, then the geocoding API"""
+
+    def __init__(self, gazetteer: Optional[Gazetteer] = None, cache_path: str = CACHE_PATH,
+                 negative_hours: float = GeocodeNegativeHours, deadline: float = GeocodeDeadline):
+        """
+        Initialize the geocoder
+
+        Args:
+            gazetteer (Gazetteer): Offline place index
+            cache_path (str): SQLite file remembering remote lookups across restarts
+            negative_hours (float): How long a remote "not found" is trusted
+            deadline (float): Seconds a remote lookup (all variations together) may take
+        """
+        self.gazetteer = gazetteer or Gazetteer()
+        self.cache_path = cache_path
+        self.negative_ttl = negative_hours * 3600
+        self.deadline = deadline
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="geocoder")
+        self.local = threading.local()
+        self.write_lock = threading.Lock()
+        self.sources = Counter()
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db().execute("""
+            CREATE TABLE IF NOT EXISTS places (
+                query TEXT PRIMARY KEY,
+                name TEXT,
+                region TEXT,
+                latitude REAL,
+                longitude REAL,
+                ts REAL NOT NULL
+            )
+        """)
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.cache_path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            self.local.db = db
+        return db
+
+    def cached(self, location: str) -> Optional[Dict]:
+        """
+        Remembered remote result for a location
+
+        Returns:
+            Optional[Dict]: The place, {} for a remembered "not found", or None when unknown
+        """
+        row = self._db().execute(
+            "SELECT name, region, latitude, longitude, ts FROM places WHERE query = ?", (normalize_place(location),)
+        ).fetchone()
+        if not row:
+            return None
+        if row[0] is None:
+            return {} if time.time() - row[4] < self.negative_ttl else None
+        return {"name": row[0], "kind": "remote", "region": row[1], "latitude": row[2], "longitude": row[3]}
+
+    def remember(self, location: str, place: Optional[Dict]):
+        place = place or {}
+        with self.write_lock:
+            self._db().execute(
+                "INSERT OR REPLACE INTO places(query, name, region, latitude, longitude, ts) VALUES (?, ?, ?, ?, ?, ?)",
+                (normalize_place(location), place.get("name"), place.get("region"), place.get("latitude"),
+                 place.get("longitude"), time.time())
+            )
+
+    @staticmethod
+    def variations(location: str) -> List[str]:
+        """Spellings tried against the remote geocoder"""
+        variations = [location]
+        lowered = location.lower()
+        if " " in lowered:
+            # For multi-word locations, also try without spaces or with underscores
+            variations.append(lowered.replace(" ", ""))
+            variations.append(lowered.replace(" ", "_"))
+        return variations
+
+    def _remote_lookup(self, name: str, timeout: float) -> Optional[Dict]:
+        """One call to the geocoding API; raises on network errors"""
+        # Variations go out together over the shared keep-alive pool; the deadline leaves no time for retries
+        response = http_client.get(f"{service_url('geocoding')}/v1/search",
+                                   params={"name": name, "count": 1, "language": "en", "format": "json"},
+                                   timeout=timeout, retries=0)
+        data = response.json()
+        if data.get("results"):
+            result = data["results"][0]
+            return {"name": result["name"], "kind": "remote", "region": result.get("country", ""),
+                    "latitude": result["latitude"], "longitude": result["longitude"]}
+        return None
+
+    def _remote(self, location: str) -> Optional[Dict]:
+        """
+        Look up every spelling variation concurrently
+
+        The earliest variation in the list that finds a place wins: a later one is only used once every
+        earlier one has come back empty. Lookups still running when the answer is known are cancelled.
+        """
+        variations = self.variations(location)
+        futures = {self.executor.submit(self._remote_lookup, variation, self.deadline): rank
+                   for rank, variation in enumerate(variations)}
+        outcomes: Dict[int, Optional[Dict]] = {}
+        failed = False
+        until = time.perf_counter() + self.deadline
+        pending = set(futures)
+        place = None
+
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, until - time.perf_counter()), return_when=FIRST_COMPLETED)
+            if not done:
+                failed = True
+                break
+            for future in done:
+                try:
+                    outcomes[futures[future]] = future.result()
+                except Exception:
+                    outcomes[futures[future]] = None
+                    failed = True
+            # Walk the ranking until a variation is still outstanding or one has found the place
+            for rank in range(len(variations)):
+                if rank not in outcomes:
+                    break
+                if outcomes[rank]:
+                    place = outcomes[rank]
+                    break
+            if place:
+                break
+
+        for future in pending:
+            future.cancel()
+        if place:
+            self.remember(location, place)
+        elif not failed:
+            # Only a clean "not found" is remembered, not a network failure or timeout
+            self.remember(location, None)
+        return place
+
+    def resolve(self, location: str) -> Optional[Dict]:
+        """
+        Coordinates for a place name
+
+        Args:
+            location (str): Place name as extracted from the query
+
+        Returns:
+            Optional[Dict]: Place with 'name', 'region', 'latitude', 'longitude', or None
+        """
+        place = self.gazetteer.lookup(location)
+        if place:
+            self.sources["gazetteer"] += 1
+            return place
+        try:
+            place = self.cached(location)
+        except sqlite3.Error as e:
+            print(f"Error reading geocode cache: {e}")
+            place = None
+        if place is not None:
+            self.sources["cache"] += 1
+            return place or None
+        self.sources["remote"] += 1
+        return self._remote(location)
+
+
+# Global instance for easy access
+geocoder = Geocoder()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resolve place names to coordinates")
+    parser.add_argument("names", nargs="*", help="Place names to resolve")
+    parser.add_argument("--complete", metavar="PREFIX", help="List gazetteer places starting with PREFIX")
+    args = parser.parse_args()
+
+    for location in args.names:
+        started = time.perf_counter()
+        place = geocoder.resolve(location)
+        elapsed = (time.perf_counter() - started) * 1000
+        if place:
+            print(f"{location}: {place['name']} ({place['kind']}, {place['region']}) "
+                  f"{place['latitude']:.2f}, {place['longitude']:.2f}  [{elapsed:.1f} ms]")
+        else:
+            print(f"{location}: not found  [{elapsed:.1f} ms]")
+    if args.complete:
+        for place in geocoder.gazetteer.complete(args.complete):
+            print(f"{place['name']} ({place['kind']}, {place['region']})")
+    if args.names:
+        print(", ".join(f"{source}: {count}" for source, count in geocoder.sources.items()))
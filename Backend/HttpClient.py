@@ -0,0 +1,261 @@
+"""
+HTTP Client
+One pooled client for every outbound API call: keep-alive connections per host, uniform timeouts and retries,
+HTTP/2 when httpx is installed, a sync and an async facade, and per-host metrics
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import threading
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from dotenv import dotenv_values
+
+try:
+    import httpx
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# Load environment variables with absolute path
+env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
+env_vars = dotenv_values(env_path)
+
+# Keep-alive connections kept open per host
+HttpPoolPerHost = int(env_vars.get("HttpPoolPerHost", 8))
+# Default timeouts (seconds) for requests that do not pass their own
+HttpConnectTimeout = float(env_vars.get("HttpConnectTimeout", 3.0))
+HttpReadTimeout = float(env_vars.get("HttpReadTimeout", 15.0))
+# Retries after a failed attempt, with exponential backoff starting at HttpBackoff seconds
+HttpRetries = int(env_vars.get("HttpRetries", 2))
+HttpBackoff = float(env_vars.get("HttpBackoff", 0.3))
+# Negotiate HTTP/2 for plain (non-streaming) requests when httpx[http2] is installed
+HttpHTTP2 = (env_vars.get("HttpHTTP2") or "true").strip().lower() not in ("0", "false", "no", "off")
+
+MAX_HOST_POOLS = 32
+MAX_RETRY_AFTER = 5.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# requests keyword arguments the HTTP/2 transport understands; anything else goes through requests
+HTTP2_ARGUMENTS = frozenset({"params", "data", "json", "headers", "timeout", "allow_redirects"})
+
+
+class HttpClient:
+    """Shared keep-alive session with retries and per-host metrics; responses are always requests.Response"""
+
+    def __init__(self, pool_per_host: int = HttpPoolPerHost, retries: int = HttpRetries,
+                 backoff: float = HttpBackoff, timeout: tuple = (HttpConnectTimeout, HttpReadTimeout),
+                 http2: bool = HttpHTTP2):
+        """
+        Initialize the client
+
+        Args:
+            pool_per_host (int): Keep-alive connections kept per host
+            retries (int): Default retries after a failed attempt
+            backoff (float): First retry delay in seconds, doubled per attempt
+            timeout (tuple): Default (connect, read) timeout in seconds
+            http2 (bool): Use HTTP/2 through httpx when it is installed
+        """
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = requests.Session()
+        # One adapter: urllib3 keeps a separate connection pool for every host it talks to
+        self.adapter = HTTPAdapter(pool_connections=MAX_HOST_POOLS, pool_maxsize=pool_per_host)
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+        self.http2 = None
+        if http2 and HTTPX_AVAILABLE:
+            self.http2 = httpx.Client(http2=True, follow_redirects=True, limits=httpx.Limits(
+                max_connections=MAX_HOST_POOLS * pool_per_host, max_keepalive_connections=MAX_HOST_POOLS))
+        self.metrics: Dict[str, Dict[str, float]] = defaultdict(lambda: {
+            "requests": 0, "errors": 0, "retries": 0, "seconds": 0.0, "max_seconds": 0.0, "http2": 0})
+        self.lock = threading.Lock()
+
+    def _record(self, host: str, seconds: float, failed: bool, retried: bool, http2: bool):
+        with self.lock:
+            entry = self.metrics[host]
+            entry["requests"] += 1
+            entry["errors"] += failed
+            entry["retries"] += retried
+            entry["seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            entry["http2"] += http2
+
+    def _send_http2(self, method: str, url: str, kwargs: Dict) -> requests.Response:
+        """Send through httpx and hand back an equivalent requests.Response"""
+        timeout = kwargs.get("timeout", self.timeout)
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        data = kwargs.get("data")
+        try:
+            reply = self.http2.request(
+                method, url, params=kwargs.get("params"), json=kwargs.get("json"), headers=kwargs.get("headers"),
+                data=data if isinstance(data, dict) else None,
+                content=data if data is not None and not isinstance(data, dict) else None,
+                timeout=httpx.Timeout(read, connect=connect),
+                follow_redirects=kwargs.get("allow_redirects", True))
+        except httpx.ConnectTimeout as e:
+            raise requests.exceptions.ConnectTimeout(str(e))
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.ReadTimeout(str(e))
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+        except httpx.HTTPError as e:
+            raise requests.exceptions.RequestException(str(e))
+        response = requests.Response()
+        response.status_code = reply.status_code
+        response._content = reply.content
+        # The body is already read and there is no urllib3 stream: close() and iter_content() must not touch raw
+        response._content_consumed = True
+        response.headers = CaseInsensitiveDict(reply.headers)
+        response.url = str(reply.url)
+        response.reason = reply.reason_phrase
+        response.encoding = reply.charset_encoding
+        response.elapsed = reply.elapsed
+        return response
+
+    def _delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        delay = self.backoff * (2 ** attempt)
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    pass
+        return min(max(delay, 0.0), MAX_RETRY_AFTER)
+
+    def request(self, method: str, url: str, retries: Optional[int] = None, **kwargs) -> requests.Response:
+        """
+        Send a request over the shared pools
+
+        Args:
+            method (str): HTTP method
+            url (str): Absolute URL
+            retries (int): Retries for this call (defaults to HttpRetries). Connect timeouts are retried for
+                every method; other network errors and 429/5xx answers only for idempotent methods.
+            **kwargs: Anything requests.Session.request accepts (timeout defaults to HttpConnectTimeout/HttpReadTimeout)
+
+        Returns:
+            requests.Response: The final response (which may still carry an error status)
+        """
+        method = method.upper()
+        retries = self.retries if retries is None else retries
+        kwargs.setdefault("timeout", self.timeout)
+        host = urlsplit(url).netloc.lower()
+        idempotent = method in IDEMPOTENT_METHODS
+        use_http2 = (self.http2 is not None and url.startswith("https://") and not kwargs.get("stream")
+                     and set(kwargs) <= HTTP2_ARGUMENTS)
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            response = None
+            try:
+                if use_http2:
+                    response = self._send_http2(method, url, kwargs)
+                else:
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                # A connect timeout never reached the server, so even a POST is safe to resend
+                retryable = idempotent or isinstance(e, requests.exceptions.ConnectTimeout)
+                self._record(host, time.perf_counter() - started, True, attempt > 0, use_http2)
+                if not retryable or attempt >= retries:
+                    raise
+            else:
+                failed = response.status_code in RETRY_STATUSES
+                self._record(host, time.perf_counter() - started, failed, attempt > 0, use_http2)
+                if not failed or not idempotent or attempt >= retries:
+                    return response
+                response.close()
+            time.sleep(self._delay(attempt, response))
+            attempt += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    async def arequest(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Async facade: the same pooled request run on a worker thread, so it never binds to one event loop"""
+        return await asyncio.to_thread(self.request, method, url, **kwargs)
+
+    async def aget(self, url: str, **kwargs) -> requests.Response:
+        return await self.arequest("GET", url, **kwargs)
+
+    async def apost(self, url: str, **kwargs) -> requests.Response:
+        return await self.arequest("POST", url, **kwargs)
+
+    def connections(self) -> Dict[str, Dict[str, int]]:
+        """Connections opened and requests served per host by the HTTP/1.1 pools (reuse = requests / connections)"""
+        pools = {}
+        try:
+            manager = self.adapter.poolmanager
+            for key in list(manager.pools.keys()):
+                pool = manager.pools.get(key)
+                if pool is not None:
+                    host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+                    pools[host] = {"connections": pool.num_connections, "requests": pool.num_requests}
+        except Exception as e:
+            print(f"Error reading connection pools: {e}")
+        return pools
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per-host metrics since start-up
+
+        Returns:
+            Dict[str, Dict[str, float]]: host -> requests, errors, retries, average/max latency in seconds,
+            HTTP/2 requests and, for HTTP/1.1 hosts, connections opened
+        """
+        connections = self.connections()
+        with self.lock:
+            result = {}
+            for host, entry in self.metrics.items():
+                row = dict(entry)
+                row["average_seconds"] = round(entry["seconds"] / entry["requests"], 4) if entry["requests"] else 0.0
+                row["connections"] = connections.get(host, {}).get("connections", 0)
+                result[host] = row
+            return result
+
+
+# Global instance for easy access
+http_client = HttpClient()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch URLs through the shared HTTP client and show pool metrics")
+    parser.add_argument("urls", nargs="+", help="URLs to GET")
+    parser.add_argument("--repeat", type=int, default=3, help="Requests per URL")
+    args = parser.parse_args()
+
+    print(f"HTTP/2: {'on' if http_client.http2 else 'off (install httpx[http2])' if HttpHTTP2 else 'disabled'}")
+    for url in args.urls:
+        for attempt in range(args.repeat):
+            started = time.perf_counter()
+            try:
+                response = http_client.get(url)
+                print(f"{response.status_code} {url} in {(time.perf_counter() - started) * 1000:.0f} ms")
+            except requests.exceptions.RequestException as e:
+                print(f"Error fetching {url}: {e}")
+    for host, row in http_client.stats().items():
+        print(f"{host}: {row['requests']} requests, {row['connections']} connections, {row['errors']} errors, "
+              f"{row['retries']} retries, avg {row['average_seconds'] * 1000:.0f} ms, "
+              f"max {row['max_seconds'] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
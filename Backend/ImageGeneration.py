@@ -7,9 +7,13 @@ import os
 from time import sleep
 import base64
 import json
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Backend.Endpoints import service_url
+from Backend.HttpClient import http_client
 
 # Set API URL and headers
-API_URL = "https://api-inference.huggingface.co/models/stabilityai/stable-diffusion-xl-base-1.0"
+API_URL = f"{service_url('huggingface')}/models/stabilityai/stable-diffusion-xl-base-1.0"
 headers = {"Authorization": f"Bearer {get_key('.env', 'HuggingFaceAPIKey')}"}
 
 # Ensure the Data folder exists
@@ -35,7 +39,7 @@ def open_images(prompt):
 
 async def query(payload):
     try:
-        response = await asyncio.to_thread(requests.post, API_URL, headers=headers, json=payload)
+        response = await http_client.apost(API_URL, headers=headers, json=payload)
         response.raise_for_status()  # Raise an error for HTTP failures
         return response.content
     except requests.exceptions.RequestException as e:
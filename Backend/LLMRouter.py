@@ -0,0 +1,289 @@
+"""
+Latency-aware LLM Router
+Picks the fastest healthy provider (Gemini or Groq) per request type and hedges slow calls
+"""
+import os
+import sys
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Optional, Tuple
+from dotenv import dotenv_values
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Backend.GeminiAPI import gemini_api
+from Backend.Endpoints import service_url, is_overridden
+
+# Load environment variables with absolute path
+env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
+env_vars = dotenv_values(env_path)
+
+GroqAPIKey = env_vars.get("GroqAPIKey")
+if GroqAPIKey:
+    GroqAPIKey = GroqAPIKey.strip().strip('"').strip("'")
+
+GroqModel = "llama-3.3-70b-versatile"
+
+# Percentile of the primary provider's latency after which a second provider is hedged
+HedgePercentile = float(env_vars.get("LLMHedgePercentile", 90))
+# Hedge delay used until a provider has enough latency samples (seconds)
+DefaultHedgeDelay = float(env_vars.get("LLMHedgeDelay", 2.5))
+# Providers whose recent error rate exceeds this are skipped while another is healthy
+MaxErrorRate = float(env_vars.get("LLMMaxErrorRate", 0.5))
+# Seconds after which a provider call is abandoned and counted as failed
+ProviderTimeout = float(env_vars.get("LLMProviderTimeout", 30))
+
+
+class ProviderStats:
+    """Rolling latency and error statistics for one provider and request type"""
+
+    def __init__(self, window: int = 50):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool):
+        with self.lock:
+            self.outcomes.append(ok)
+            # Only successful calls describe how fast the provider really answers
+            if ok:
+                self.latencies.append(latency)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Return the p-th latency percentile in seconds, or None without samples"""
+        with self.lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(p / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def error_rate(self) -> float:
+        with self.lock:
+            if not self.outcomes:
+                return 0.0
+            return 1.0 - (sum(self.outcomes) / len(self.outcomes))
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        return {
+            "samples": len(self.outcomes),
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "error_rate": self.error_rate(),
+        }
+
+
+class LLMRouter:
+    """Routes chat completions to the fastest healthy provider and hedges slow requests"""
+
+    def __init__(self, hedge_percentile: float = HedgePercentile, default_hedge_delay: float = DefaultHedgeDelay,
+                 max_error_rate: float = MaxErrorRate, timeout: float = ProviderTimeout):
+        """
+        Initialize the router
+
+        Args:
+            hedge_percentile (float): Latency percentile of the primary provider to wait before hedging
+            default_hedge_delay (float): Hedge delay in seconds before enough samples exist
+            max_error_rate (float): Error rate above which a provider is treated as unhealthy
+            timeout (float): Seconds after which a provider call is abandoned
+        """
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.max_error_rate = max_error_rate
+        self.timeout = timeout
+        self.providers: Dict[str, Callable[[List[Dict[str, str]], float, int], Optional[str]]] = {}
+        self.stats: Dict[Tuple[str, str], ProviderStats] = {}
+        self.stats_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="llm-router")
+        self.last_provider: Optional[str] = None
+        self.served_log = deque(maxlen=100)
+
+    def register_provider(self, name: str, func: Callable[[List[Dict[str, str]], float, int], Optional[str]]):
+        """
+        Register a provider
+
+        Args:
+            name (str): Provider name reported for served turns
+            func: Function taking (messages, temperature, max_tokens) and returning text or None
+        """
+        self.providers[name] = func
+
+    def available(self) -> bool:
+        return bool(self.providers)
+
+    def _stats_for(self, name: str, request_type: str) -> ProviderStats:
+        with self.stats_lock:
+            key = (name, request_type)
+            if key not in self.stats:
+                self.stats[key] = ProviderStats()
+            return self.stats[key]
+
+    def rank(self, request_type: str = "chat") -> List[str]:
+        """
+        Order providers by health, then by median latency
+
+        Unmeasured providers come after the measured ones of the same health, in registration order.
+        """
+        def sort_key(item):
+            position, name = item
+            stats = self._stats_for(name, request_type)
+            unhealthy = stats.error_rate() > self.max_error_rate
+            median = stats.percentile(50)
+            return (unhealthy, median is None, median or 0.0, position)
+
+        return [name for _, name in sorted(enumerate(self.providers), key=sort_key)]
+
+    def _hedge_delay(self, name: str, request_type: str) -> float:
+        delay = self._stats_for(name, request_type).percentile(self.hedge_percentile)
+        return delay if delay is not None else self.default_hedge_delay
+
+    def _call(self, name: str, request_type: str, messages: List[Dict[str, str]], temperature: float,
+              max_tokens: int) -> Optional[str]:
+        """Run one provider and record its latency and outcome"""
+        start = time.perf_counter()
+        try:
+            result = self.providers[name](messages, temperature, max_tokens)
+        except Exception as e:
+            print(f"LLM provider {name} failed: {e}")
+            result = None
+        latency = time.perf_counter() - start
+        # An answer arriving after the timeout was abandoned by complete() and counts as a failure
+        self._stats_for(name, request_type).record(min(latency, self.timeout), bool(result) and latency < self.timeout)
+        return result
+
+    def complete(self, messages: List[Dict[str, str]], request_type: str = "chat", temperature: float = 0.7,
+                 max_tokens: int = 1024) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Get a chat completion from the best provider, hedging a second one if the first is slow
+
+        Args:
+            messages (List[Dict[str, str]]): Conversation with 'role' and 'content'
+            request_type (str): Request category used for per-type latency tracking
+            temperature (float): Sampling temperature
+            max_tokens (int): Maximum number of tokens to generate
+
+        Returns:
+            Tuple[Optional[str], Optional[str]]: (response text, provider that served it)
+        """
+        start = time.perf_counter()
+        ranked = self.rank(request_type)
+        pending = {}
+        started = {}
+        hedged = False
+
+        for position, name in enumerate(ranked):
+            # Hedged only when this call races one still in flight; failing over after an error is not
+            hedged = hedged or bool(pending)
+            future = self.executor.submit(self._call, name, request_type, messages, temperature, max_tokens)
+            pending[future] = name
+            started[future] = time.perf_counter()
+            is_last = position == len(ranked) - 1
+            hedge_at = None if is_last else started[future] + self._hedge_delay(name, request_type)
+
+            # Wait for any in-flight provider until the hedge delay of the newest one expires
+            # or the oldest one runs out of time
+            while pending:
+                wake = min(started[f] for f in pending) + self.timeout
+                if hedge_at is not None:
+                    wake = min(wake, hedge_at)
+                done, _ = wait(pending, timeout=max(0.0, wake - time.perf_counter()), return_when=FIRST_COMPLETED)
+                if not done:
+                    now = time.perf_counter()
+                    for expired in [f for f in pending if now - started[f] >= self.timeout]:
+                        # A call still queued behind busy workers never starts; a running one is ended
+                        # by the client's own request timeout (see the providers below)
+                        expired.cancel()
+                        print(f"LLM provider {pending.pop(expired)} timed out after {self.timeout:g}s")
+                    if is_last:
+                        continue
+                    break
+                for finished in done:
+                    served_by = pending.pop(finished)
+                    result = finished.result()
+                    if result:
+                        # Hedged calls that have not started yet are no longer needed
+                        for other in pending:
+                            other.cancel()
+                        self._record_served(request_type, served_by, time.perf_counter() - start, hedged)
+                        return result, served_by
+                # A failure hedges the next provider immediately
+                if not is_last:
+                    break
+
+        self._record_served(request_type, None, time.perf_counter() - start, hedged)
+        return None, None
+
+    def chat_completion(self, messages: List[Dict[str, str]], request_type: str = "chat", temperature: float = 0.7,
+                        max_tokens: int = 1024) -> Optional[str]:
+        """Same as complete() but returns only the text; the provider is kept in last_provider"""
+        answer, _ = self.complete(messages, request_type, temperature, max_tokens)
+        return answer
+
+    def _record_served(self, request_type: str, provider: Optional[str], latency: float, hedged: bool):
+        self.last_provider = provider
+        self.served_log.append({
+            "time": time.time(),
+            "request_type": request_type,
+            "provider": provider,
+            "latency": latency,
+            "hedged": hedged,
+        })
+        if provider:
+            print(f"LLM turn served by {provider} in {latency:.2f}s{' (hedged)' if hedged else ''}")
+
+    def report(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Return latency/error statistics keyed by 'provider/request_type'"""
+        with self.stats_lock:
+            items = list(self.stats.items())
+        return {f"{name}/{request_type}": stats.snapshot() for (name, request_type), stats in items}
+
+
+def _gemini_provider(messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> Optional[str]:
+    return gemini_api.chat_completion(messages, temperature=temperature, max_tokens=max_tokens,
+                                      timeout=ProviderTimeout)
+
+
+_groq_client = None
+
+
+def _groq_provider(messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> Optional[str]:
+    global _groq_client
+    if _groq_client is None:
+        from groq import Groq
+        # No client-side retries: each retry would restart the timeout, and the router fails over itself
+        if is_overridden("groq"):
+            _groq_client = Groq(api_key=GroqAPIKey, base_url=service_url("groq"), timeout=ProviderTimeout,
+                                max_retries=0)
+        else:
+            _groq_client = Groq(api_key=GroqAPIKey, timeout=ProviderTimeout, max_retries=0)
+
+    completion = _groq_client.chat.completions.create(
+        model=GroqModel,
+        messages=[{"role": msg["role"], "content": msg["content"]} for msg in messages],
+        max_tokens=max_tokens,
+        temperature=temperature,
+        top_p=1,
+        stream=False,
+    )
+    answer = completion.choices[0].message.content
+    return answer.replace("</s>", "") if answer else None
+
+
+# Global instance for easy access
+llm_router = LLMRouter()
+if gemini_api.model:
+    llm_router.register_provider("gemini", _gemini_provider)
+if GroqAPIKey:
+    llm_router.register_provider("groq", _groq_provider)
+
+
+def chat_completion(messages: List[Dict[str, str]], request_type: str = "chat", temperature: float = 0.7,
+                    max_tokens: int = 1024) -> Optional[str]:
+    """Get a chat completion from the fastest healthy provider."""
+    return llm_router.chat_completion(messages, request_type, temperature, max_tokens)
+
+
+def last_provider() -> Optional[str]:
+    """Name of the provider that served the most recent turn."""
+    return llm_router.last_provider
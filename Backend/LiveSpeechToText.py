@@ -9,7 +9,6 @@ import queue
 from collections import deque
 import sys
 import os
-import wave
 from typing import Callable, Optional, Any, Union
 
 # Add project root to path
@@ -33,6 +32,8 @@ try:
 except ImportError:
     print("Warning: faster-whisper not available. Install with: pip install faster-whisper")
 
+from Backend.SpeechModels import speech_models
+
 # Try to import Google Gemini for cloud STT
 GEMINI_AVAILABLE = False
 gemini_api = None
@@ -93,9 +94,10 @@ class LiveSpeechToText:
         """Initialize the STT model based on selected backend"""
         if self.stt_backend == "whisper" and WHISPER_AVAILABLE and WhisperModel is not None:
             try:
-                # Initialize Whisper model (small model for balance of speed and accuracy)
-                self.stt_model = WhisperModel("small", device="cpu", compute_type="int8")
-                print("Whisper STT model initialized")
+                # Shared Whisper model (small model for balance of speed and accuracy), loaded once per process
+                self.stt_model = speech_models.get("faster-whisper", "small", device="cpu", compute_type="int8")
+                if self.stt_model is not None:
+                    print("Whisper STT model initialized")
             except Exception as e:
                 print(f"Error initializing Whisper model: {e}")
                 self.stt_model = None
@@ -181,23 +183,11 @@ class LiveSpeechToText:
             return ""
         
         try:
-            # Save audio to temporary file
-            temp_file = "temp_speech.wav"
-            with wave.open(temp_file, 'wb') as wf:
-                wf.setnchannels(self.channels)
-                wf.setsampwidth(2)  # 16-bit
-                wf.setframerate(self.sample_rate)
-                wf.writeframes(audio_data)
-            
-            # Transcribe with Gemini
+            # Send the PCM buffer directly; it is wrapped as WAV in memory
             if hasattr(gemini_api, 'speech_to_text'):
-                result = gemini_api.speech_to_text(temp_file)
+                result = gemini_api.speech_to_text(audio_data, sample_rate=self.sample_rate, channels=self.channels)
             else:
                 result = ""
-            
-            # Clean up
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
                 
             return result if result else ""
         except Exception as e:
@@ -0,0 +1,175 @@
+"""
+Location Extractor
+Finds the place a weather question is about in one pass over the prompt, using the gazetteer and preposition cues
+"""
+import os
+import re
+import sys
+import unicodedata
+from typing import Callable, Dict, List, Optional, Tuple
+from dotenv import dotenv_values
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Backend.Geocoder import Gazetteer, geocoder
+
+# Load environment variables with absolute path
+env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
+env_vars = dotenv_values(env_path)
+
+Assistantname = (env_vars.get("Assistantname") or "Jasmine").strip().lower()
+# Guesses below this confidence are not looked up as weather locations (the query goes to web search instead)
+LocationMinConfidence = float(env_vars.get("LocationMinConfidence", 0.5))
+
+TOKEN = re.compile(r"[^\W_]+|[?!.,;:()]")
+PREPOSITIONS = frozenset({"in", "at", "for", "of", "near", "around", "from"})
+# "of" vouches for a known place ("climate of kerala") but opens no span for unknown words ("temperature of water")
+OPEN_SPAN_PREPOSITIONS = PREPOSITIONS - {"of"}
+# A period after a short abbreviation belongs to the name ("st. louis", "mt. abu")
+ABBREVIATION = re.compile(r"\b([a-z]{1,3})\.(?=\s+[a-z])")
+ARTICLES = frozenset({"the", "a", "an"})
+# Words that end (or cannot start) a place name after a preposition
+STOP_WORDS = frozenset("""
+today tomorrow tonight yesterday now currently right later morning afternoon evening night noon
+week weekend month year hour hours day days next this coming upcoming
+winter summer spring autumn monsoon season
+monday tuesday wednesday thursday friday saturday sunday
+please thanks thank you sir madam
+weather temperature temperatures forecast climate rain raining rainy snow snowing sunny cloudy windy hot cold
+humidity humid wind degrees celsius fahrenheit outside there here my our your home house office
+is are was will be going like look looks it how what whats and or but with
+""".split())
+PUNCTUATION = frozenset("?!.,;:()")
+# Place names that are also ordinary words or first names; only trusted right after a preposition
+AMBIGUOUS = frozenset({"nice", "male", "chad", "jordan", "turkey", "guinea", "georgia", "puri", "gaya", "rio",
+                       "lima", "phoenix", "orlando", "austin", "salem", "kota", "bali", "diu", "daman", "mali",
+                       "niger", "reading", "santiago", "washington", "kashi", "wet", "pondy"})
+MAX_OPEN_WORDS = 4
+
+CONFIDENCE_GAZETTEER_AFTER_PREPOSITION = 0.95
+CONFIDENCE_GAZETTEER = 0.8
+# Unknown words after a preposition are below LocationMinConfidence until the geocoder knows them
+CONFIDENCE_OPEN_SPAN = 0.45
+CONFIDENCE_OPEN_SPAN_RESOLVED = 0.7
+
+
+class LocationExtractor:
+    """Single left-to-right scan: longest gazetteer phrase at each token, plus the span after a preposition"""
+
+    def __init__(self, gazetteer: Optional[Gazetteer] = None, assistant_name: str = Assistantname,
+                 resolver: Optional[Callable[[str], Optional[Dict]]] = None):
+        """
+        Initialize the extractor
+
+        Args:
+            gazetteer (Gazetteer): Place index whose names are matched (defaults to the geocoder's)
+            assistant_name (str): Name the user may address the assistant with
+            resolver (Callable): Place lookup that confirms spans missing from the gazetteer (e.g. geocoder.resolve);
+                without one they stay below LocationMinConfidence
+        """
+        self.gazetteer = gazetteer or geocoder.gazetteer
+        self.assistant_name = assistant_name
+        self.resolver = resolver
+        self.phrases: Optional[Dict[str, List[Tuple[Tuple[str, ...], Dict]]]] = None
+
+    def _phrase_index(self) -> Dict[str, List[Tuple[Tuple[str, ...], Dict]]]:
+        """First word -> (words, place) of every gazetteer name and alias, longest first"""
+        if self.phrases is None:
+            self.gazetteer._ensure_loaded()
+            phrases: Dict[str, List[Tuple[Tuple[str, ...], Dict]]] = {}
+            for key, index in self.gazetteer.keys.items():
+                words = tuple(key.split())
+                if words:
+                    phrases.setdefault(words[0], []).append((words, self.gazetteer.places[index]))
+            for candidates in phrases.values():
+                candidates.sort(key=lambda item: -len(item[0]))
+            self.phrases = phrases
+        return self.phrases
+
+    def extract(self, prompt: str) -> Tuple[str, float]:
+        """
+        Find the location a prompt asks about
+
+        Args:
+            prompt (str): User query
+
+        Returns:
+            Tuple[str, float]: (location, confidence between 0 and 1); ("", 0.0) when there is none.
+            Gazetteer places are returned under their canonical name.
+        """
+        best = self._scan(prompt)
+        if best[1] == CONFIDENCE_OPEN_SPAN and self.resolver is not None:
+            try:
+                if self.resolver(best[0]):
+                    return best[0], CONFIDENCE_OPEN_SPAN_RESOLVED
+            except Exception as e:
+                print(f"Error resolving location '{best[0]}': {e}")
+        return best
+
+    def _scan(self, prompt: str) -> Tuple[str, float]:
+        phrases = self._phrase_index()
+        text = unicodedata.normalize("NFKD", prompt)
+        text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+        text = ABBREVIATION.sub(r"\1", text)
+        # Same folding as gazetteer keys, so token runs compare equal to normalized names
+        tokens = TOKEN.findall(text.replace("&", " and ").replace("'", "").replace("’", ""))
+        tokens = [t for t in tokens if t != self.assistant_name]
+
+        best = ("", 0.0)
+        after_preposition = False
+        open_span: Optional[List[str]] = None
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+
+            # Longest gazetteer phrase starting here
+            match = None
+            for words, place in phrases.get(token, ()):
+                if tuple(tokens[i:i + len(words)]) == words:
+                    match = (words, place)
+                    break
+            if match:
+                words, place = match
+                ambiguous = len(" ".join(words)) <= 3 or " ".join(words) in AMBIGUOUS
+                # Inside the span after a preposition ("in north goa") the place still follows the preposition
+                if after_preposition or open_span:
+                    confidence = CONFIDENCE_GAZETTEER_AFTER_PREPOSITION
+                elif not ambiguous:
+                    confidence = CONFIDENCE_GAZETTEER
+                else:
+                    confidence = 0.0
+                # The first place wins ties; a later one only replaces it with stronger evidence
+                if confidence > best[1]:
+                    best = (place["name"], confidence)
+                open_span = None
+                after_preposition = False
+                i += len(words)
+                continue
+
+            if token in PREPOSITIONS:
+                after_preposition = True
+                open_span = [] if token in OPEN_SPAN_PREPOSITIONS else None
+            elif after_preposition and token in ARTICLES and not open_span:
+                pass
+            elif open_span is not None and token not in STOP_WORDS and token not in PUNCTUATION \
+                    and token not in PREPOSITIONS and not token.isdigit():
+                open_span.append(token)
+                after_preposition = False
+            else:
+                if open_span and len(open_span) <= MAX_OPEN_WORDS and best[1] < CONFIDENCE_OPEN_SPAN:
+                    best = (" ".join(open_span), CONFIDENCE_OPEN_SPAN)
+                open_span = None
+                after_preposition = False
+            i += 1
+
+        if open_span and len(open_span) <= MAX_OPEN_WORDS and best[1] < CONFIDENCE_OPEN_SPAN:
+            best = (" ".join(open_span), CONFIDENCE_OPEN_SPAN)
+        return best
+
+
+# Global instance for easy access
+location_extractor = LocationExtractor(resolver=geocoder.resolve)
+
+
+def extract_location(prompt: str) -> Tuple[str, float]:
+    """Location named in a prompt and the confidence of the guess."""
+    return location_extractor.extract(prompt)
@@ -0,0 +1,539 @@
+"""
+Long-term Conversational Memory
+Embeds past turns into a memory-mapped vector index (IVF + brute-force tail) and recalls relevant ones per query
+"""
+import os
+import re
+import sys
+import json
+import time
+import queue
+import hashlib
+import argparse
+import threading
+from typing import Dict, List, Optional, Tuple
+from dotenv import dotenv_values
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    print("Warning: numpy not available, long-term memory disabled")
+
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# Load environment variables with absolute path
+env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
+env_vars = dotenv_values(env_path)
+
+Username = env_vars.get("Username", "User")
+Assistantname = env_vars.get("Assistantname", "Assistant")
+
+# Small CPU sentence-transformers model; "hashing" (or a missing package) uses the built-in hashing embedding
+MemoryEmbeddingModel = env_vars.get("MemoryEmbeddingModel", "all-MiniLM-L6-v2")
+MemoryTopK = int(env_vars.get("MemoryTopK", 3))
+# Minimum cosine similarity; defaults to the embedder's own threshold
+MemoryMinScore = float(env_vars["MemoryMinScore"]) if env_vars.get("MemoryMinScore") else None
+# Coarse lists probed per query, and how many unindexed vectors are scanned before they are merged into the lists
+MemoryProbe = int(env_vars.get("MemoryProbe", 8))
+MemoryTailLimit = int(env_vars.get("MemoryTailLimit", 20000))
+
+MEMORY_DIR = os.path.join("Data", "Memory")
+# Below this many turns a brute-force scan is faster than building coarse lists
+MIN_INDEXED = 4096
+HASHING_DIM = 384
+STOP_WORDS = {"a", "an", "and", "are", "do", "does", "for", "i", "in", "is", "it", "me", "my", "of", "on", "or",
+              "the", "to", "was", "what", "you", "your"}
+
+
+class HashingEmbedder:
+    """Dependency-free embedding: signed feature hashing of words and word pairs"""
+
+    min_score = 0.2
+
+    def __init__(self, dim: int = HASHING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        words = [word for word in re.findall(r"[a-z0-9']+", text.lower()) if word not in STOP_WORDS]
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed(self, texts: List[str]):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+                vectors[row, digest % self.dim] += 1.0 if (digest >> 63) else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-9)
+
+
+class SentenceEmbedder:
+    """sentence-transformers model run on the CPU"""
+
+    min_score = 0.35
+
+    def __init__(self, model_name: str):
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"st:{model_name}"
+
+    def embed(self, texts: List[str]):
+        return self.model.encode(texts, batch_size=64, normalize_embeddings=True,
+                                 convert_to_numpy=True).astype(np.float32)
+
+
+def turn_texts(messages: List[Dict[str, str]]) -> List[str]:
+    """Format messages as memories; a user message and the reply that follows it form one memory"""
+    turns = []
+    last_role = None
+    for message in messages:
+        label = Username if message["role"] == "user" else Assistantname
+        line = f"{label}: {message['content']}"
+        if message["role"] == "assistant" and last_role == "user":
+            turns[-1] += "\n" + line
+        else:
+            turns.append(line)
+        last_role = message["role"]
+    return turns
+
+
+def make_embedder():
+    """Create the configured embedder, falling back to hashing"""
+    if MemoryEmbeddingModel != "hashing" and SENTENCE_TRANSFORMERS_AVAILABLE:
+        try:
+            return SentenceEmbedder(MemoryEmbeddingModel)
+        except Exception as e:
+            print(f"Could not load embedding model {MemoryEmbeddingModel}, using hashing embedding: {e}")
+    return HashingEmbedder()
+
+
+class LongTermMemory:
+    """
+    Append-only vector memory of past turns
+
+    Vectors are float16 rows in a memory-mapped file. Once there are enough of them, k-means centroids
+    partition the rows into lists (an IVF index, stored list by list as int8) and a query scans only
+    the closest lists plus the not-yet-indexed tail, which keeps recall in milliseconds at a million turns.
+    """
+
+    def __init__(self, directory: str = MEMORY_DIR, embedder=None):
+        """
+        Initialize the memory
+
+        Args:
+            directory (str): Folder for the vectors, texts and index files
+            embedder: Object with name, dim and embed(texts); created from .env when None
+        """
+        self.directory = directory
+        self.embedder = embedder
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.pending = queue.Queue()
+        self.worker = None
+        self.last_latency = 0.0
+
+        self.meta = {}
+        self.vectors = None
+        self.mapped_count = 0
+        self.centroids = None
+        self.list_ids = None
+        self.list_offsets = None
+        self.list_vectors = None
+        self.list_scales = None
+        # float32 copy of the unindexed rows, so the brute-force part of a query skips the float16 conversion
+        self.tail_start = 0
+        self.tail_rows = 0
+        self.tail_buffer = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    # ---- loading ---------------------------------------------------------
+
+    def _ensure_loaded(self):
+        if self.loaded:
+            return
+        with self.lock:
+            if self.loaded:
+                return
+            if self.embedder is None:
+                self.embedder = make_embedder()
+            os.makedirs(self.directory, exist_ok=True)
+            try:
+                with open(self._path("meta.json"), "r", encoding="utf-8") as f:
+                    self.meta = json.load(f)
+            except (OSError, ValueError):
+                self.meta = {}
+            if self.meta.get("embedder") != self.embedder.name or self.meta.get("dim") != self.embedder.dim:
+                if self.meta.get("count"):
+                    print(f"Memory index was built with {self.meta.get('embedder')}; "
+                          f"run 'python Backend/LongTermMemory.py --rebuild' to re-embed. Starting empty.")
+                self._reset_files()
+            else:
+                self._truncate_to_meta()
+                self._load_index()
+            self.loaded = True
+
+    def _truncate_to_meta(self):
+        """Drop rows written after the last saved count (a crash between appending and saving meta)"""
+        count = self.meta["count"]
+        for name, row_size in (("vectors.f16", self.meta["dim"] * 2), ("texts.idx", 8)):
+            path = self._path(name)
+            if os.path.exists(path) and os.path.getsize(path) > count * row_size:
+                with open(path, "r+b") as f:
+                    f.truncate(count * row_size)
+
+    def _reset_files(self):
+        for name in ("vectors.f16", "texts.jsonl", "texts.idx", "centroids.npy", "list_ids.npy", "list_offsets.npy",
+                     "list_vectors.i8", "list_scales.npy"):
+            try:
+                os.remove(self._path(name))
+            except FileNotFoundError:
+                pass
+        self.meta = {"embedder": self.embedder.name, "dim": self.embedder.dim, "count": 0, "indexed": 0}
+        self.vectors, self.mapped_count = None, 0
+        self.centroids = self.list_ids = self.list_offsets = self.list_vectors = self.list_scales = None
+        self._save_meta()
+
+    def _load_index(self):
+        if not self.meta.get("indexed"):
+            return
+        try:
+            self.centroids = np.load(self._path("centroids.npy"))
+            self.list_ids = np.load(self._path("list_ids.npy"), mmap_mode="r")
+            self.list_offsets = np.load(self._path("list_offsets.npy"))
+            self.list_vectors = np.memmap(self._path("list_vectors.i8"), dtype=np.int8, mode="r",
+                                          shape=(len(self.list_ids), self.meta["dim"]))
+            self.list_scales = np.load(self._path("list_scales.npy"), mmap_mode="r")
+        except (OSError, ValueError) as e:
+            print(f"Memory index unreadable, scanning everything until the next merge: {e}")
+            self.meta["indexed"] = 0
+            self.centroids = self.list_ids = self.list_offsets = self.list_vectors = self.list_scales = None
+
+    def _save_meta(self):
+        temp_path = self._path("meta.json.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(temp_path, self._path("meta.json"))
+
+    def _save_array(self, name: str, array):
+        temp_path = self._path(name + ".tmp")
+        with open(temp_path, "wb") as f:
+            np.save(f, array)
+        os.replace(temp_path, self._path(name))
+
+    def _mapped(self):
+        """Memory-map the vector file, remapping after appends"""
+        count = self.meta["count"]
+        if count and (self.vectors is None or self.mapped_count != count):
+            self.vectors = np.memmap(self._path("vectors.f16"), dtype=np.float16, mode="r",
+                                     shape=(count, self.meta["dim"]))
+            self.mapped_count = count
+        return self.vectors
+
+    def _tail(self, indexed: int, count: int):
+        """float32 rows indexed..count, converting only rows added since the last call (lock held)"""
+        if self.tail_buffer is None or self.tail_start != indexed:
+            self.tail_start, self.tail_rows = indexed, 0
+            self.tail_buffer = np.empty((max(1024, count - indexed), self.meta["dim"]), dtype=np.float32)
+        have = self.tail_start + self.tail_rows
+        if count > have:
+            needed = count - self.tail_start
+            if needed > len(self.tail_buffer):
+                grown = np.empty((max(needed, 2 * len(self.tail_buffer)), self.meta["dim"]), dtype=np.float32)
+                grown[:self.tail_rows] = self.tail_buffer[:self.tail_rows]
+                self.tail_buffer = grown
+            self.tail_buffer[self.tail_rows:needed] = self._mapped()[have:count]
+            self.tail_rows = needed
+        return self.tail_buffer[:count - self.tail_start]
+
+    # ---- writes ----------------------------------------------------------
+
+    def add(self, texts: List[str]):
+        """Embed texts and append them to the memory (synchronous)"""
+        texts = [text for text in texts if text.strip()]
+        if not texts:
+            return
+        self._ensure_loaded()
+        vectors = self.embedder.embed(texts).astype(np.float16)
+        with self.lock:
+            with open(self._path("texts.jsonl"), "ab") as f:
+                position = f.tell()
+                offsets = []
+                for text in texts:
+                    data = (json.dumps(text, ensure_ascii=False) + "\n").encode("utf-8")
+                    offsets.append(position)
+                    f.write(data)
+                    position += len(data)
+            with open(self._path("texts.idx"), "ab") as f:
+                f.write(np.asarray(offsets, dtype=np.uint64).tobytes())
+            with open(self._path("vectors.f16"), "ab") as f:
+                f.write(vectors.tobytes())
+            self.meta["count"] += len(texts)
+            self._save_meta()
+            count = self.meta["count"]
+            unindexed = count - self.meta["indexed"]
+            # Re-cluster from scratch when the lists have grown far beyond ~sqrt(count) entries each
+            full = self.centroids is None or count > 4 * len(self.centroids) ** 2
+            needs_index = (full and count >= MIN_INDEXED) or unindexed > MemoryTailLimit
+        if needs_index:
+            self.build_index(incremental=not full)
+
+    def add_messages(self, messages: List[Dict[str, str]]):
+        """Queue conversation messages for background indexing"""
+        turns = turn_texts(messages)
+        if not turns:
+            return
+        self.pending.put(turns)
+        if self.worker is None:
+            self.worker = threading.Thread(target=self._index_loop, name="memory-indexer", daemon=True)
+            self.worker.start()
+
+    def _index_loop(self):
+        while True:
+            texts = self.pending.get()
+            try:
+                self.add(texts)
+            except Exception as e:
+                print(f"Error indexing memory: {e}")
+            finally:
+                self.pending.task_done()
+
+    def flush(self):
+        """Wait for queued turns to be indexed"""
+        self.pending.join()
+
+    # ---- index -----------------------------------------------------------
+
+    @staticmethod
+    def _normalize(matrix):
+        return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-9)
+
+    def _assign(self, vectors, centroids, chunk: int = 65536):
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk):
+            block = np.asarray(vectors[start:start + chunk], dtype=np.float32)
+            labels[start:start + chunk] = np.argmax(block @ centroids.T, axis=1)
+        return labels
+
+    def build_index(self, incremental: bool = False, iterations: int = 10):
+        """
+        Build (or extend) the coarse IVF lists
+
+        Args:
+            incremental (bool): Keep the centroids and only assign the unindexed tail to them
+            iterations (int): k-means iterations for a full build
+        """
+        self._ensure_loaded()
+        with self.lock:
+            count = self.meta["count"]
+            vectors = self._mapped()
+            indexed = self.meta["indexed"] if incremental and self.centroids is not None else 0
+            centroids = self.centroids if indexed else None
+            old_ids, old_offsets = (self.list_ids, self.list_offsets) if indexed else (None, None)
+        if count == 0:
+            return
+
+        if centroids is None:
+            lists = max(1, int(np.sqrt(count)))
+            rng = np.random.default_rng(0)
+            sample = np.asarray(vectors[np.sort(rng.choice(count, size=min(count, lists * 40), replace=False))],
+                                dtype=np.float32)
+            centroids = sample[rng.choice(len(sample), size=lists, replace=False)]
+            for _ in range(iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, sample)
+                empty = np.bincount(labels, minlength=lists) == 0
+                sums[empty] = centroids[empty]
+                centroids = self._normalize(sums)
+
+        lists = len(centroids)
+        new_ids = np.arange(indexed, count, dtype=np.int64)
+        new_labels = self._assign(vectors[indexed:count], centroids)
+        if indexed:
+            old_labels = np.repeat(np.arange(lists, dtype=np.int32), np.diff(old_offsets))
+            all_ids = np.concatenate([np.asarray(old_ids), new_ids])
+            all_labels = np.concatenate([old_labels, new_labels])
+        else:
+            all_ids, all_labels = new_ids, new_labels
+        order = np.argsort(all_labels, kind="stable")
+        list_ids = all_ids[order]
+        list_offsets = np.concatenate([[0], np.cumsum(np.bincount(all_labels, minlength=lists))]).astype(np.int64)
+
+        # Copy the vectors in list order, quantized to int8 with a per-row scale, so a probed list
+        # is one contiguous read and converts to float32 cheaply
+        temp_path = self._path("list_vectors.i8.tmp")
+        scales = np.empty(len(list_ids), dtype=np.float32)
+        with open(temp_path, "wb") as f:
+            for start in range(0, len(list_ids), 65536):
+                chunk = list_ids[start:start + 65536]
+                # Read rows in file order, then put them back in list order
+                order = np.argsort(chunk)
+                rows = np.empty((len(chunk), self.meta["dim"]), dtype=np.float32)
+                rows[order] = vectors[chunk[order]]
+                peak = np.maximum(np.abs(rows).max(axis=1), 1e-9)
+                scales[start:start + len(chunk)] = peak / 127.0
+                f.write(np.round(rows * (127.0 / peak)[:, None]).astype(np.int8).tobytes())
+
+        with self.lock:
+            os.replace(temp_path, self._path("list_vectors.i8"))
+            self._save_array("list_scales.npy", scales)
+            self._save_array("centroids.npy", centroids.astype(np.float32))
+            self._save_array("list_ids.npy", list_ids)
+            self._save_array("list_offsets.npy", list_offsets)
+            self.centroids = centroids.astype(np.float32)
+            self.list_ids = np.load(self._path("list_ids.npy"), mmap_mode="r")
+            self.list_offsets = list_offsets
+            self.list_vectors = np.memmap(self._path("list_vectors.i8"), dtype=np.int8, mode="r",
+                                          shape=(len(list_ids), self.meta["dim"]))
+            self.list_scales = np.load(self._path("list_scales.npy"), mmap_mode="r")
+            self.meta["indexed"] = count
+            self.meta["lists"] = lists
+            self._save_meta()
+
+    # ---- reads -----------------------------------------------------------
+
+    def _text(self, row: int) -> str:
+        with open(self._path("texts.idx"), "rb") as f:
+            f.seek(row * 8)
+            offset = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+        with open(self._path("texts.jsonl"), "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def search(self, query: str, k: int = MemoryTopK, min_score: Optional[float] = MemoryMinScore,
+               exclude_recent: int = 0, probe: int = MemoryProbe) -> List[Tuple[float, str]]:
+        """
+        Find the stored turns most similar to the query
+
+        Args:
+            query (str): Text to match
+            k (int): Maximum number of results
+            min_score (float): Minimum cosine similarity (None uses the embedder's threshold)
+            exclude_recent (int): Skip the newest turns (already in the prompt as history)
+            probe (int): Coarse lists scanned
+
+        Returns:
+            List[Tuple[float, str]]: (score, turn text), best first
+        """
+        self._ensure_loaded()
+        if min_score is None:
+            min_score = self.embedder.min_score
+        start = time.perf_counter()
+        q = self.embedder.embed([query])[0].astype(np.float32)
+        with self.lock:
+            count = self.meta["count"]
+            indexed = self.meta["indexed"] if self.centroids is not None else 0
+            tail = self._tail(indexed, count) if count else None
+            centroids, list_ids, list_offsets = self.centroids, self.list_ids, self.list_offsets
+            list_vectors, list_scales = self.list_vectors, self.list_scales
+        limit = count - exclude_recent
+        if limit <= 0:
+            return []
+
+        ids_parts, score_parts = [], []
+        if indexed:
+            nearest = np.argsort(centroids @ q)[::-1][:probe]
+            ranges = [(list_offsets[l], list_offsets[l + 1]) for l in nearest]
+            ids = np.concatenate([list_ids[a:b] for a, b in ranges])
+            scores = (np.concatenate([list_vectors[a:b] for a, b in ranges]).astype(np.float32) @ q) * \
+                np.concatenate([list_scales[a:b] for a, b in ranges])
+            keep = ids < limit
+            ids_parts.append(ids[keep])
+            score_parts.append(scores[keep])
+        if limit > indexed:
+            ids_parts.append(np.arange(indexed, limit))
+            score_parts.append(tail[:limit - indexed] @ q)
+        if not ids_parts:
+            return []
+
+        ids = np.concatenate(ids_parts)
+        scores = np.concatenate(score_parts)
+        keep = scores >= min_score
+        ids, scores = ids[keep], scores[keep]
+        if len(ids) > k:
+            top = np.argpartition(-scores, k)[:k]
+            ids, scores = ids[top], scores[top]
+        order = np.argsort(-scores)
+        results = [(float(scores[i]), self._text(int(ids[i]))) for i in order]
+        self.last_latency = time.perf_counter() - start
+        return results
+
+    def recall(self, query: str, exclude_recent: int = 0) -> List[str]:
+        """Relevant past turns for a prompt, or [] when memory is unavailable or still loading"""
+        if not self.loaded:
+            return []
+        try:
+            return [text for _, text in self.search(query, exclude_recent=exclude_recent)]
+        except Exception as e:
+            print(f"Error recalling memory: {e}")
+            return []
+
+    def stats(self) -> Dict:
+        self._ensure_loaded()
+        return {
+            "embedder": self.meta.get("embedder"),
+            "count": self.meta.get("count", 0),
+            "indexed": self.meta.get("indexed", 0),
+            "lists": self.meta.get("lists", 0),
+            "last_latency_ms": round(self.last_latency * 1000, 2),
+        }
+
+    def rebuild(self, messages: List[Dict[str, str]], batch: int = 512):
+        """Re-embed the whole conversation from scratch and build the index"""
+        self._ensure_loaded()
+        with self.lock:
+            self._reset_files()
+        turns = turn_texts(messages)
+        for start in range(0, len(turns), batch):
+            self.add(turns[start:start + batch])
+        if self.meta["count"] and self.centroids is None:
+            self.build_index()
+
+
+# Global instance for easy access
+long_term_memory = LongTermMemory() if NUMPY_AVAILABLE else None
+if long_term_memory is not None and __name__ != "__main__":
+    # Every stored turn is indexed in the background
+    from Backend.ConversationStore import conversation_store
+    conversation_store.add_listener(long_term_memory.add_messages)
+    # Load the embedding model and index off the critical path
+    threading.Thread(target=long_term_memory._ensure_loaded, name="memory-load", daemon=True).start()
+
+
+def recall(query: str, exclude_recent: int = 0) -> List[str]:
+    """Relevant past turns for a prompt (empty without numpy)."""
+    if long_term_memory is None:
+        return []
+    return long_term_memory.recall(query, exclude_recent)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the long-term memory index")
+    parser.add_argument("--rebuild", action="store_true", help="Re-embed the conversation history and rebuild the index")
+    parser.add_argument("--query", metavar="TEXT", help="Show the memories recalled for TEXT")
+    parser.add_argument("--stats", action="store_true", help="Show index statistics")
+    args = parser.parse_args()
+
+    if long_term_memory is None:
+        sys.exit(1)
+    if args.rebuild:
+        from Backend.ConversationStore import conversation_store
+        started = time.perf_counter()
+        long_term_memory.rebuild(conversation_store.read_all())
+        print(f"Rebuilt memory with {long_term_memory.meta['count']} turns in {time.perf_counter() - started:.1f}s")
+    if args.query:
+        for score, text in long_term_memory.search(args.query):
+            print(f"[{score:.2f}] {text}")
+    if args.stats or not (args.rebuild or args.query):
+        print(json.dumps(long_term_memory.stats(), indent=2))
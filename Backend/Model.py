@@ -2,6 +2,9 @@ import cohere
 from rich import print
 from dotenv import dotenv_values
 import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Backend.Endpoints import service_url, is_overridden
 
 # Load environment variables with absolute path
 env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
@@ -18,7 +21,10 @@ else:
     CohereAPIKey = CohereAPIKey.strip().strip('"').strip("'")
 
 # Initialize Cohere client only if API key is available
-co = cohere.Client(api_key=CohereAPIKey) if CohereAPIKey else None
+if CohereAPIKey and is_overridden("cohere"):
+    co = cohere.Client(api_key=CohereAPIKey, base_url=service_url("cohere"))
+else:
+    co = cohere.Client(api_key=CohereAPIKey) if CohereAPIKey else None
 
 funcs = [
     "exit", "general", "realtime", "open", "close", "play",
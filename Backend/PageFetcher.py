@@ -0,0 +1,297 @@
+"""
+Page Fetcher
+Fetches search result pages concurrently, extracts their main text and ranks passages against the query with BM25
+"""
+import os
+import re
+import sys
+import math
+import time
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+from dotenv import dotenv_values
+
+try:
+    from bs4 import BeautifulSoup
+    BS4_AVAILABLE = True
+except ImportError:
+    BS4_AVAILABLE = False
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Backend.Endpoints import is_overridden
+from Backend.HttpClient import http_client
+
+# Load environment variables with absolute path
+env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
+env_vars = dotenv_values(env_path)
+
+PageFetchEnabled = (env_vars.get("PageFetchEnabled") or "true").strip().lower() not in ("0", "false", "no", "off")
+# Every page fetch of one query must finish within this many seconds; late pages are left out
+PageFetchDeadline = float(env_vars.get("PageFetchDeadline", 2.5))
+# How many of the top search results are fetched, and how many at once per host
+PageFetchPages = int(env_vars.get("PageFetchPages", 4))
+PageFetchPerHost = int(env_vars.get("PageFetchPerHost", 2))
+# Passages handed to the prompt and their approximate length in words
+PagePassages = int(env_vars.get("PagePassages", 4))
+PagePassageWords = int(env_vars.get("PagePassageWords", 80))
+PageCacheMinutes = float(env_vars.get("PageCacheMinutes", 60))
+
+MAX_PAGE_BYTES = 1_500_000
+PAGE_CACHE_ENTRIES = 256
+PAGE_HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                              "(KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+                "Accept": "text/html,application/xhtml+xml"}
+BOILERPLATE_TAGS = ["script", "style", "noscript", "nav", "header", "footer", "aside", "form", "iframe", "svg",
+                    "button", "select", "template"]
+TEXT_TAGS = ["h1", "h2", "h3", "h4", "p", "li", "blockquote", "pre", "td", "dd"]
+STOP_WORDS = frozenset("""a an and are as at be been but by can do does for from had has have how i if in is it its
+me my of on or our so than that the their them then there these they this to was we were what when where which
+who whom why will with you your""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word terms without stop words, as used for BM25"""
+    return [t for t in re.findall(r"\w+", text.lower()) if t not in STOP_WORDS]
+
+
+class BM25:
+    """Okapi BM25 over a small in-memory corpus of tokenized documents"""
+
+    def __init__(self, documents: List[List[str]], k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize the index
+
+        Args:
+            documents (List[List[str]]): Tokenized documents
+            k1 (float): Term frequency saturation
+            b (float): Length normalization strength
+        """
+        self.k1 = k1
+        self.b = b
+        self.frequencies = [Counter(document) for document in documents]
+        self.lengths = [len(document) for document in documents]
+        self.average_length = sum(self.lengths) / len(documents) if documents else 0.0
+        document_frequency = Counter(term for document in documents for term in set(document))
+        count = len(documents)
+        self.idf = {term: math.log(1 + (count - n + 0.5) / (n + 0.5)) for term, n in document_frequency.items()}
+
+    def scores(self, query: List[str]) -> List[float]:
+        """BM25 score of every document for the query terms"""
+        results = []
+        query_terms = set(query)
+        for frequencies, length in zip(self.frequencies, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / self.average_length) if self.average_length else self.k1
+            score = 0.0
+            for term in query_terms:
+                tf = frequencies.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            results.append(score)
+        return results
+
+
+def extract_main_text(html: str) -> str:
+    """Readable body text of an HTML page, one block per line, without navigation and other boilerplate"""
+    if not BS4_AVAILABLE:
+        html = re.sub(r"(?is)<(script|style|noscript)[^>]*>.*?</\1>", " ", html)
+        text = re.sub(r"(?s)<[^>]+>", "\n", html)
+        return "\n".join(line.strip() for line in text.splitlines() if len(line.split()) >= 5)
+
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(BOILERPLATE_TAGS):
+        tag.decompose()
+    root = soup.find("article") or soup.find("main") or soup.body or soup
+    blocks = []
+    for element in root.find_all(TEXT_TAGS):
+        # Nested text tags (a <p> inside an <li>) would be counted twice
+        if element.find_parent(TEXT_TAGS):
+            continue
+        text = " ".join(element.get_text(" ", strip=True).split())
+        if len(text.split()) >= 5:
+            blocks.append(text)
+    if not blocks:
+        blocks = [line for line in root.get_text("\n", strip=True).splitlines() if len(line.split()) >= 5]
+    return "\n".join(blocks)
+
+
+def split_passages(text: str, words: int = PagePassageWords) -> List[str]:
+    """Cut text into passages of about `words` words along sentence boundaries"""
+    passages = []
+    current: List[str] = []
+    for block in text.splitlines():
+        for sentence in re.split(r"(?<=[.!?])\s+", block):
+            sentence_words = sentence.split()
+            if current and len(current) + len(sentence_words) > words:
+                passages.append(" ".join(current))
+                current = []
+            # Run-on "sentences" (lists, tables) are cut at the passage length
+            while len(sentence_words) > words:
+                passages.append(" ".join(sentence_words[:words]))
+                sentence_words = sentence_words[words:]
+            current.extend(sentence_words)
+        # A paragraph break ends the passage unless it is still short
+        if len(current) >= words // 2:
+            passages.append(" ".join(current))
+            current = []
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+class PageFetcher:
+    """Concurrent, deadline-bounded page fetching over the shared HTTP pools with per-host limits"""
+
+    def __init__(self, deadline: float = PageFetchDeadline, per_host: int = PageFetchPerHost,
+                 cache_minutes: float = PageCacheMinutes):
+        """
+        Initialize the fetcher
+
+        Args:
+            deadline (float): Seconds one batch of fetches may take in total
+            per_host (int): Maximum concurrent requests to one host
+            cache_minutes (float): How long extracted page text is reused
+        """
+        self.deadline = deadline
+        self.per_host = per_host
+        self.cache_ttl = cache_minutes * 60
+        self.executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="page-fetch")
+        self.host_limits: Dict[str, threading.Semaphore] = {}
+        self.cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _host_limit(self, host: str) -> threading.Semaphore:
+        with self.lock:
+            if host not in self.host_limits:
+                self.host_limits[host] = threading.Semaphore(self.per_host)
+            return self.host_limits[host]
+
+    def _cached(self, url: str) -> Optional[str]:
+        with self.lock:
+            entry = self.cache.get(url)
+            if entry and time.time() - entry[0] < self.cache_ttl:
+                self.cache.move_to_end(url)
+                return entry[1]
+        return None
+
+    def _store(self, url: str, text: str):
+        with self.lock:
+            self.cache[url] = (time.time(), text)
+            self.cache.move_to_end(url)
+            while len(self.cache) > PAGE_CACHE_ENTRIES:
+                self.cache.popitem(last=False)
+
+    def _fetch(self, url: str, until: float) -> str:
+        """
+        Download and extract one page; empty text for failures and non-HTML content
+
+        Only complete, successful extractions are cached: a failure or a page cut off at the deadline is
+        fetched again next time instead of being served for the whole cache TTL.
+        """
+        limit = self._host_limit(urlsplit(url).netloc.lower())
+        if not limit.acquire(timeout=max(0.0, until - time.perf_counter())):
+            return ""
+        try:
+            remaining = until - time.perf_counter()
+            if remaining <= 0:
+                return ""
+            with http_client.get(url, headers=PAGE_HEADERS, timeout=(min(1.5, remaining), remaining), stream=True,
+                                 retries=0) as response:
+                content_type = response.headers.get("Content-Type", "")
+                if response.status_code != 200 or ("html" not in content_type and "text" not in content_type):
+                    return ""
+                body = b""
+                complete = True
+                for chunk in response.iter_content(65536):
+                    body += chunk
+                    # Pages over the size cap are cut the same way every time, so they still count as complete
+                    if len(body) >= MAX_PAGE_BYTES:
+                        break
+                    if time.perf_counter() >= until:
+                        complete = False
+                        break
+                encoding = response.encoding if "charset" in content_type.lower() else "utf-8"
+                text = extract_main_text(body.decode(encoding or "utf-8", errors="replace"))
+        except Exception as e:
+            print(f"Error fetching {url}: {e}")
+            return ""
+        finally:
+            limit.release()
+        if complete and text:
+            self._store(url, text)
+        return text
+
+    def fetch_all(self, urls: List[str]) -> Dict[str, str]:
+        """
+        Fetch pages concurrently under the deadline
+
+        Returns:
+            Dict[str, str]: Extracted text per URL that was fetched in time (cache hits included)
+        """
+        pages = {}
+        futures = {}
+        until = time.perf_counter() + self.deadline
+        for url in dict.fromkeys(urls):
+            cached = self._cached(url)
+            if cached is not None:
+                pages[url] = cached
+            else:
+                futures[self.executor.submit(self._fetch, url, until)] = url
+        if futures:
+            done, not_done = wait(futures, timeout=self.deadline)
+            for future in done:
+                pages[futures[future]] = future.result()
+            for future in not_done:
+                future.cancel()
+        return {url: text for url, text in pages.items() if text}
+
+    def passages(self, query: str, results: List[Dict[str, str]], pages: int = PageFetchPages,
+                 count: int = PagePassages) -> List[Dict[str, str]]:
+        """
+        Best passages for a query from the pages of the top search results
+
+        Args:
+            query (str): User query the passages are ranked against
+            results (List[Dict[str, str]]): Search results with 'url'
+            pages (int): How many of the top results to fetch
+            count (int): Passages to return
+
+        Returns:
+            List[Dict[str, str]]: Dicts with 'url' and 'text', best first
+        """
+        started = time.perf_counter()
+        fetched = self.fetch_all([r["url"] for r in results[:pages] if r.get("url", "").startswith("http")])
+        candidates = []
+        seen = set()
+        for url, text in fetched.items():
+            for passage in split_passages(text):
+                if passage not in seen:
+                    seen.add(passage)
+                    candidates.append({"url": url, "text": passage})
+        if not candidates:
+            return []
+
+        query_terms = tokenize(query)
+        scores = BM25([tokenize(c["text"]) for c in candidates]).scores(query_terms)
+        ranked = sorted(zip(scores, range(len(candidates))), key=lambda item: (-item[0], item[1]))
+        best = [candidates[index] for score, index in ranked[:count] if score > 0]
+        print(f"Grounding: {len(best)} passages from {len(fetched)} pages in {time.perf_counter() - started:.2f}s")
+        return best
+
+
+# Global instance for easy access
+page_fetcher = PageFetcher()
+
+
+def grounding_passages(query: str, results: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Top passages from the result pages, or [] when page fetching is disabled."""
+    # Simulated search results (SearchBaseURL / MockAPIBase) link to pages that do not exist
+    if not PageFetchEnabled or is_overridden("search"):
+        return []
+    try:
+        return page_fetcher.passages(query, results)
+    except Exception as e:
+        print(f"Error extracting passages: {e}")
+        return []
@@ -0,0 +1,198 @@
+"""
+Result Packer
+Turns search snippets into a compact prompt block: near-duplicates removed with MinHash over word shingles,
+a per-host cap, relevance ordering and greedy packing into a token budget with numbered citations
+"""
+import os
+import re
+import sys
+import random
+import hashlib
+import argparse
+from collections import Counter
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
+from dotenv import dotenv_values
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Backend.ContextBuilder import estimate_tokens, truncate_to_tokens
+from Backend.PageFetcher import BM25, tokenize
+
+# Load environment variables with absolute path
+env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
+env_vars = dotenv_values(env_path)
+
+# Estimated tokens the packed search results may use in a prompt
+PackTokens = int(env_vars.get("PackTokens", 700))
+# Snippets whose estimated shingle overlap (Jaccard, 0-1) reaches this are treated as duplicates
+PackDuplicateSimilarity = float(env_vars.get("PackDuplicateSimilarity", 0.6))
+# Most snippets kept from one host
+PackPerHost = int(env_vars.get("PackPerHost", 2))
+
+SHINGLE_WORDS = 3
+MINHASH_PERMUTATIONS = 64
+MINHASH_PRIME = (1 << 61) - 1
+# Fixed seed: signatures must be comparable across calls and processes
+_random = random.Random(0x5EED)
+PERMUTATIONS = [(_random.randrange(1, MINHASH_PRIME), _random.randrange(MINHASH_PRIME))
+                for _ in range(MINHASH_PERMUTATIONS)]
+# Share of the score taken from the search engine's own ordering
+RANK_WEIGHT = 0.2
+# A snippet is only shortened to fit when at least this many tokens are left
+MIN_PART_TOKENS = 24
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> set:
+    """Overlapping word n-grams of the lower-cased text (the whole text when it is shorter)"""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(items: set) -> Tuple[int, ...]:
+    """MinHash signature of a shingle set; matching positions estimate Jaccard similarity"""
+    if not items:
+        return ()
+    hashes = [int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "big")
+              for item in items]
+    return tuple(min((a * h + b) % MINHASH_PRIME for h in hashes) for a, b in PERMUTATIONS)
+
+
+def similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+    if not first or not second:
+        return 0.0
+    return sum(x == y for x, y in zip(first, second)) / len(first)
+
+
+class ResultPacker:
+    """Deduplicates, orders and budgets search snippets for the LLM prompt"""
+
+    def __init__(self, budget: int = PackTokens, duplicate_similarity: float = PackDuplicateSimilarity,
+                 per_host: int = PackPerHost):
+        """
+        Initialize the packer
+
+        Args:
+            budget (int): Estimated tokens the packed block may use
+            duplicate_similarity (float): MinHash similarity at which a snippet counts as a duplicate
+            per_host (int): Most snippets kept from one host
+        """
+        self.budget = budget
+        self.duplicate_similarity = duplicate_similarity
+        self.per_host = per_host
+        self.stats = Counter()
+
+    def rank(self, query: str, snippets: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Snippets by relevance: BM25 against the query, with the search order as a tie-breaking prior"""
+        if not snippets:
+            return []
+        lexical = BM25([tokenize(s["text"]) for s in snippets]).scores(tokenize(query))
+        best = max(lexical) or 1.0
+        count = len(snippets)
+        scored = [((1 - RANK_WEIGHT) * score / best + RANK_WEIGHT * (1 - index / count), index)
+                  for index, score in enumerate(lexical)]
+        return [snippets[index] for _, index in sorted(scored, key=lambda item: (-item[0], item[1]))]
+
+    def pack(self, query: str, snippets: List[Dict[str, str]], budget: int = None) -> Dict:
+        """
+        Pack snippets into a numbered, cited block
+
+        Args:
+            query (str): User query the snippets are ordered against
+            snippets (List[Dict[str, str]]): Dicts with 'url' and 'text' (passages, result descriptions)
+            budget (int): Estimated tokens for the block (defaults to PackTokens)
+
+        Returns:
+            Dict: 'text' ("[n] snippet (source: url)" lines), 'sources' (cited URLs in [n] order), 'tokens',
+            and the counts 'kept', 'duplicates', 'host_capped' and 'over_budget'
+        """
+        budget = self.budget if budget is None else budget
+        kept, sources, lines = [], [], []
+        signatures = []
+        hosts = Counter()
+        counts = Counter()
+        remaining = budget
+
+        for snippet in self.rank(query, snippets):
+            text = " ".join(snippet.get("text", "").split())
+            if not text:
+                continue
+            signature = minhash(shingles(text))
+            if any(similarity(signature, other) >= self.duplicate_similarity for other in signatures):
+                counts["duplicates"] += 1
+                continue
+            host = urlsplit(snippet.get("url", "")).netloc.lower()
+            if host and hosts[host] >= self.per_host:
+                counts["host_capped"] += 1
+                continue
+
+            url = snippet.get("url", "")
+            number = len(sources) + 1 if url not in sources else sources.index(url) + 1
+            suffix = f" (source: {url})" if url else ""
+            line = f"[{number}] {text}{suffix}"
+            cost = estimate_tokens(line) + 1
+            if cost > remaining:
+                room = remaining - estimate_tokens(f"[{number}] {suffix}") - 1
+                if room < MIN_PART_TOKENS:
+                    counts["over_budget"] += 1
+                    continue
+                line = f"[{number}] {truncate_to_tokens(text, room)}{suffix}"
+                cost = estimate_tokens(line) + 1
+
+            signatures.append(signature)
+            hosts[host] += 1
+            if url and url not in sources:
+                sources.append(url)
+            lines.append(line)
+            kept.append(snippet)
+            remaining -= cost
+
+        text = "\n".join(lines)
+        result = {"text": text, "sources": sources, "tokens": estimate_tokens(text), "kept": len(kept),
+                  "duplicates": counts["duplicates"], "host_capped": counts["host_capped"],
+                  "over_budget": counts["over_budget"]}
+        self.stats.update(counts)
+        self.stats["packed"] += 1
+        self.stats["snippets"] += len(snippets)
+        self.stats["kept"] += len(kept)
+        print(f"Packed {len(kept)} of {len(snippets)} snippets into {result['tokens']} tokens "
+              f"({counts['duplicates']} duplicates, {counts['host_capped']} over the host cap, "
+              f"{counts['over_budget']} over budget)")
+        return result
+
+
+# Global instance for easy access
+result_packer = ResultPacker()
+
+
+def pack_results(query: str, snippets: List[Dict[str, str]], budget: int = None) -> Dict:
+    """Packed prompt block for the snippets (see ResultPacker.pack); unpacked lines if packing fails."""
+    try:
+        return result_packer.pack(query, snippets, budget)
+    except Exception as e:
+        print(f"Error packing search results: {e}")
+        text = "\n".join(f"- {s.get('text', '')} ({s.get('url', '')})" for s in snippets)
+        return {"text": text, "sources": [s.get("url", "") for s in snippets], "tokens": estimate_tokens(text),
+                "kept": len(snippets), "duplicates": 0, "host_capped": 0, "over_budget": 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search and show the packed prompt block")
+    parser.add_argument("query", help="Search query")
+    parser.add_argument("--budget", type=int, default=PackTokens, help="Token budget for the block")
+    args = parser.parse_args()
+
+    from Backend.SearchFanout import search_fanout
+    from Backend.PageFetcher import grounding_passages
+    results = search_fanout.search(args.query, 5)
+    snippets = grounding_passages(args.query, results)
+    snippets += [{"url": r["url"], "text": f"{r['title']}. {r['description']}"} for r in results]
+    raw = sum(estimate_tokens(s["text"]) for s in snippets)
+    packed = result_packer.pack(args.query, snippets, args.budget)
+    print(packed["text"])
+    print(f"\n{raw} tokens of snippets -> {packed['tokens']} tokens, {len(packed['sources'])} sources")
+
+
+if __name__ == "__main__":
+    main()
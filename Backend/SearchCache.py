@@ -0,0 +1,281 @@
+"""
+Search Cache
+Persistent TTL cache of web search results keyed on the normalized query, with stale-while-revalidate
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import argparse
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from dotenv import dotenv_values
+
+# Load environment variables with absolute path
+env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
+env_vars = dotenv_values(env_path)
+
+Assistantname = (env_vars.get("Assistantname") or "").strip().lower()
+
+SearchCacheEnabled = (env_vars.get("SearchCacheEnabled") or "true").strip().lower() not in ("0", "false", "no", "off")
+# Freshness per query category; an expired entry is still served (and refreshed in the background)
+# for as long again as its TTL
+SearchCacheLiveMinutes = float(env_vars.get("SearchCacheLiveMinutes", 5))
+SearchCacheNewsMinutes = float(env_vars.get("SearchCacheNewsMinutes", 15))
+SearchCacheDefaultHours = float(env_vars.get("SearchCacheDefaultHours", 6))
+SearchCacheFactDays = float(env_vars.get("SearchCacheFactDays", 3))
+
+CACHE_PATH = os.path.join("Data", "SearchCache.db")
+
+# (category, pattern, TTL in seconds); the first matching category wins
+CATEGORIES = [
+    ("live", re.compile(r"\b(score|scores|live|stock|stocks|share price|price of|exchange rate|rate of|traffic|"
+                        r"bitcoin|crypto|sensex|nifty)\b"), SearchCacheLiveMinutes * 60),
+    ("news", re.compile(r"\b(news|headlines?|latest|breaking|today|todays|tonight|yesterday|this week|update|"
+                        r"updates|current|currently|right now|election|results?)\b"), SearchCacheNewsMinutes * 60),
+    ("facts", re.compile(r"^(whos|whats|who (is|was|are|were)|what (is|was|are|does)|when (was|did)|where (is|was)|"
+                         r"how (many|tall|old|far|big)|define|meaning of|history of|capital of)\b"),
+     SearchCacheFactDays * 86400),
+]
+DEFAULT_CATEGORY = ("general", None, SearchCacheDefaultHours * 3600)
+
+# Polite or addressing words that do not change what is searched for
+FILLER_PREFIXES = re.compile(r"^((hey|hi|ok|okay|please|can you|could you|would you|will you|tell me|"
+                             r"search( for| about)?|google( for)?|find( me)?|look up|show me)\s+)+")
+FILLER_SUFFIXES = re.compile(r"(\s+(please|for me|now|thanks|thank you))+$")
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: case, punctuation, spacing and filler words removed"""
+    text = unicodedata.normalize("NFKC", query).lower()
+    text = text.replace("'", "").replace("’", "")
+    text = re.sub(r"[^\w\s]", " ", text)
+    text = " ".join(text.split())
+    if Assistantname and text.startswith(Assistantname + " "):
+        text = text[len(Assistantname) + 1:]
+    text = FILLER_PREFIXES.sub("", text)
+    text = FILLER_SUFFIXES.sub("", text)
+    return text.strip()
+
+
+def categorize(key: str) -> Tuple[str, float]:
+    """(category, TTL in seconds) of a normalized query"""
+    for name, pattern, ttl in CATEGORIES:
+        if pattern.search(key):
+            return name, ttl
+    return DEFAULT_CATEGORY[0], DEFAULT_CATEGORY[2]
+
+
+class SearchCache:
+    """Search results in SQLite so repeated questions skip the scrape, across restarts too"""
+
+    def __init__(self, path: str = CACHE_PATH, enabled: bool = SearchCacheEnabled):
+        """
+        Initialize the cache
+
+        Args:
+            path (str): SQLite database file
+            enabled (bool): When False every lookup goes straight to the fetcher
+        """
+        self.path = path
+        self.enabled = enabled
+        self.local = threading.local()
+        self.write_lock = threading.Lock()
+        self.refreshing = set()
+        self.refresh_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search-refresh")
+        if not self.enabled:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = self._db()
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                category TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                fetched REAL NOT NULL,
+                expires REAL NOT NULL,
+                stale_until REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_entries_stale_until ON entries(stale_until);
+            CREATE TABLE IF NOT EXISTS stats (
+                category TEXT NOT NULL,
+                outcome TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (category, outcome)
+            );
+        """)
+        self.purge()
+
+    def _db(self) -> sqlite3.Connection:
+        """One connection per thread (lookups run on the caller, refreshes on the executor)"""
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self.local.db = db
+        return db
+
+    def _count(self, category: str, outcome: str):
+        try:
+            with self.write_lock:
+                self._db().execute(
+                    "INSERT INTO stats(category, outcome, count) VALUES (?, ?, 1) "
+                    "ON CONFLICT(category, outcome) DO UPDATE SET count = count + 1",
+                    (category, outcome)
+                )
+        except sqlite3.Error as e:
+            print(f"Error recording search cache stats: {e}")
+
+    def get(self, query: str) -> Optional[Dict]:
+        """Cached entry for a query (fresh or stale, never past its stale window), or None"""
+        if not self.enabled:
+            return None
+        row = self._db().execute(
+            "SELECT answer, category, fetched, expires, stale_until FROM entries WHERE key = ?",
+            (normalize_query(query),)
+        ).fetchone()
+        now = time.time()
+        if not row or row[4] <= now:
+            return None
+        try:
+            answer = json.loads(row[0])
+        except ValueError:
+            # Entries written before results were stored as JSON are treated as missing
+            return None
+        return {"answer": answer, "category": row[1], "age": now - row[2], "fresh": row[3] > now}
+
+    def put(self, query: str, answer: Any):
+        """Store search results (any JSON-serializable value) under the query's key"""
+        if not self.enabled:
+            return
+        key = normalize_query(query)
+        category, ttl = categorize(key)
+        now = time.time()
+        with self.write_lock:
+            self._db().execute(
+                "INSERT OR REPLACE INTO entries(key, query, category, answer, fetched, expires, stale_until) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, query, category, json.dumps(answer), now, now + ttl, now + 2 * ttl)
+            )
+
+    def get_or_fetch(self, query: str, fetch: Callable[[str], Any]) -> Any:
+        """
+        Answer a query from the cache, calling fetch on a miss
+
+        A stale entry is returned at once while fetch refreshes it on a background thread.
+        Empty results (fetch returning None) are not cached.
+
+        Args:
+            query (str): Search query as asked
+            fetch (Callable[[str], Any]): Live search returning JSON-serializable results; exceptions propagate
+                on a miss
+
+        Returns:
+            Any: Search results, or None (or another empty value) when nothing was found
+        """
+        if not self.enabled:
+            return fetch(query)
+        key = normalize_query(query)
+        category, _ = categorize(key)
+        try:
+            entry = self.get(query)
+        except sqlite3.Error as e:
+            print(f"Error reading search cache: {e}")
+            return fetch(query)
+
+        if entry and entry["fresh"]:
+            self._count(category, "hit")
+            print(f"Search cache hit ({category}, {entry['age'] / 60:.0f} min old)")
+            return entry["answer"]
+        if entry:
+            self._count(category, "stale")
+            print(f"Search cache stale hit ({category}, {entry['age'] / 60:.0f} min old), refreshing")
+            self._refresh_in_background(key, query, fetch)
+            return entry["answer"]
+
+        self._count(category, "miss")
+        answer = fetch(query)
+        if answer:
+            self.put(query, answer)
+        return answer
+
+    def _refresh_in_background(self, key: str, query: str, fetch: Callable[[str], Any]):
+        with self.refresh_lock:
+            if key in self.refreshing:
+                return
+            self.refreshing.add(key)
+
+        def run():
+            try:
+                answer = fetch(query)
+                if answer:
+                    self.put(query, answer)
+            except Exception as e:
+                print(f"Error refreshing search cache for '{query}': {e}")
+            finally:
+                with self.refresh_lock:
+                    self.refreshing.discard(key)
+
+        self.executor.submit(run)
+
+    def purge(self) -> int:
+        """Delete entries past their stale window; returns how many were removed"""
+        if not self.enabled:
+            return 0
+        with self.write_lock:
+            return self._db().execute("DELETE FROM entries WHERE stale_until <= ?", (time.time(),)).rowcount
+
+    def clear(self):
+        if not self.enabled:
+            return
+        with self.write_lock:
+            self._db().execute("DELETE FROM entries")
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Lifetime hit/stale/miss counts and hit rate per category, plus 'total'"""
+        report: Dict[str, Dict[str, float]] = {}
+        if not self.enabled:
+            return report
+        for category, outcome, count in self._db().execute("SELECT category, outcome, count FROM stats"):
+            for name in (category, "total"):
+                counts = report.setdefault(name, {"hit": 0, "stale": 0, "miss": 0})
+                counts[outcome] += count
+        for counts in report.values():
+            lookups = counts["hit"] + counts["stale"] + counts["miss"]
+            counts["hit_rate"] = (counts["hit"] + counts["stale"]) / lookups if lookups else 0.0
+        return report
+
+
+# Global instance for easy access
+search_cache = SearchCache()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect the search result cache")
+    parser.add_argument("--stats", action="store_true", help="Show hit rates per query category")
+    parser.add_argument("--key", metavar="QUERY", help="Show the cache key and category of QUERY")
+    parser.add_argument("--purge", action="store_true", help="Delete entries past their stale window")
+    parser.add_argument("--clear", action="store_true", help="Delete every cached result")
+    args = parser.parse_args()
+
+    if args.key:
+        key = normalize_query(args.key)
+        category, ttl = categorize(key)
+        print(f"key: '{key}'  category: {category}  ttl: {ttl / 60:g} min")
+    if args.purge:
+        print(f"Purged {search_cache.purge()} entries")
+    if args.clear:
+        search_cache.clear()
+        print("Search cache cleared")
+    if args.stats:
+        for name, counts in sorted(search_cache.stats().items(), key=lambda item: item[0] == "total"):
+            print(f"{name:>8}: {counts['hit']} hits, {counts['stale']} stale, {counts['miss']} misses "
+                  f"({counts['hit_rate']:.0%} served from cache)")
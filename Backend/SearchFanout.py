@@ -0,0 +1,224 @@
+"""
+Search Fan-out
+Sends a query to every search provider at once and keeps the first useful result set, merged and deduplicated
+"""
+import os
+import sys
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from dotenv import dotenv_values
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Backend.Endpoints import service_url, is_overridden
+from Backend.HttpClient import http_client
+
+try:
+    from googlesearch import search as google_search
+    GOOGLESEARCH_AVAILABLE = True
+except ImportError:
+    GOOGLESEARCH_AVAILABLE = False
+
+try:
+    from bs4 import BeautifulSoup
+    BS4_AVAILABLE = True
+except ImportError:
+    BS4_AVAILABLE = False
+
+# Load environment variables with absolute path
+env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
+env_vars = dotenv_values(env_path)
+
+# Providers queried in parallel, in priority order (available: google-advanced, google-simple, duckduckgo)
+SearchProviders = [name.strip() for name in
+                   (env_vars.get("SearchProviders") or "google-advanced,google-simple").split(",") if name.strip()]
+# Give up on every provider after this many seconds
+SearchDeadline = float(env_vars.get("SearchDeadline", 4.0))
+# After the first non-empty result set, wait this long for other providers to merge in
+SearchMergeWindow = float(env_vars.get("SearchMergeWindow", 0.3))
+
+TRACKING_PARAMS = {"fbclid", "gclid", "ref", "ved", "usg", "sa", "ei"}
+
+
+def result_key(url: str) -> str:
+    """Identity of a result URL for deduplication (scheme, www., fragment, trailing slash and tracking ignored)"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query)
+                       if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS])
+    return urlunsplit(("", host, parts.path.rstrip("/"), query, ""))
+
+
+class SearchFanout:
+    """Runs every registered search provider concurrently under one deadline"""
+
+    def __init__(self, deadline: float = SearchDeadline, merge_window: float = SearchMergeWindow):
+        """
+        Initialize the fan-out
+
+        Args:
+            deadline (float): Seconds after which outstanding providers are abandoned
+            merge_window (float): Seconds to keep collecting after the first non-empty result set
+        """
+        self.deadline = deadline
+        self.merge_window = merge_window
+        self.providers: Dict[str, Callable[[str, int], List[Dict[str, str]]]] = {}
+        self.executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="search-fanout")
+        self.served_log = deque(maxlen=100)
+        self.lock = threading.Lock()
+
+    def register_provider(self, name: str, func: Callable[[str, int], List[Dict[str, str]]]):
+        """
+        Register a provider
+
+        Args:
+            name (str): Provider name reported for served searches
+            func: Function taking (query, num_results) and returning dicts with 'url', 'title', 'description'
+        """
+        self.providers[name] = func
+
+    def available(self) -> bool:
+        return bool(self.providers)
+
+    def _call(self, name: str, query: str, num_results: int) -> List[Dict[str, str]]:
+        try:
+            return [r for r in self.providers[name](query, num_results) if r.get("url")]
+        except Exception as e:
+            print(f"Search provider {name} failed: {e}")
+            return []
+
+    def search(self, query: str, num_results: int = 5) -> List[Dict[str, str]]:
+        """
+        Search every provider in parallel
+
+        Returns as soon as the merge window after the first non-empty answer closes (or the deadline
+        passes); providers still running are cancelled or, if already started, left to finish unseen.
+
+        Args:
+            query (str): Search query
+            num_results (int): Results wanted (also the size of the merged list)
+
+        Returns:
+            List[Dict[str, str]]: Deduplicated results in provider priority (registration) order; a duplicate
+            fills in the title or description its higher-priority copy lacks
+        """
+        start = time.perf_counter()
+        pending = {self.executor.submit(self._call, name, query, num_results): name for name in self.providers}
+        arrived = []
+        first_at = None
+
+        while pending:
+            close_at = start + self.deadline
+            if first_at is not None:
+                close_at = min(close_at, first_at + self.merge_window)
+            timeout = close_at - time.perf_counter()
+            if timeout <= 0:
+                break
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                name = pending.pop(future)
+                results = future.result()
+                if results:
+                    arrived.append((name, results))
+                    if first_at is None:
+                        first_at = time.perf_counter()
+
+        for future in pending:
+            future.cancel()
+
+        served_by = [name for name, _ in arrived]
+        # Merge by priority rather than arrival, so a fast provider with bare URLs cannot shadow a richer one
+        priority = list(self.providers)
+        arrived.sort(key=lambda item: priority.index(item[0]))
+        merged = []
+        positions = {}
+        for _, results in arrived:
+            for result in results:
+                key = result_key(result["url"])
+                if key not in positions:
+                    positions[key] = len(merged)
+                    merged.append(dict(result))
+                    continue
+                kept = merged[positions[key]]
+                for field in ("title", "description"):
+                    if not kept.get(field) and result.get(field):
+                        kept[field] = result[field]
+        merged = merged[:num_results]
+
+        latency = time.perf_counter() - start
+        with self.lock:
+            self.served_log.append({"time": time.time(), "providers": served_by, "latency": latency,
+                                    "abandoned": list(pending.values()), "results": len(merged)})
+        if served_by:
+            print(f"Search served by {', '.join(served_by)} in {latency:.2f}s"
+                  f"{f' ({len(pending)} abandoned)' if pending else ''}")
+        return merged
+
+
+def _google_advanced(query: str, num_results: int) -> List[Dict[str, str]]:
+    return [{"url": r.url, "title": r.title, "description": r.description}
+            for r in google_search(query, advanced=True, num_results=num_results)]
+
+
+def _google_simple(query: str, num_results: int) -> List[Dict[str, str]]:
+    return [{"url": url, "title": "", "description": ""} for url in google_search(query, num_results=num_results)]
+
+
+def _duckduckgo(query: str, num_results: int) -> List[Dict[str, str]]:
+    response = http_client.post(f"{service_url('duckduckgo')}/html/", data={"q": query},
+                                headers={"User-Agent": "Mozilla/5.0"}, timeout=SearchDeadline, retries=0)
+    response.raise_for_status()
+    soup = BeautifulSoup(response.text, "html.parser")
+    results = []
+    for item in soup.select(".result"):
+        link = item.select_one("a.result__a")
+        if not link or not link.get("href"):
+            continue
+        url = link["href"]
+        # Result links are redirects carrying the target in uddg=
+        target = dict(parse_qsl(urlsplit(url).query)).get("uddg")
+        snippet = item.select_one(".result__snippet")
+        results.append({"url": target or url, "title": link.get_text(" ", strip=True),
+                        "description": snippet.get_text(" ", strip=True) if snippet else ""})
+        if len(results) >= num_results:
+            break
+    return results
+
+
+def _endpoint(query: str, num_results: int) -> List[Dict[str, str]]:
+    """Search through a configured search endpoint (e.g. the local mock server) instead of scraping Google"""
+    response = http_client.get(f"{service_url('search')}/search", params={"q": query, "num": num_results},
+                               timeout=5, retries=0)
+    response.raise_for_status()
+    return [{"url": item.get("url"), "title": item.get("title"), "description": item.get("description")}
+            for item in response.json().get("results", [])]
+
+
+BUILTIN_PROVIDERS = {
+    "google-advanced": (_google_advanced, GOOGLESEARCH_AVAILABLE),
+    "google-simple": (_google_simple, GOOGLESEARCH_AVAILABLE),
+    "duckduckgo": (_duckduckgo, BS4_AVAILABLE),
+}
+
+# Global instance for easy access
+search_fanout = SearchFanout()
+if is_overridden("search"):
+    search_fanout.register_provider("endpoint", _endpoint)
+else:
+    for _name in SearchProviders:
+        if _name not in BUILTIN_PROVIDERS:
+            print(f"Warning: unknown search provider '{_name}' in SearchProviders")
+        elif BUILTIN_PROVIDERS[_name][1]:
+            search_fanout.register_provider(_name, BUILTIN_PROVIDERS[_name][0])
+
+
+def search(query: str, num_results: int = 5) -> List[Dict[str, str]]:
+    """Search every configured provider in parallel and return merged results."""
+    return search_fanout.search(query, num_results)
@@ -0,0 +1,646 @@
+"""
+Skills
+Structured handlers that answer realtime questions (weather, time and date, currency, sports scores, stock quotes)
+straight from one API call or a cache, with no LLM step
+"""
+import os
+import re
+import sys
+import math
+import time
+import argparse
+import datetime
+import threading
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from dotenv import dotenv_values
+
+try:
+    import zoneinfo
+    ZONEINFO_AVAILABLE = True
+except ImportError:
+    ZONEINFO_AVAILABLE = False
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Backend.Endpoints import service_url
+from Backend.HttpClient import http_client
+from Backend.Geocoder import geocoder, normalize_place
+from Backend.LocationExtractor import extract_location, LocationMinConfidence, Assistantname
+from Backend.WeatherCache import weather_cache, answer_question
+
+# Load environment variables with absolute path
+env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
+env_vars = dotenv_values(env_path)
+
+SkillsEnabled = (env_vars.get("SkillsEnabled") or "true").strip().lower() not in ("0", "false", "no", "off")
+# Currency conversions with only one currency named are into this one
+HomeCurrency = (env_vars.get("HomeCurrency") or "INR").strip().upper()
+CurrencyCacheMinutes = float(env_vars.get("CurrencyCacheMinutes", 60))
+StockCacheSeconds = float(env_vars.get("StockCacheSeconds", 60))
+SportsCacheMinutes = float(env_vars.get("SportsCacheMinutes", 10))
+# TheSportsDB API key ("3" is the free public key)
+SportsDBKey = (env_vars.get("SportsDBKey") or "3").strip()
+
+WORD = re.compile(r"\w+|[$€£¥₹]")
+QUESTION_TAIL = re.compile(r"\s*(?:\b(?:today|now|right now|currently|please|at the moment)\b\s*)*[?.!]*\s*$")
+
+
+class TTLCache:
+    """Small thread-safe key -> value memo whose entries expire"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.entries: Dict[str, Tuple[float, object]] = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: str):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and time.time() - entry[0] < self.seconds:
+                return entry[1]
+        return None
+
+    def put(self, key: str, value):
+        with self.lock:
+            self.entries[key] = (time.time(), value)
+
+
+class SkillRegistry:
+    """Skills indexed by trigger keyword; the first skill that accepts a query answers it"""
+
+    def __init__(self):
+        self.skills: Dict[str, Tuple[Callable[[str], Optional[str]], int]] = {}
+        self.index: Dict[str, List[str]] = {}
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    def register(self, name: str, keywords: Iterable[str], handler: Callable[[str], Optional[str]]):
+        """
+        Add a skill
+
+        Args:
+            name (str): Skill name
+            keywords (Iterable[str]): Lower-case words of which at least one must occur in a query
+            handler (Callable): Takes the query and returns the answer, or None to let it fall through
+        """
+        self.skills[name] = (handler, len(self.skills))
+        for keyword in keywords:
+            names = self.index.setdefault(keyword, [])
+            if name not in names:
+                names.append(name)
+
+    def candidates(self, prompt: str) -> List[str]:
+        """Skills whose keywords occur in the prompt, most keyword hits first, then in registration order"""
+        hits = Counter()
+        for word in set(WORD.findall(prompt.lower())):
+            for name in self.index.get(word, ()):
+                hits[name] += 1
+        return sorted(hits, key=lambda name: (-hits[name], self.skills[name][1]))
+
+    def match(self, prompt: str) -> Optional[Tuple[str, str]]:
+        """
+        Answer a query with a skill
+
+        Returns:
+            Optional[Tuple[str, str]]: (skill name, answer), or None when no skill takes the query
+        """
+        for name in self.candidates(prompt):
+            handler = self.skills[name][0]
+            try:
+                answer = handler(prompt)
+            except Exception as e:
+                print(f"Error in {name} skill: {e}")
+                answer = None
+            with self.lock:
+                self.stats[f"{name}:{'answered' if answer else 'declined'}"] += 1
+            if answer:
+                return name, answer
+        with self.lock:
+            self.stats["fell through"] += 1
+        return None
+
+
+# ---- weather -----------------------------------------------------------
+
+WEATHER_KEYWORDS = ["weather", "temperature", "forecast", "climate", "rain", "raining", "snow", "snowing", "sunny",
+                    "cloudy", "windy", "hot", "cold", "humid", "humidity", "umbrella"]
+
+
+def weather_skill(prompt: str) -> Optional[str]:
+    """Forecast answer for a place named in the prompt; questions without a clear place fall through"""
+    location, confidence = extract_location(prompt)
+    print(f"DEBUG: Extracted location for weather query: '{location}' (confidence {confidence:.2f}) from prompt: '{prompt}'")
+    if not location or confidence < LocationMinConfidence:
+        return None
+    try:
+        # Offline gazetteer first, then remembered remote lookups, then the geocoding API
+        place = geocoder.resolve(location)
+        if not place:
+            return f"Sorry, I couldn't find weather information for {location}."
+        # Repeated questions about a place are served from the forecast cache
+        forecast = weather_cache.forecast(place["latitude"], place["longitude"], place["name"])
+        return answer_question(forecast, place["name"], prompt)
+    except Exception as e:
+        return f"Sorry, I couldn't retrieve weather information for {location}. Error: {str(e)}"
+
+
+# ---- time and date -----------------------------------------------------
+
+TIME_QUESTION = re.compile(r"\b(?:what(?:'s|s| is)? the (?:current |local )?time|what time is it|time is it"
+                           r"|current time|local time|time (?:right )?now|time zone|timezone|the time in)\b|^time in\b")
+DATE_QUESTION = re.compile(r"\b(?:what(?:'s|s| is)? (?:the |today's |todays )?date|what day is (?:it|today)"
+                           r"|today's date|todays date|which day is (?:it|today))\b")
+# Words that may surround "in <place>" after the time/date phrase without changing the question
+NOW_WORDS = re.compile(rf"^(?:(?:today|now|right now|currently|at the moment|please|there|exactly|{re.escape(Assistantname)})"
+                       rf"(?:\s+|$))+|(?:\s+(?:today|now|right now|currently|at the moment|please|there|exactly|"
+                       rf"{re.escape(Assistantname)}))+$")
+# Countries whose tzdata name differs from the gazetteer's
+COUNTRY_CODES = {"united kingdom": "GB", "england": "GB", "scotland": "GB", "wales": "GB", "uk": "GB",
+                 "usa": "US", "united states of america": "US", "south korea": "KR", "north korea": "KP",
+                 "uae": "AE", "czechia": "CZ", "ivory coast": "CI", "myanmar": "MM", "vatican city": "VA"}
+
+
+class TimeZones:
+    """IANA zones per country with their reference coordinates, read from the tzdata zone.tab"""
+
+    def __init__(self):
+        self.zones: Optional[List[Tuple[str, float, float, str]]] = None
+        self.countries: Dict[str, str] = dict(COUNTRY_CODES)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _coordinate(text: str, degree_digits: int) -> float:
+        sign = -1 if text[0] == "-" else 1
+        digits = text[1:]
+        degrees, minutes = int(digits[:degree_digits]), int(digits[degree_digits:degree_digits + 2])
+        seconds = int(digits[degree_digits + 2:] or 0)
+        return sign * (degrees + minutes / 60 + seconds / 3600)
+
+    def _read(self, name: str) -> List[str]:
+        for directory in zoneinfo.TZPATH:
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    return f.read().splitlines()
+        # Windows has no system tzdata; the tzdata package ships the same tables
+        from importlib import resources
+        return resources.files("tzdata.zoneinfo").joinpath(name).read_text(encoding="utf-8").splitlines()
+
+    def _ensure_loaded(self):
+        if self.zones is not None:
+            return
+        with self.lock:
+            if self.zones is not None:
+                return
+            zones = []
+            try:
+                for line in self._read("zone.tab"):
+                    if line and not line.startswith("#"):
+                        code, coordinates, zone = line.split("\t")[:3]
+                        split = max(coordinates.rfind("+"), coordinates.rfind("-"))
+                        zones.append((code, self._coordinate(coordinates[:split], 2),
+                                      self._coordinate(coordinates[split:], 3), zone))
+                for line in self._read("iso3166.tab"):
+                    if line and not line.startswith("#"):
+                        code, name = line.split("\t")[:2]
+                        self.countries.setdefault(normalize_place(name), code)
+                        # "Korea (South)" is also "south korea", "Britain (UK)" also "britain"
+                        bracket = re.match(r"(.+?) \((.+)\)", name)
+                        if bracket:
+                            self.countries.setdefault(normalize_place(f"{bracket.group(2)} {bracket.group(1)}"), code)
+                            self.countries.setdefault(normalize_place(bracket.group(1)), code)
+            except Exception as e:
+                print(f"Error loading time zone tables: {e}")
+            self.zones = zones
+
+    def zone_for(self, latitude: float, longitude: float, country: str = "") -> Optional[str]:
+        """Zone of the nearest tzdata reference city, within the place's country when it is known"""
+        self._ensure_loaded()
+        code = self.countries.get(normalize_place(country)) if country else None
+        candidates = [z for z in self.zones if z[0] == code] or self.zones
+        if not candidates:
+            return None
+        scale = math.cos(math.radians(latitude))
+        nearest = min(candidates, key=lambda z: (z[1] - latitude) ** 2 + ((z[2] - longitude) * scale) ** 2)
+        return nearest[3]
+
+
+time_zones = TimeZones()
+
+
+def _country_of(place: Dict) -> str:
+    """Country a resolved place lies in (Indian cities carry their state as region)"""
+    if place.get("kind") == "country":
+        return place["name"]
+    region = place.get("region", "")
+    parent = geocoder.gazetteer.lookup(region) if region else None
+    if parent and parent["kind"] in ("state", "region"):
+        return parent["region"]
+    return region
+
+
+def _format_clock(moment: datetime.datetime) -> str:
+    return f"{moment.strftime('%I:%M %p').lstrip('0')} on {moment.strftime('%A')}, {moment.day} {moment.strftime('%B %Y')}"
+
+
+def _asks_now(text: str, match: re.Match) -> bool:
+    """
+    Whether a time/date phrase asks for the current time or date, optionally "in <place>"
+
+    "what is the date of the next full moon", "the date on which ..." and "the time difference between ..."
+    ask about something else and are left to the search.
+    """
+    rest = " ".join(re.sub(r"[?.!,]", " ", text[match.end():]).split())
+    rest = NOW_WORDS.sub("", rest).strip()
+    if match.group(0).endswith(" in") or match.group(0) == "time in":
+        return bool(rest)
+    return not rest or re.match(r"(?:in|at) \S", rest) is not None
+
+
+def time_skill(prompt: str) -> Optional[str]:
+    """Current time or date, locally or in a named place (no API call)"""
+    text = prompt.lower()
+    asks_time = TIME_QUESTION.search(text)
+    asks_date = DATE_QUESTION.search(text)
+    if asks_time and not _asks_now(text, asks_time):
+        asks_time = None
+    if asks_date and not _asks_now(text, asks_date):
+        asks_date = None
+    if not asks_time and not asks_date:
+        return None
+    location, confidence = extract_location(prompt)
+    if not location or confidence < LocationMinConfidence:
+        now = datetime.datetime.now()
+        if asks_time:
+            return f"It's {_format_clock(now)}."
+        return f"Today is {now.strftime('%A')}, {now.day} {now.strftime('%B %Y')}."
+    if not ZONEINFO_AVAILABLE:
+        return None
+    place = geocoder.resolve(location)
+    if not place:
+        return None
+    zone = time_zones.zone_for(place["latitude"], place["longitude"], _country_of(place))
+    if not zone:
+        return None
+    now = datetime.datetime.now(zoneinfo.ZoneInfo(zone))
+    offset = now.strftime("%z")
+    return f"In {place['name']} it's {_format_clock(now)} ({zone}, UTC{offset[:3]}:{offset[3:]})."
+
+
+# ---- currency ----------------------------------------------------------
+
+# Currencies the exchange-rate API (ECB reference rates) publishes: code -> (display name, spoken names)
+CURRENCIES = {
+    "USD": ("US dollars", ["dollar", "dollars", "us dollar", "us dollars", "american dollar", "american dollars", "$"]),
+    "INR": ("Indian rupees", ["rupee", "rupees", "indian rupee", "indian rupees", "rs", "₹"]),
+    "EUR": ("euros", ["euro", "euros", "€"]),
+    "GBP": ("British pounds", ["pound", "pounds", "british pound", "british pounds", "sterling", "£"]),
+    "JPY": ("Japanese yen", ["yen", "japanese yen", "¥"]),
+    "AUD": ("Australian dollars", ["australian dollar", "australian dollars"]),
+    "CAD": ("Canadian dollars", ["canadian dollar", "canadian dollars"]),
+    "CHF": ("Swiss francs", ["swiss franc", "swiss francs", "franc", "francs"]),
+    "CNY": ("Chinese yuan", ["yuan", "renminbi", "chinese yuan"]),
+    "SGD": ("Singapore dollars", ["singapore dollar", "singapore dollars"]),
+    "HKD": ("Hong Kong dollars", ["hong kong dollar", "hong kong dollars"]),
+    "NZD": ("New Zealand dollars", ["new zealand dollar", "new zealand dollars"]),
+    "KRW": ("South Korean won", ["korean won", "south korean won"]),
+    "THB": ("Thai baht", ["baht", "thai baht"]),
+    "ZAR": ("South African rand", ["rand", "south african rand"]),
+    "MYR": ("Malaysian ringgit", ["ringgit", "malaysian ringgit"]),
+    "IDR": ("Indonesian rupiah", ["rupiah", "indonesian rupiah"]),
+    "SEK": ("Swedish kronor", ["swedish krona", "swedish kronor"]),
+    "NOK": ("Norwegian kroner", ["norwegian krone", "norwegian kroner"]),
+    "DKK": ("Danish kroner", ["danish krone", "danish kroner"]),
+    "BRL": ("Brazilian reais", ["brazilian real", "brazilian reais"]),
+    "MXN": ("Mexican pesos", ["mexican peso", "mexican pesos", "peso", "pesos"]),
+    "TRY": ("Turkish lira", ["turkish lira", "lira"]),
+    "PHP": ("Philippine pesos", ["philippine peso", "philippine pesos"]),
+    "PLN": ("Polish zloty", ["zloty", "polish zloty"]),
+    "ILS": ("Israeli shekels", ["shekel", "shekels", "israeli shekel", "israeli shekels"]),
+    "CZK": ("Czech koruna", ["czech koruna", "koruna"]),
+    "HUF": ("Hungarian forint", ["forint", "hungarian forint"]),
+}
+CURRENCY_ALIASES = {alias: code for code, (_, aliases) in CURRENCIES.items() for alias in aliases}
+# Codes are recognised in lower case too, except those that are ordinary words
+CURRENCY_ALIASES.update({code.lower(): code for code in CURRENCIES if code not in ("TRY", "PHP")})
+_word_aliases = sorted((a for a in CURRENCY_ALIASES if a[0].isalnum()), key=len, reverse=True)
+CURRENCY_PATTERN = re.compile(r"(?<![a-z])(?:" + "|".join(re.escape(a) for a in _word_aliases) + r")(?![a-z])|[$€£¥₹]")
+AMOUNT = r"(\d[\d,]*(?:\.\d+)?)\s*(k|thousand|lakh|lakhs|million|crore|crores|billion)?"
+AMOUNT_PATTERN = re.compile(AMOUNT + r"\b")
+# "100 dollars" (amount right before the currency) and "$100" (amount right after a symbol)
+AMOUNT_BEFORE = re.compile(AMOUNT + r"\s*$")
+AMOUNT_AFTER = re.compile(r"\s*" + AMOUNT + r"\b")
+CURRENCY_SYMBOLS = "$€£¥₹"
+CONVERSION_JOIN = re.compile(r"\s*(?:to|in|into)\s+")
+MULTIPLIERS = {"k": 1e3, "thousand": 1e3, "lakh": 1e5, "lakhs": 1e5, "million": 1e6, "crore": 1e7, "crores": 1e7,
+               "billion": 1e9}
+RATE_WORDS = re.compile(r"\b(?:convert|conversion|exchange rates?)\b")
+currency_rates = TTLCache(CurrencyCacheMinutes * 60)
+
+
+def exchange_rates(base: str) -> Dict:
+    """Latest rates from one currency to all others (cached per base currency)"""
+    cached = currency_rates.get(base)
+    if cached is not None:
+        return cached
+    response = http_client.get(f"{service_url('currency')}/latest", params={"from": base}, timeout=5)
+    response.raise_for_status()
+    data = response.json()
+    currency_rates.put(base, data)
+    return data
+
+
+def _conversion(text: str, matches: List) -> Optional[Tuple]:
+    """(amount match, source code, target code) of an "<amount> <currency> to/in <currency>" phrase"""
+    for first, second in zip(matches, matches[1:]):
+        between = text[first.end():second.start()]
+        amount = AMOUNT_BEFORE.search(text[:first.start()])
+        if first.group(0) in CURRENCY_SYMBOLS:
+            amount = AMOUNT_AFTER.match(between)
+            between = between[amount.end():] if amount else between
+        if amount and CONVERSION_JOIN.fullmatch(between):
+            source, target = CURRENCY_ALIASES[first.group(0)], CURRENCY_ALIASES[second.group(0)]
+            if source != target:
+                return amount, source, target
+    return None
+
+
+def currency_skill(prompt: str) -> Optional[str]:
+    """
+    Conversions such as "100 dollars in rupees" or "euro exchange rate" from cached reference rates
+
+    Only explicit conversions are answered; prices of things in a currency ("price of gold in rupees") are left
+    to the other handlers.
+    """
+    text = prompt.lower()
+    matches = list(CURRENCY_PATTERN.finditer(text))
+    conversion = _conversion(text, matches)
+    if conversion:
+        amount_match, source, target = conversion
+    else:
+        if not matches or not RATE_WORDS.search(text):
+            return None
+        codes = list(dict.fromkeys(CURRENCY_ALIASES[match.group(0)] for match in matches))
+        source = codes[0]
+        target = codes[1] if len(codes) > 1 else (HomeCurrency if source != HomeCurrency else "USD")
+        amount_match = AMOUNT_PATTERN.search(text)
+    amount = 1.0
+    if amount_match:
+        amount = float(amount_match.group(1).replace(",", "")) * MULTIPLIERS.get(amount_match.group(2) or "", 1)
+
+    data = exchange_rates(source)
+    rate = data.get("rates", {}).get(target)
+    if rate is None:
+        return None
+    converted = amount * rate
+    return (f"{amount:,.2f} {CURRENCIES[source][0]} is {converted:,.2f} {CURRENCIES[target][0]} "
+            f"(1 {source} = {rate:,.4f} {target}, reference rate of {data.get('date', 'today')}).")
+
+
+# ---- stock quotes ------------------------------------------------------
+
+# Spoken names -> ticker symbols for common companies and indices; anything else is looked up once and remembered
+STOCK_SYMBOLS = {
+    "apple": "AAPL", "microsoft": "MSFT", "google": "GOOGL", "alphabet": "GOOGL", "amazon": "AMZN", "tesla": "TSLA",
+    "meta": "META", "facebook": "META", "nvidia": "NVDA", "netflix": "NFLX", "intel": "INTC", "amd": "AMD",
+    "ibm": "IBM", "oracle": "ORCL", "adobe": "ADBE", "salesforce": "CRM", "uber": "UBER", "disney": "DIS",
+    "reliance": "RELIANCE.NS", "reliance industries": "RELIANCE.NS", "tcs": "TCS.NS",
+    "tata consultancy services": "TCS.NS", "infosys": "INFY.NS", "wipro": "WIPRO.NS", "hdfc bank": "HDFCBANK.NS",
+    "icici bank": "ICICIBANK.NS", "sbi": "SBIN.NS", "state bank of india": "SBIN.NS", "itc": "ITC.NS",
+    "tata motors": "TATAMOTORS.NS", "tata steel": "TATASTEEL.NS", "adani enterprises": "ADANIENT.NS",
+    "bharti airtel": "BHARTIARTL.NS", "airtel": "BHARTIARTL.NS", "hcl": "HCLTECH.NS", "larsen and toubro": "LT.NS",
+    "maruti": "MARUTI.NS", "bajaj finance": "BAJFINANCE.NS", "zomato": "ZOMATO.NS",
+    "sensex": "^BSESN", "nifty": "^NSEI", "nifty 50": "^NSEI", "bank nifty": "^NSEBANK", "nasdaq": "^IXIC",
+    "dow jones": "^DJI", "dow": "^DJI", "s and p 500": "^GSPC", "s and p": "^GSPC", "sp 500": "^GSPC",
+}
+# Symbols of the built-in list, recognised in a prompt without any other stock wording
+KNOWN_TICKERS = {symbol for symbol in STOCK_SYMBOLS.values() if not symbol.startswith("^")}
+# Wording that makes a prompt about stocks; "price", "share" or "market" alone is not enough
+STOCK_CUES = re.compile(r"\b(?:stocks?|share prices?|share value|ticker|sensex|nifty|nasdaq|dow jones|nyse|nse|bse|"
+                        r"s and p(?: 500)?|sp 500|(?:price|value) of [\w .&-]+ shares?)\b")
+STOCK_KEYWORDS = ["stock", "stocks", "share", "ticker", "sensex", "nifty", "nasdaq", "dow", "nyse", "nse", "bse",
+                  "sp"] + [symbol.split(".")[0].lower() for symbol in KNOWN_TICKERS]
+STOCK_NAME_PATTERNS = [
+    re.compile(r"\b(?:stock|share)s?(?: price| value| quote)? (?:of|for) (?P<name>[\w .&-]+?)$"),
+    re.compile(r"\b(?:price|value) of (?P<name>[\w .&-]+?) (?:stock|shares?)\b"),
+    re.compile(r"\b(?:how is|how's|hows|what is|what's|whats|how are) (?P<name>[\w .&-]+?)(?:'s|s)? "
+               r"(?:stock|shares?)\b"),
+    re.compile(r"(?:^|\b(?:is|of|for|about) )(?P<name>[\w.&-]+(?: [\w.&-]+){0,2})(?:'s)? (?:stock|share)s?"
+               r"(?: price| value| quote)?\b"),
+    re.compile(r"\b(?P<name>sensex|bank nifty|nifty 50|nifty|nasdaq|dow jones|s and p 500)\b"),
+]
+TICKER_PATTERN = re.compile(r"\b[A-Z]{2,5}(?:\.[A-Z]{1,2})?\b")
+NOT_TICKERS = {"NSE", "BSE", "NYSE", "USD", "INR", "CEO", "IPO", "ETF", "THE", "AND", "OK", "AI", "IT", "US", "UK"}
+STOCK_HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                               "Chrome/120.0 Safari/537.36"}
+stock_quotes = TTLCache(StockCacheSeconds)
+symbol_lookups = TTLCache(7 * 24 * 3600)
+
+
+def find_symbol(name: str) -> Optional[str]:
+    """Ticker symbol of a company name, from the built-in list or one remembered search"""
+    key = normalize_place(name)
+    key = re.sub(r"\b(?:inc|ltd|limited|corp|corporation|company|co|the)\b", "", key).strip()
+    if not key:
+        return None
+    if key in STOCK_SYMBOLS:
+        return STOCK_SYMBOLS[key]
+    cached = symbol_lookups.get(key)
+    if cached is not None:
+        return cached or None
+    response = http_client.get(f"{service_url('stocks')}/v1/finance/search", headers=STOCK_HEADERS,
+                               params={"q": key, "quotesCount": 1, "newsCount": 0}, timeout=5)
+    response.raise_for_status()
+    quotes = [q for q in response.json().get("quotes", []) if q.get("quoteType") in ("EQUITY", "INDEX", "ETF")]
+    symbol = quotes[0]["symbol"] if quotes else ""
+    symbol_lookups.put(key, symbol)
+    return symbol or None
+
+
+def stock_quote(symbol: str) -> Optional[Dict]:
+    """Latest price, previous close and currency of a symbol (cached briefly)"""
+    cached = stock_quotes.get(symbol)
+    if cached is not None:
+        return cached
+    response = http_client.get(f"{service_url('stocks')}/v8/finance/chart/{symbol}", headers=STOCK_HEADERS,
+                               params={"range": "1d", "interval": "1d"}, timeout=5)
+    response.raise_for_status()
+    results = (response.json().get("chart") or {}).get("result") or []
+    if not results or results[0].get("meta", {}).get("regularMarketPrice") is None:
+        return None
+    quote = results[0]["meta"]
+    stock_quotes.put(symbol, quote)
+    return quote
+
+
+def stock_skill(prompt: str) -> Optional[str]:
+    """Price of a company's stock or a market index (needs stock wording or a known ticker symbol)"""
+    symbol = None
+    text = QUESTION_TAIL.sub("", " ".join(prompt.lower().replace("&", " and ").split()))
+    tickers = [t for t in TICKER_PATTERN.findall(prompt) if t not in NOT_TICKERS]
+    known = [t for t in tickers if t in KNOWN_TICKERS]
+    if known:
+        symbol = known[0]
+    elif not STOCK_CUES.search(text):
+        return None
+    elif tickers:
+        symbol = tickers[0]
+    else:
+        for pattern in STOCK_NAME_PATTERNS:
+            match = pattern.search(text)
+            if match:
+                name = re.sub(r"^(?:the|a|an) ", "", match.group("name").strip())
+                symbol = find_symbol(name)
+                if symbol:
+                    break
+    if not symbol:
+        return None
+    quote = stock_quote(symbol)
+    if not quote:
+        return None
+    price = quote["regularMarketPrice"]
+    previous = quote.get("chartPreviousClose") or quote.get("previousClose")
+    name = quote.get("longName") or quote.get("shortName") or symbol
+    answer = f"{name} ({quote.get('symbol', symbol)}) is at {price:,.2f} {quote.get('currency', '')}".rstrip()
+    if previous:
+        change = price - previous
+        direction = "up" if change >= 0 else "down"
+        answer += f", {direction} {abs(change):,.2f} ({abs(change) / previous:.2%}) from the previous close"
+    if quote.get("regularMarketTime"):
+        moment = datetime.datetime.fromtimestamp(quote["regularMarketTime"])
+        answer += f", as of {moment.strftime('%I:%M %p').lstrip('0')} on {moment.day} {moment.strftime('%B')}"
+    return answer + "."
+
+
+# ---- sports scores -----------------------------------------------------
+
+SPORTS_KEYWORDS = ["score", "scores", "match", "game", "result", "results", "won", "win", "lost", "lose", "beat",
+                   "draw", "drew", "play", "played"]
+TEAM_PATTERNS = [
+    re.compile(r"\b(?:score|result)s? (?:of|for|in) (?:the )?(?:last |latest |recent |today's )?"
+               r"(?P<team>[\w .&'-]+?)(?:'s)?(?: (?:match|game|fixture))?$"),
+    re.compile(r"\bdid (?:the )?(?P<team>[\w .&'-]+?) (?:win|lose|beat|draw|play)\b"),
+    re.compile(r"\bhow did (?:the )?(?P<team>[\w .&'-]+?) (?:do|play|get on|fare)\b"),
+    re.compile(r"\b(?P<team>[\w.&'-]+(?: [\w.&'-]+){0,2})(?:'s)? (?:last |latest |recent )?(?:match|game) "
+               r"(?:score|result)s?\b"),
+    re.compile(r"\bwho won (?:the )?(?P<team>[\w.&'-]+(?: [\w.&'-]+){0,2}?)(?:'s)? (?:match|game)\b"),
+]
+# Captured "team" words that are not teams ("did I win", "who won the match")
+NOT_TEAMS = {"the", "a", "an", "i", "we", "you", "he", "she", "they", "it", "my", "our", "this", "that", "last",
+             "today", "yesterday", "match", "game"}
+sports_cache = TTLCache(SportsCacheMinutes * 60)
+team_lookups = TTLCache(30 * 24 * 3600)
+
+
+def _sports_get(endpoint: str, params: Dict) -> Dict:
+    response = http_client.get(f"{service_url('sports')}/api/v1/json/{SportsDBKey}/{endpoint}", params=params,
+                               timeout=5)
+    response.raise_for_status()
+    return response.json() or {}
+
+
+def find_team(name: str) -> Optional[Dict]:
+    """Team record for a name (remembered once found)"""
+    key = normalize_place(name)
+    cached = team_lookups.get(key)
+    if cached is not None:
+        return cached or None
+    teams = _sports_get("searchteams.php", {"t": name}).get("teams") or []
+    team = {"id": teams[0]["idTeam"], "name": teams[0]["strTeam"]} if teams else {}
+    team_lookups.put(key, team)
+    return team or None
+
+
+def last_result(team: Dict) -> Optional[Dict]:
+    cached = sports_cache.get(team["id"])
+    if cached is not None:
+        return cached or None
+    results = _sports_get("eventslast.php", {"id": team["id"]}).get("results") or []
+    result = results[0] if results else {}
+    sports_cache.put(team["id"], result)
+    return result or None
+
+
+def sports_skill(prompt: str) -> Optional[str]:
+    """Result of a team's most recent match"""
+    text = QUESTION_TAIL.sub("", prompt.lower())
+    team = None
+    for pattern in TEAM_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            # "india vs australia" is looked up as india
+            name = re.split(r" (?:vs\.?|versus|v) ", match.group("team").strip())[0]
+            if len(name) < 3 or name in NOT_TEAMS:
+                continue
+            team = find_team(name)
+            if team:
+                break
+    if not team:
+        return None
+    event = last_result(team)
+    if not event:
+        return None
+    home, away = event.get("strHomeTeam", ""), event.get("strAwayTeam", "")
+    when = event.get("dateEvent", "")
+    try:
+        when = datetime.date.fromisoformat(when).strftime("%d %B %Y").lstrip("0")
+    except ValueError:
+        pass
+    league = f"{event['strLeague']}, " if event.get("strLeague") else ""
+    home_score, away_score = event.get("intHomeScore"), event.get("intAwayScore")
+    if home_score in (None, "") or away_score in (None, ""):
+        return f"{team['name']}'s last match was {home} vs {away} ({league}{when}); no score is available yet."
+    home_score, away_score = int(home_score), int(away_score)
+    is_home = home == team["name"]
+    own, other = (home_score, away_score) if is_home else (away_score, home_score)
+    opponent = away if is_home else home
+    if own > other:
+        outcome = f"beat {opponent} {own}-{other}"
+    elif own < other:
+        outcome = f"lost to {opponent} {own}-{other}"
+    else:
+        outcome = f"drew {own}-{other} with {opponent}"
+    return f"{team['name']} {outcome} in their last match ({league}{when})."
+
+
+# Global instance for easy access
+skill_registry = SkillRegistry()
+skill_registry.register("weather", WEATHER_KEYWORDS, weather_skill)
+skill_registry.register("time", ["time", "timezone", "zone", "clock", "date", "day"], time_skill)
+skill_registry.register("currency", ["convert", "conversion", "exchange", "currency", "rate"] +
+                        [a for a in CURRENCY_ALIASES if " " not in a], currency_skill)
+skill_registry.register("stocks", STOCK_KEYWORDS, stock_skill)
+skill_registry.register("sports", SPORTS_KEYWORDS, sports_skill)
+
+
+def answer_with_skill(prompt: str) -> Optional[str]:
+    """A skill's direct answer to the prompt, or None to continue with search and the LLM."""
+    if not SkillsEnabled:
+        return None
+    matched = skill_registry.match(prompt)
+    if matched:
+        print(f"Answered by the {matched[0]} skill")
+        return matched[1]
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Try the realtime skills on queries")
+    parser.add_argument("queries", nargs="*", help="Queries to answer")
+    parser.add_argument("--list", action="store_true", help="Show skills and their trigger keywords")
+    args = parser.parse_args()
+
+    if args.list:
+        for name in skill_registry.skills:
+            keywords = sorted(k for k, names in skill_registry.index.items() if name in names)
+            print(f"{name}: {', '.join(keywords)}")
+    for query in args.queries:
+        started = time.perf_counter()
+        matched = skill_registry.match(query)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"{query!r} -> {matched[0] + ': ' + matched[1] if matched else 'no skill (search + LLM)'} "
+              f"[{elapsed:.0f} ms]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Speech Models
+Process-wide registry of speech-to-text models: each model is loaded once, optionally preloaded in the background
+at startup, warmed up with a short silent clip and shared by every caller, with load time and memory reported
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+import importlib.util
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import dotenv_values
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# The libraries are only imported when a model is loaded (importing torch alone takes seconds)
+WHISPER_AVAILABLE = importlib.util.find_spec("whisper") is not None
+FASTER_WHISPER_AVAILABLE = importlib.util.find_spec("faster_whisper") is not None
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# Load environment variables with absolute path
+env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
+env_vars = dotenv_values(env_path)
+
+# Comma-separated backend:model entries loaded in the background at startup ("" to load on first use)
+SpeechPreload = env_vars.get("SpeechPreload", "whisper:base")
+# Run one short transcription right after loading so the first real one does not pay for initialization
+SpeechWarmup = (env_vars.get("SpeechWarmup") or "true").strip().lower() not in ("0", "false", "no", "off")
+
+BACKENDS = ("whisper", "faster-whisper")
+SAMPLE_RATE = 16000
+WARMUP_SECONDS = 1.0
+
+
+def parse_preload(setting: str) -> List[Tuple[str, str]]:
+    """(backend, model) pairs of a SpeechPreload setting"""
+    models = []
+    for entry in setting.split(","):
+        backend, _, name = (part.strip() for part in entry.partition(":"))
+        backend = backend.lower()
+        if not backend:
+            continue
+        if backend not in BACKENDS or not name:
+            print(f"Unknown speech model '{entry.strip()}' (use whisper:<model> or faster-whisper:<model>)")
+            continue
+        models.append((backend, name))
+    return models
+
+
+def _rss_mb() -> Optional[float]:
+    """Resident memory of this process in MB, or None when it cannot be read"""
+    try:
+        if PSUTIL_AVAILABLE:
+            return psutil.Process().memory_info().rss / 2 ** 20
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _parameters_mb(model: Any) -> Optional[float]:
+    """Size of a PyTorch model's weights in MB (None for other runtimes such as CTranslate2)"""
+    parameters = getattr(model, "parameters", None)
+    if not callable(parameters):
+        return None
+    try:
+        return sum(p.numel() * p.element_size() for p in parameters()) / 2 ** 20
+    except Exception:
+        return None
+
+
+class SpeechModelRegistry:
+    """Loads each (backend, model, options) combination once and hands the same instance to every caller"""
+
+    def __init__(self, warmup: bool = SpeechWarmup):
+        """
+        Initialize the registry
+
+        Args:
+            warmup (bool): Transcribe a short silent clip after loading each model
+        """
+        self.warmup = warmup
+        self.models: Dict[tuple, Any] = {}
+        self.reports: Dict[tuple, Dict[str, Any]] = {}
+        self.key_locks: Dict[tuple, threading.Lock] = {}
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _key(backend: str, name: str, options: Dict[str, Any]) -> tuple:
+        return (backend, name) + tuple(sorted(options.items()))
+
+    def _load(self, backend: str, name: str, options: Dict[str, Any]) -> Any:
+        if backend == "whisper":
+            import whisper
+            return whisper.load_model(name, **options)
+        from faster_whisper import WhisperModel
+        return WhisperModel(name, **options)
+
+    def _warm_up(self, backend: str, model: Any):
+        import numpy as np
+        silence = np.zeros(int(SAMPLE_RATE * WARMUP_SECONDS), dtype=np.float32)
+        if backend == "whisper":
+            model.transcribe(silence, language="en", fp16=False)
+        else:
+            segments, _ = model.transcribe(silence, language="en", beam_size=1)
+            # faster-whisper decodes lazily, while the segments are consumed
+            list(segments)
+
+    def available(self, backend: str) -> bool:
+        return {"whisper": WHISPER_AVAILABLE, "faster-whisper": FASTER_WHISPER_AVAILABLE}.get(backend, False)
+
+    def get(self, backend: str, name: str, **options) -> Optional[Any]:
+        """
+        Shared model instance, loaded (and warmed up) on first use
+
+        Args:
+            backend (str): "whisper" (openai-whisper) or "faster-whisper"
+            name (str): Model size or path, e.g. "base" or "small"
+            **options: Loader arguments (device, compute_type, ...); each combination is a separate instance
+
+        Returns:
+            Optional[Any]: The model, or None when the backend is not installed or loading failed. A caller
+            arriving while the same model is being preloaded waits for it instead of loading a second copy.
+        """
+        if not self.available(backend):
+            return None
+        key = self._key(backend, name, options)
+        model = self.models.get(key)
+        if model is not None:
+            self.reports[key]["uses"] += 1
+            return model
+        with self.lock:
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key in self.models:
+                self.reports[key]["uses"] += 1
+                return self.models[key]
+            if self.reports.get(key, {}).get("error"):
+                return None
+            try:
+                rss_before = _rss_mb()
+                started = time.perf_counter()
+                model = self._load(backend, name, options)
+                load_seconds = time.perf_counter() - started
+                rss_after = _rss_mb()
+                warmup_seconds = None
+                if self.warmup:
+                    started = time.perf_counter()
+                    try:
+                        self._warm_up(backend, model)
+                        warmup_seconds = time.perf_counter() - started
+                    except Exception as e:
+                        print(f"Error warming up {backend} '{name}': {e}")
+                rss_growth = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+                self.reports[key] = {
+                    "backend": backend, "model": name, "options": options, "load_seconds": load_seconds,
+                    "warmup_seconds": warmup_seconds, "rss_mb": rss_growth, "parameters_mb": _parameters_mb(model),
+                    "loaded_at": time.time(), "uses": 1, "error": None}
+                self.models[key] = model
+                memory = f", +{rss_growth:.0f} MB resident" if rss_growth is not None else ""
+                warmed = f", warm-up {warmup_seconds:.2f}s" if warmup_seconds is not None else ""
+                print(f"Loaded {backend} '{name}' in {load_seconds:.2f}s{memory}{warmed}")
+                return model
+            except Exception as e:
+                # Remembered so every later turn does not retry a load that cannot succeed
+                self.reports[key] = {"backend": backend, "model": name, "options": options, "error": str(e),
+                                     "uses": 0}
+                print(f"Error loading {backend} '{name}': {e}")
+                return None
+
+    def preload(self, models: Optional[List[Tuple[str, str]]] = None, background: bool = True):
+        """
+        Load models ahead of their first use
+
+        Args:
+            models (List[Tuple[str, str]]): (backend, model) pairs; defaults to the SpeechPreload setting
+            background (bool): Load on a daemon thread so startup is not delayed
+        """
+        models = parse_preload(SpeechPreload) if models is None else models
+        models = [(backend, name) for backend, name in models if self.available(backend)]
+        if not models:
+            return
+        if not background:
+            for backend, name in models:
+                self.get(backend, name)
+            return
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self.preload, args=(models, False), name="speech-preload",
+                                           daemon=True)
+            self.thread.start()
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Load time, warm-up time, memory growth, weight size and use count of every model loaded so far"""
+        return [dict(report) for report in self.reports.values()]
+
+
+# Global instance for easy access
+speech_models = SpeechModelRegistry()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load speech models and report load time and memory")
+    parser.add_argument("models", nargs="*", help="backend:model entries (default: the SpeechPreload setting)")
+    parser.add_argument("--no-warmup", action="store_true", help="Skip the warm-up transcription")
+    args = parser.parse_args()
+
+    speech_models.warmup = not args.no_warmup
+    models = parse_preload(",".join(args.models)) if args.models else parse_preload(SpeechPreload)
+    for backend, name in models:
+        if not speech_models.available(backend):
+            print(f"{backend} is not installed")
+            continue
+        speech_models.get(backend, name)
+        # A second lookup is served from the registry
+        started = time.perf_counter()
+        speech_models.get(backend, name)
+        print(f"Second lookup of {backend} '{name}' took {(time.perf_counter() - started) * 1e6:.0f} µs")
+    for report in speech_models.report():
+        if report.get("error"):
+            print(f"{report['backend']} '{report['model']}': failed ({report['error']})")
+            continue
+        rss = f"{report['rss_mb']:.0f} MB" if report["rss_mb"] is not None else "n/a"
+        weights = f"{report['parameters_mb']:.0f} MB" if report["parameters_mb"] is not None else "n/a"
+        warmup = f"{report['warmup_seconds']:.2f}s" if report["warmup_seconds"] is not None else "skipped"
+        print(f"{report['backend']} '{report['model']}': load {report['load_seconds']:.2f}s, warm-up {warmup}, "
+              f"resident +{rss}, weights {weights}")
+
+
+if __name__ == "__main__":
+    main()
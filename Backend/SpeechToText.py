@@ -28,6 +28,7 @@ except ImportError:
     print("PyAudio not available. Audio recording functionality will be limited.")
 
 from Backend.GeminiAPI import speech_to_text
+from Backend.SpeechModels import speech_models
 
 # Load environment variables with absolute path
 env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
@@ -178,7 +179,6 @@ def SpeechRecognition():
     Real-time speech recognition using OpenAI Whisper
     """
     try:
-        import whisper
         import pyaudio
         import wave
         import tempfile
@@ -193,10 +193,11 @@ def SpeechRecognition():
         CHUNK = 1024
         RECORD_SECONDS = 5  # Record for 5 seconds at a time
         
-        print("🎤 Initializing OpenAI Whisper...")
-        # Load the model - "base" is a good balance of speed and accuracy
-        model = whisper.load_model("base")
-        print("✅ Whisper model loaded successfully")
+        # Shared model, loaded once per process (usually already preloaded at startup) -
+        # "base" is a good balance of speed and accuracy
+        model = speech_models.get("whisper", "base")
+        if model is None:
+            raise RuntimeError("OpenAI Whisper is not available")
         
         # Initialize PyAudio
         audio = pyaudio.PyAudio()
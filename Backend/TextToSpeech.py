@@ -1,11 +1,14 @@
 import pygame
 import random
 import asyncio
-import requests
 import os
 import json
 import time
+import sys
 from dotenv import dotenv_values
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Backend.Endpoints import service_url
+from Backend.HttpClient import http_client
 
 # Load environment variables with absolute path
 env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
@@ -28,7 +31,7 @@ async def TextToAudioFile(text) -> None:
         for attempt in range(max_retries):
             try:
                 # Murf API endpoint for text-to-speech
-                url = "https://api.murf.ai/v1/speech/generate"
+                url = f"{service_url('murf')}/v1/speech/generate"
                 
                 # Use the api-key header format
                 headers = {
@@ -46,7 +49,7 @@ async def TextToAudioFile(text) -> None:
                 }
                 
                 # Make the API request with shorter timeout for faster fallback
-                response = requests.post(url, headers=headers, json=payload, timeout=15)
+                response = http_client.post(url, headers=headers, json=payload, timeout=15)
                 
                 # If WAV format is not supported, try with speed parameter
                 if response.status_code != 200:
@@ -57,7 +60,7 @@ async def TextToAudioFile(text) -> None:
                         "speed": "slow",
                         "rate": "-20%"  # Slow down speech by 20% for better clarity
                     }
-                    response = requests.post(url, headers=headers, json=payload, timeout=15)
+                    response = http_client.post(url, headers=headers, json=payload, timeout=15)
                 
                 # If speed parameter is not supported either, try without rate control
                 if response.status_code != 200:
@@ -66,14 +69,14 @@ async def TextToAudioFile(text) -> None:
                         "voiceId": "en-US-alina",
                         "audioFormat": "mp3"
                     }
-                    response = requests.post(url, headers=headers, json=payload, timeout=15)
+                    response = http_client.post(url, headers=headers, json=payload, timeout=15)
                 
                 if response.status_code == 200:
                     # Parse the JSON response to get the audio URL
                     response_data = response.json()
                     if 'audioFile' in response_data:
                         # Download the actual audio file
-                        audio_response = requests.get(response_data['audioFile'], timeout=15)
+                        audio_response = http_client.get(response_data['audioFile'], timeout=15)
                         if audio_response.status_code == 200:
                             # Save the audio file
                             with open(file_path, "wb") as f:
@@ -0,0 +1,274 @@
+"""
+Topic Prefetch
+Refreshes and pre-summarizes volatile topics (news headlines and the like) in the background so matching
+realtime questions are answered instantly, with the age of the bulletin
+"""
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import datetime
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+from dotenv import dotenv_values
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Backend.LLMRouter import llm_router
+from Backend.SearchCache import normalize_query
+from Backend.SearchFanout import search_fanout
+
+# Load environment variables with absolute path
+env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
+env_vars = dotenv_values(env_path)
+
+PrefetchEnabled = (env_vars.get("PrefetchEnabled") or "true").strip().lower() not in ("0", "false", "no", "off")
+# Comma-separated topics: built-in names (see TOPICS) or custom "name=search query" entries
+PrefetchTopics = env_vars.get("PrefetchTopics") or "news,india news"
+# How often every topic is refreshed, and how old a bulletin may be and still be served
+PrefetchMinutes = float(env_vars.get("PrefetchMinutes", 15))
+PrefetchMaxAgeMinutes = float(env_vars.get("PrefetchMaxAgeMinutes", 45))
+PrefetchResults = int(env_vars.get("PrefetchResults", 8))
+
+DB_PATH = os.path.join("Data", "TopicPrefetch.db")
+NEWS_WORDS = ["news", "headline", "headlines", "bulletin"]
+# name -> search query and word groups; a question matches when it has a word from every group and nothing else
+# beyond filler words
+TOPICS = {
+    "news": {"query": "top news headlines today", "groups": [NEWS_WORDS]},
+    "india news": {"query": "India news headlines today", "groups": [NEWS_WORDS, ["india", "indian", "national"]]},
+    "world news": {"query": "world news headlines today",
+                   "groups": [NEWS_WORDS, ["world", "international", "global"]]},
+    "technology news": {"query": "technology news today", "groups": [NEWS_WORDS, ["tech", "technology"]]},
+    "sports news": {"query": "sports news today", "groups": [NEWS_WORDS, ["sports", "sport"]]},
+    "business news": {"query": "business and market news today",
+                      "groups": [NEWS_WORDS, ["business", "market", "markets", "economy", "finance"]]},
+    "cricket news": {"query": "cricket news today", "groups": [NEWS_WORDS, ["cricket"]]},
+}
+FILLER_WORDS = frozenset("""
+what whats is are was the a an of for me us today todays tonight this morning evening latest top current recent
+breaking main big biggest important major some any give tell show read get bring any new whats happening in
+on about there please now right day days daily so far update updates
+""".split())
+SUMMARY_PROMPT = """Here are search results for "{query}" fetched on {date}:
+
+{results}
+
+Write a short spoken bulletin of the {count} most important distinct items, one line each, most important first.
+Use only facts from the results. No preamble and no closing remarks."""
+
+
+def parse_topics(setting: str) -> Dict[str, Dict]:
+    """Topic definitions for a PrefetchTopics setting"""
+    topics = {}
+    for entry in setting.split(","):
+        name, _, query = (part.strip() for part in entry.partition("="))
+        name = name.lower()
+        if not name:
+            continue
+        if query:
+            topics[name] = {"query": query, "groups": [[word] for word in name.split()]}
+        elif name in TOPICS:
+            topics[name] = TOPICS[name]
+        else:
+            print(f"Unknown prefetch topic '{name}' (use name=search query for custom topics)")
+    return topics
+
+
+def _age_text(seconds: float) -> str:
+    minutes = int(seconds // 60)
+    if minutes < 1:
+        return "just now"
+    if minutes < 60:
+        return f"{minutes} minute{'s' if minutes != 1 else ''} ago"
+    return f"{minutes // 60} hour{'s' if minutes >= 120 else ''} ago"
+
+
+class TopicPrefetcher:
+    """Background refresher of topic bulletins, stored in SQLite so they survive restarts"""
+
+    def __init__(self, topics: Optional[Dict[str, Dict]] = None, path: str = DB_PATH,
+                 interval_minutes: float = PrefetchMinutes, max_age_minutes: float = PrefetchMaxAgeMinutes):
+        """
+        Initialize the prefetcher (the refresh thread starts with start())
+
+        Args:
+            topics (Dict[str, Dict]): name -> {"query", "groups"}; defaults to the PrefetchTopics setting
+            path (str): SQLite file holding the bulletins
+            interval_minutes (float): Minutes between refreshes of every topic
+            max_age_minutes (float): Oldest bulletin that is still served
+        """
+        self.topics = parse_topics(PrefetchTopics) if topics is None else topics
+        self.path = path
+        self.interval = interval_minutes * 60
+        self.max_age = max_age_minutes * 60
+        self.local = threading.local()
+        self.write_lock = threading.Lock()
+        self.refreshing = set()
+        self.thread: Optional[threading.Thread] = None
+        self.stats = Counter()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db().execute("""
+            CREATE TABLE IF NOT EXISTS bulletins (
+                topic TEXT PRIMARY KEY,
+                answer TEXT NOT NULL,
+                sources INTEGER NOT NULL,
+                fetched REAL NOT NULL
+            )
+        """)
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            self.local.db = db
+        return db
+
+    def match(self, query: str) -> Optional[str]:
+        """Topic a question asks for, or None; the most specific topic wins"""
+        words = set(normalize_query(query).split()) - FILLER_WORDS
+        if not words:
+            return None
+        best, best_groups = None, 0
+        for name, topic in self.topics.items():
+            groups = [set(group) for group in topic["groups"]]
+            if all(words & group for group in groups) and not words - set().union(*groups):
+                if len(groups) > best_groups:
+                    best, best_groups = name, len(groups)
+        return best
+
+    def _summarize(self, name: str, query: str, results: List[Dict[str, str]]) -> str:
+        listing = "\n".join(f"- {r['title']}: {r['description']}" if r.get("description") else f"- {r['title']}"
+                            for r in results if r.get("title"))
+        count = min(5, len(results))
+        text = None
+        if listing and llm_router.available():
+            prompt = SUMMARY_PROMPT.format(query=query, date=datetime.date.today().strftime("%d %B %Y"),
+                                           results=listing, count=count)
+            text = llm_router.chat_completion([{"role": "user", "content": prompt}], request_type="summary",
+                                              temperature=0.3, max_tokens=300)
+        if not text:
+            # Without a model the headlines themselves make the bulletin
+            text = "\n".join(f"• {r['title']}" for r in results[:count] if r.get("title"))
+        return text.strip()
+
+    def refresh(self, name: str) -> bool:
+        """Search and summarize one topic now; True when a bulletin was stored"""
+        topic = self.topics[name]
+        with self.write_lock:
+            if name in self.refreshing:
+                return False
+            self.refreshing.add(name)
+        try:
+            started = time.perf_counter()
+            results = search_fanout.search(topic["query"], PrefetchResults)
+            if not results:
+                return False
+            answer = self._summarize(name, topic["query"], results)
+            if not answer:
+                return False
+            with self.write_lock:
+                self._db().execute("INSERT OR REPLACE INTO bulletins(topic, answer, sources, fetched) "
+                                   "VALUES (?, ?, ?, ?)", (name, answer, len(results), time.time()))
+            print(f"Prefetched '{name}' in {time.perf_counter() - started:.1f}s")
+            return True
+        except Exception as e:
+            print(f"Error prefetching '{name}': {e}")
+            return False
+        finally:
+            with self.write_lock:
+                self.refreshing.discard(name)
+
+    def refresh_all(self) -> int:
+        return sum(self.refresh(name) for name in self.topics)
+
+    def bulletin(self, name: str) -> Optional[Dict]:
+        """Stored bulletin of a topic with 'answer', 'sources', 'fetched' and 'age' (seconds)"""
+        row = self._db().execute("SELECT answer, sources, fetched FROM bulletins WHERE topic = ?",
+                                 (name,)).fetchone()
+        if not row:
+            return None
+        return {"topic": name, "answer": row[0], "sources": row[1], "fetched": row[2], "age": time.time() - row[2]}
+
+    def answer(self, query: str) -> Optional[str]:
+        """
+        Instant answer for a question about a prefetched topic
+
+        Returns:
+            Optional[str]: The bulletin with its freshness, or None when the question is not about a topic or
+            the bulletin is missing or too old (a refresh is then started in the background)
+        """
+        if not PrefetchEnabled:
+            return None
+        name = self.match(query)
+        if not name:
+            return None
+        bulletin = self.bulletin(name)
+        if not bulletin or bulletin["age"] > self.max_age:
+            self.stats["missed"] += 1
+            threading.Thread(target=self.refresh, args=(name,), name="topic-prefetch", daemon=True).start()
+            return None
+        self.stats["served"] += 1
+        fetched = datetime.datetime.fromtimestamp(bulletin["fetched"]).strftime("%I:%M %p").lstrip("0")
+        return (f"Here are the {name} highlights (updated {_age_text(bulletin['age'])} at {fetched}, "
+                f"from {bulletin['sources']} sources):\n{bulletin['answer']}")
+
+    def start(self):
+        """Start the background refresher once; the first pass runs immediately"""
+        if not PrefetchEnabled or not self.topics or self.interval <= 0 or self.thread is not None:
+            return
+        with self.write_lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self._loop, name="topic-prefetch", daemon=True)
+            self.thread.start()
+
+    def _loop(self):
+        while True:
+            for name in self.topics:
+                bulletin = self.bulletin(name)
+                # Bulletins still fresh from a previous run are not fetched again
+                if not bulletin or bulletin["age"] >= self.interval:
+                    self.refresh(name)
+            time.sleep(self.interval)
+
+
+# Global instance for easy access
+topic_prefetcher = TopicPrefetcher()
+
+
+def prefetched_answer(query: str) -> Optional[str]:
+    """Prefetched bulletin answering the query, or None."""
+    try:
+        return topic_prefetcher.answer(query)
+    except Exception as e:
+        print(f"Error reading prefetched topics: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prefetched topic bulletins")
+    parser.add_argument("--refresh", action="store_true", help="Refresh every configured topic now")
+    parser.add_argument("--match", metavar="QUERY", help="Show which topic a question matches and its answer")
+    args = parser.parse_args()
+
+    if args.refresh:
+        print(f"Refreshed {topic_prefetcher.refresh_all()} of {len(topic_prefetcher.topics)} topics")
+    if args.match:
+        name = topic_prefetcher.match(args.match)
+        print(f"Topic: {name or 'none'}")
+        if name:
+            print(topic_prefetcher.answer(args.match) or "No fresh bulletin")
+    if not args.refresh and not args.match:
+        for name in topic_prefetcher.topics:
+            bulletin = topic_prefetcher.bulletin(name)
+            status = f"updated {_age_text(bulletin['age'])}, {bulletin['sources']} sources" if bulletin else "never"
+            print(f"{name}: {status}")
+
+
+if __name__ == "__main__":
+    main()
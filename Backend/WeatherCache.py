@@ -0,0 +1,381 @@
+"""
+Weather Cache
+Forecasts (current, hourly and daily) cached per rounded location, kept warm in the background for often-asked places
+"""
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import datetime
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+from dotenv import dotenv_values
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Backend.Endpoints import service_url
+from Backend.HttpClient import http_client
+
+# Load environment variables with absolute path
+env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
+env_vars = dotenv_values(env_path)
+
+# A cached forecast is reused for this long
+WeatherCacheMinutes = float(env_vars.get("WeatherCacheMinutes", 15))
+# Locations closer than this (degrees) share a forecast
+WeatherGridDegrees = float(env_vars.get("WeatherGridDegrees", 0.1))
+# The most-asked locations are refreshed in the background every WeatherRefreshMinutes (0 disables)
+WeatherWarmLocations = int(env_vars.get("WeatherWarmLocations", 3))
+WeatherRefreshMinutes = float(env_vars.get("WeatherRefreshMinutes", 10))
+WeatherForecastDays = int(env_vars.get("WeatherForecastDays", 7))
+
+CACHE_PATH = os.path.join("Data", "WeatherCache.db")
+# Asks older than this no longer make a location "frequent"
+WARM_WINDOW_DAYS = 7
+
+# WMO weather interpretation codes used by Open-Meteo
+WEATHER_DESCRIPTIONS = {
+    0: "clear sky",
+    1: "mainly clear",
+    2: "partly cloudy",
+    3: "overcast",
+    45: "foggy",
+    48: "depositing rime fog",
+    51: "light drizzle",
+    53: "moderate drizzle",
+    55: "dense drizzle",
+    56: "light freezing drizzle",
+    57: "dense freezing drizzle",
+    61: "slight rain",
+    63: "moderate rain",
+    65: "heavy rain",
+    66: "light freezing rain",
+    67: "heavy freezing rain",
+    71: "slight snow fall",
+    73: "moderate snow fall",
+    75: "heavy snow fall",
+    77: "snow grains",
+    80: "slight rain showers",
+    81: "moderate rain showers",
+    82: "violent rain showers",
+    85: "slight snow showers",
+    86: "heavy snow showers",
+    95: "thunderstorm",
+    96: "thunderstorm with slight hail",
+    99: "thunderstorm with heavy hail",
+}
+WET_CODES = {51, 53, 55, 56, 57, 61, 63, 65, 66, 67, 80, 81, 82, 95, 96, 99}
+SNOW_CODES = {71, 73, 75, 77, 85, 86}
+# How much each kind of precipitation matters to someone heading out; WMO code order is not severity
+# (snow grains 77 would outrank heavy rain 65, slight showers 80 heavy snow 75)
+PRECIPITATION_SEVERITY = {
+    51: 1, 53: 2, 55: 3, 56: 3, 57: 4,
+    61: 2, 80: 2, 71: 2, 77: 2, 85: 2,
+    63: 3, 81: 3, 73: 3,
+    65: 4, 66: 4, 75: 4, 86: 4,
+    67: 5, 82: 5,
+    95: 6, 96: 7, 99: 8,
+}
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+RAIN_WORDS = re.compile(r"\b(rain|rains|raining|rainy|drizzle|shower|showers|umbrella|wet|storm|thunderstorm)\b")
+SNOW_WORDS = re.compile(r"\b(snow|snows|snowing|snowfall)\b")
+HOURLY_PARAMS = "temperature_2m,precipitation_probability,weathercode"
+DAILY_PARAMS = ("weathercode,temperature_2m_max,temperature_2m_min,precipitation_probability_max,"
+                "precipitation_sum")
+
+
+def describe(code: int) -> str:
+    return WEATHER_DESCRIPTIONS.get(code, "unknown weather condition")
+
+
+def prevailing_code(codes: List[int]) -> int:
+    """Weather code that describes a span of hours: the most severe precipitation, else the most frequent sky"""
+    wet = [code for code in codes if code in PRECIPITATION_SEVERITY]
+    if wet:
+        return max(wet, key=PRECIPITATION_SEVERITY.get)
+    return Counter(codes).most_common(1)[0][0]
+
+
+class WeatherCache:
+    """Open-Meteo forecasts in SQLite keyed by rounded latitude/longitude, with a warm-keeping refresher"""
+
+    def __init__(self, path: str = CACHE_PATH, ttl_minutes: float = WeatherCacheMinutes,
+                 grid: float = WeatherGridDegrees, warm_locations: int = WeatherWarmLocations,
+                 refresh_minutes: float = WeatherRefreshMinutes):
+        """
+        Initialize the cache
+
+        Args:
+            path (str): SQLite database file
+            ttl_minutes (float): Age after which a forecast is fetched again
+            grid (float): Rounding of coordinates for the cache key, in degrees
+            warm_locations (int): How many of the most-asked locations the refresher keeps fresh
+            refresh_minutes (float): Refresher interval (0 disables it)
+        """
+        self.path = path
+        self.ttl = ttl_minutes * 60
+        self.grid = grid
+        self.warm_locations = warm_locations
+        self.refresh_interval = refresh_minutes * 60
+        self.local = threading.local()
+        self.write_lock = threading.Lock()
+        self.refresher: Optional[threading.Thread] = None
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db().executescript("""
+            CREATE TABLE IF NOT EXISTS forecasts (
+                key TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                fetched REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS asks (
+                key TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                latitude REAL NOT NULL,
+                longitude REAL NOT NULL,
+                count INTEGER NOT NULL,
+                last_asked REAL NOT NULL
+            );
+        """)
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self.local.db = db
+        return db
+
+    def key(self, latitude: float, longitude: float) -> str:
+        return f"{round(latitude / self.grid) * self.grid:.2f},{round(longitude / self.grid) * self.grid:.2f}"
+
+    @staticmethod
+    def _fetch(latitude: float, longitude: float) -> Dict:
+        response = http_client.get(f"{service_url('weather')}/v1/forecast", params={
+            "latitude": latitude, "longitude": longitude, "current_weather": "true", "timezone": "auto",
+            "hourly": HOURLY_PARAMS, "daily": DAILY_PARAMS, "forecast_days": WeatherForecastDays,
+        }, timeout=5)
+        response.raise_for_status()
+        data = response.json()
+        if "current_weather" not in data:
+            raise ValueError("forecast has no current weather")
+        return data
+
+    def _store(self, key: str, data: Dict):
+        with self.write_lock:
+            self._db().execute("INSERT OR REPLACE INTO forecasts(key, data, fetched) VALUES (?, ?, ?)",
+                               (key, json.dumps(data), time.time()))
+
+    def _record_ask(self, key: str, name: str, latitude: float, longitude: float):
+        with self.write_lock:
+            self._db().execute(
+                "INSERT INTO asks(key, name, latitude, longitude, count, last_asked) VALUES (?, ?, ?, ?, 1, ?) "
+                "ON CONFLICT(key) DO UPDATE SET count = count + 1, last_asked = excluded.last_asked, "
+                "name = excluded.name",
+                (key, name, latitude, longitude, time.time())
+            )
+
+    def forecast(self, latitude: float, longitude: float, name: str = "") -> Dict:
+        """
+        Forecast for a location, from the cache while it is fresh
+
+        When the API fails, an expired forecast is returned rather than nothing; without one the error is raised.
+
+        Returns:
+            Dict: Open-Meteo response with 'current_weather', 'hourly', 'daily' and '_age' in seconds
+        """
+        key = self.key(latitude, longitude)
+        try:
+            self._record_ask(key, name, latitude, longitude)
+            row = self._db().execute("SELECT data, fetched FROM forecasts WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading weather cache: {e}")
+            row = None
+        self.start_refresher()
+
+        if row and time.time() - row[1] < self.ttl:
+            return {**json.loads(row[0]), "_age": time.time() - row[1]}
+        try:
+            data = self._fetch(latitude, longitude)
+            self._store(key, data)
+            return {**data, "_age": 0.0}
+        except Exception as e:
+            if row:
+                print(f"Weather API failed ({e}), using a forecast from {(time.time() - row[1]) / 60:.0f} min ago")
+                return {**json.loads(row[0]), "_age": time.time() - row[1]}
+            raise
+
+    def frequent(self) -> List[Dict]:
+        """The most-asked locations of the last WARM_WINDOW_DAYS days"""
+        rows = self._db().execute(
+            "SELECT key, name, latitude, longitude, count FROM asks WHERE last_asked > ? "
+            "ORDER BY count DESC LIMIT ?",
+            (time.time() - WARM_WINDOW_DAYS * 86400, self.warm_locations)
+        ).fetchall()
+        return [{"key": r[0], "name": r[1], "latitude": r[2], "longitude": r[3], "count": r[4]} for r in rows]
+
+    def refresh_frequent(self) -> int:
+        """Re-fetch frequent locations whose forecast would expire before the next pass; returns how many"""
+        refreshed = 0
+        for location in self.frequent():
+            row = self._db().execute("SELECT fetched FROM forecasts WHERE key = ?", (location["key"],)).fetchone()
+            if row and time.time() - row[0] < self.ttl - self.refresh_interval:
+                continue
+            try:
+                self._store(location["key"], self._fetch(location["latitude"], location["longitude"]))
+                refreshed += 1
+            except Exception as e:
+                print(f"Error refreshing weather for {location['name']}: {e}")
+        return refreshed
+
+    def start_refresher(self):
+        """Start the background refresher once (on first use, so importing stays side-effect free)"""
+        if self.refresher is not None or self.refresh_interval <= 0 or self.warm_locations <= 0:
+            return
+        with self.write_lock:
+            if self.refresher is not None:
+                return
+            self.refresher = threading.Thread(target=self._refresh_loop, name="weather-refresh", daemon=True)
+            self.refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            try:
+                self.refresh_frequent()
+            except Exception as e:
+                print(f"Error in weather refresher: {e}")
+
+
+def _local_now(forecast: Dict) -> datetime.datetime:
+    """Current wall-clock time at the forecast location"""
+    offset = forecast.get("utc_offset_seconds", 0)
+    utc_now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    return utc_now + datetime.timedelta(seconds=offset)
+
+
+def _requested_day(forecast: Dict, question: str) -> Optional[int]:
+    """Index into the daily forecast for the day a question asks about, or None for "now" """
+    days = forecast.get("daily", {}).get("time", [])
+    if not days:
+        return None
+    if "day after tomorrow" in question:
+        index = 2
+    elif "tomorrow" in question:
+        index = 1
+    elif re.search(r"\b(today|tonight|this (morning|afternoon|evening))\b", question):
+        index = 0
+    else:
+        index = None
+        for weekday, name in enumerate(WEEKDAYS):
+            if re.search(rf"\b{name}\b", question):
+                for position, day in enumerate(days):
+                    if datetime.date.fromisoformat(day).weekday() == weekday:
+                        index = position
+                        break
+                break
+    if index is None or index >= len(days):
+        return None
+    return index
+
+
+def _day_label(forecast: Dict, index: int) -> str:
+    if index == 0:
+        return "today"
+    if index == 1:
+        return "tomorrow"
+    return f"on {datetime.date.fromisoformat(forecast['daily']['time'][index]):%A}"
+
+
+def answer_question(forecast: Dict, place: str, question: str = "") -> str:
+    """
+    Answer a weather question from a cached forecast
+
+    Handles the current weather, a day's outlook ("tomorrow", "on Friday") and yes/no precipitation
+    questions ("will it rain tomorrow", "is it snowing") without another request.
+
+    Args:
+        forecast (Dict): Response from WeatherCache.forecast()
+        place (str): Location name used in the answer
+        question (str): The user's question
+
+    Returns:
+        str: Answer sentence
+    """
+    question = question.lower()
+    current = forecast["current_weather"]
+    day = _requested_day(forecast, question)
+    asks_rain = bool(RAIN_WORDS.search(question))
+    asks_snow = bool(SNOW_WORDS.search(question))
+
+    if day is not None:
+        daily = forecast["daily"]
+        label = _day_label(forecast, day)
+        code = daily["weathercode"][day]
+        chance = (daily.get("precipitation_probability_max") or [None] * (day + 1))[day]
+        amount = (daily.get("precipitation_sum") or [None] * (day + 1))[day]
+        codes = [code]
+        if day == 0 and forecast.get("hourly"):
+            # For today only the hours still ahead matter: the daily code and totals include the morning
+            now = _local_now(forecast).strftime("%Y-%m-%dT%H:00")
+            hourly = forecast["hourly"]
+            times = hourly.get("time", [])
+            ahead = [i for i, t in enumerate(times) if t >= now and t[:10] == daily["time"][0]]
+            hourly_codes = hourly.get("weathercode", [])
+            hourly_chances = hourly.get("precipitation_probability", [])
+            ahead_codes = [hourly_codes[i] for i in ahead if i < len(hourly_codes) and hourly_codes[i] is not None]
+            chances = [hourly_chances[i] for i in ahead if i < len(hourly_chances) and hourly_chances[i] is not None]
+            if ahead_codes:
+                codes = ahead_codes
+                code = prevailing_code(codes)
+                amount = None
+            if chances:
+                chance = max(chances)
+                amount = None
+        if asks_rain or asks_snow:
+            likely = chance is not None and chance >= 50
+            if asks_snow:
+                # Precipitation only falls as snow when it is cold enough
+                expected = bool(SNOW_CODES.intersection(codes)) or (likely and daily["temperature_2m_min"][day] <= 1)
+            else:
+                expected = bool(WET_CODES.intersection(codes)) or likely
+            what = "snow" if asks_snow else "rain"
+            detail = ""
+            if chance is not None:
+                detail = f" ({chance}% chance" + (f", about {amount} mm" if amount else "") + ")"
+            verdict = f"Yes, {what} is likely" if expected else f"{what.capitalize()} is unlikely"
+            return f"{verdict} in {place} {label}{detail}; expect {describe(code)}."
+        detail = f" with a {chance}% chance of precipitation" if chance is not None else ""
+        return (f"The forecast for {place} {label} is {describe(code)}, between "
+                f"{daily['temperature_2m_min'][day]}°C and {daily['temperature_2m_max'][day]}°C{detail}.")
+
+    code = current["weathercode"]
+    if asks_rain or asks_snow:
+        wet = code in (SNOW_CODES if asks_snow else WET_CODES)
+        what = "snowing" if asks_snow else "raining"
+        return (f"{'Yes, it is' if wet else 'No, it is not'} {what} in {place} right now; "
+                f"the current weather is {describe(code)} at {current['temperature']}°C.")
+    return (f"The current weather in {place} is {current['temperature']}°C with {describe(code)} "
+            f"and wind speed of {current['windspeed']} km/h.")
+
+
+# Global instance for easy access
+weather_cache = WeatherCache()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect the weather cache")
+    parser.add_argument("--frequent", action="store_true", help="List the locations the refresher keeps warm")
+    parser.add_argument("--refresh", action="store_true", help="Refresh the frequent locations now")
+    args = parser.parse_args()
+
+    if args.frequent:
+        for location in weather_cache.frequent():
+            print(f"{location['name']} ({location['key']}): asked {location['count']} times")
+    if args.refresh:
+        print(f"Refreshed {weather_cache.refresh_frequent()} locations")
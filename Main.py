@@ -4,7 +4,6 @@ from Frontend.GUI import (
     ShowTextToScreen,
     TempDirectoryPath,
     SetMicrophoneStatus,
-    AnswerModifier,
     QueryModifier,
     GetMicrophoneStatus,
     GetAssistantStatus,
@@ -16,6 +15,15 @@ from Backend.SpeechToText import SpeechRecognition
 from Backend.Chatbot import ChatBot
 from Backend.TextToSpeech import TextToSpeech
 from Backend.GeminiAPI import gemini_api, generate_text, solve_math_problem
+from Backend.LLMRouter import llm_router
+from Backend.ContextBuilder import ContextBuilder, GeneralContextTokens, HistoryWindow
+from Backend.ConversationStore import conversation_store
+from Backend.ChatTranscript import chat_transcript, TranscriptTailMessages
+from Backend.LongTermMemory import recall
+from Backend.ConversationSummary import prompt_history
+from Backend.ChatArchive import chat_archive
+from Backend.TopicPrefetch import topic_prefetcher
+from Backend.SpeechModels import speech_models
 
 
 try:
@@ -29,7 +37,6 @@ from asyncio import run
 from time import sleep
 import subprocess
 import threading
-import json
 import os
 
 # Load environment variables with absolute path
@@ -53,61 +60,24 @@ subprocess_list = []
 
 # Ensure a default chat log exists if no chats are logged
 def ShowDefaultChatIfNoChats():
-    try:
-        with open('Data/ChatLog.json', "r", encoding='utf-8') as file:
-            if len(file.read()) < 5:
-                with open(TempDirectoryPath('Database.data'), 'w', encoding='utf-8') as temp_file:
-                    temp_file.write("")
-                with open(TempDirectoryPath('Responses.data'), 'w', encoding='utf-8') as response_file:
-                    response_file.write(DefaultMessage)
-    except FileNotFoundError:
-        print("ChatLog.json file not found. Creating default response.")
-        os.makedirs("Data", exist_ok=True)
-        with open('Data/ChatLog.json', "w", encoding='utf-8') as file:
-            file.write("[]")
+    if conversation_store.is_empty():
         with open(TempDirectoryPath('Responses.data'), 'w', encoding='utf-8') as response_file:
             response_file.write(DefaultMessage)
 
-# Read chat log from JSON
-def ReadChatLogJson():
-    try:
-        with open('Data/ChatLog.json', 'r', encoding='utf-8') as file:
-            chatlog_data = json.load(file)
-        return chatlog_data
-    except FileNotFoundError:
-        print("ChatLog.json not found.")
-        return []
-
 # Integrate chat logs into a readable format
 
 
 def ChatLogIntegration():
-    json_data = ReadChatLogJson()
-    formatted_chatlog = ""
-    for entry in json_data:
-        if entry["role"] == "user":
-            formatted_chatlog += f"{Username}: {entry['content']}\n"
-        elif entry["role"] == "assistant":
-            formatted_chatlog += f"{Assistantname}: {entry['content']}\n"
-
-    # Ensure the Temp directory exists
-    temp_dir_path = TempDirectoryPath('')  # Get the directory path
-    if not os.path.exists(temp_dir_path):
-        os.makedirs(temp_dir_path)
-
-    with open(TempDirectoryPath('Database.data'), 'w', encoding='utf-8') as file:
-        file.write(AnswerModifier(formatted_chatlog))
+    # Only turns stored since the last rendered one are read, formatted and appended to Database.data
+    chat_transcript.sync()
 
 # Display the chat on the GUI
 def ShowChatOnGUI():
-    try:
-        with open(TempDirectoryPath('Database.data'), 'r', encoding='utf-8') as file:
-            data = file.read()
-        if len(str(data)) > 0:
-            with open(TempDirectoryPath('Responses.data'), 'w', encoding='utf-8') as response_file:
-                response_file.write(data)
-    except FileNotFoundError:
-        print("Database.data file not found.")
+    # Load just the visible tail; older turns are paged from the transcript index on demand
+    data = chat_transcript.tail(TranscriptTailMessages)
+    if len(str(data)) > 0:
+        with open(TempDirectoryPath('Responses.data'), 'w', encoding='utf-8') as response_file:
+            response_file.write(data)
 
 # Initial execution setup
 def InitialExecution():
@@ -117,6 +87,12 @@ def InitialExecution():
     ShowDefaultChatIfNoChats()
     ChatLogIntegration()
     ShowChatOnGUI()
+    # Move old history into compressed archive segments without delaying startup
+    chat_archive.rotate_in_background()
+    # Keep news headlines and other volatile topics summarized ahead of the questions
+    topic_prefetcher.start()
+    # Load and warm up the speech model while the GUI comes up, not on the first voice turn
+    speech_models.preload()
 
 # Main execution logic
 def MainExecution():
@@ -238,36 +214,35 @@ def MainExecution():
                         # Provide a polite, predefined response
                         Answer = "I appreciate your sentiment, but as an AI assistant, I don't have personal feelings or relationships. I'm here to help you with information and tasks. How else can I assist you today?"
                     else:
-                        # Try Gemini API for enhanced responses
-                        if gemini_api.model:
-                            # Create conversation history for context-aware responses
-                            conversation_history = [
-                                {"role": "user", "content": f"You are {Assistantname}, a helpful AI assistant. Respond naturally and concisely."},
-                                {"role": "assistant", "content": "Understood. I'm ready to help!"}
-                            ]
+                        # Try the fastest healthy LLM (Gemini / Groq) for enhanced responses
+                        if llm_router.available():
+                            # Create a token-budgeted conversation for context-aware responses
+                            context = ContextBuilder(GeneralContextTokens)
+                            context.system(f"You are {Assistantname}, a helpful AI assistant. Respond naturally and concisely.",
+                                           "Understood. I'm ready to help!")
                             
-                            # Add recent chat history for context (last 2 exchanges for faster processing)
+                            # Add the running summary and as much recent chat history as fits the budget
                             try:
-                                with open('Data/ChatLog.json', 'r', encoding='utf-8') as file:
-                                    import json
-                                    chatlog_data = json.load(file)
-                                    # Get last 2 exchanges for faster processing
-                                    recent_chats = chatlog_data[-2:] if len(chatlog_data) > 2 else chatlog_data
-                                    for entry in recent_chats:
-                                        conversation_history.append({
-                                            "role": entry["role"], 
-                                            "content": entry["content"]
-                                        })
+                                summary, history = prompt_history(HistoryWindow)
+                                if summary:
+                                    context.retrieved(f"Summary of our conversation so far: {summary}")
+                                context.history(history)
                             except Exception as e:
                                 print(f"Could not load chat history: {e}")
                             
+                            # Older turns related to this query, beyond the recent history
+                            memories = recall(QueryFinal, exclude_recent=HistoryWindow // 2)
+                            if memories:
+                                context.retrieved("Earlier in our conversations:\n" + "\n\n".join(memories))
+                            
                             # Add current query
-                            conversation_history.append({"role": "user", "content": QueryFinal})
+                            context.query(QueryFinal)
+                            conversation_history = context.build()
                             
-                            # Get response from Gemini with optimized parameters
-                            gemini_response = gemini_api.chat_completion(conversation_history, temperature=0.5, max_tokens=512)
-                            if gemini_response:
-                                Answer = gemini_response
+                            # Get response from the router with optimized parameters
+                            llm_response = llm_router.chat_completion(conversation_history, request_type="general", temperature=0.5, max_tokens=512)
+                            if llm_response:
+                                Answer = llm_response
                             else:
                                 Answer = ChatBot(QueryModifier(QueryFinal))
                         else:
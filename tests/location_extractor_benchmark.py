@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Accuracy and speed of the weather location extractor against the old split-based cascade
+"""
+
+import os
+import sys
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Backend.Geocoder import geocoder
+from Backend.LocationExtractor import extract_location, LocationMinConfidence
+
+# (prompt, expected location); "" means no location should be used
+CORPUS = [
+    ("What is the weather in Mumbai?", "mumbai"),
+    ("weather in delhi today", "delhi"),
+    ("Jasmine what's the temperature in Bangalore right now", "bengaluru"),
+    ("how is the temperature in chennai", "chennai"),
+    ("what is the weather like in Kolkata", "kolkata"),
+    ("Is it going to rain in Pune tomorrow?", "pune"),
+    ("will it rain tomorrow in hyderabad", "hyderabad"),
+    ("temperature at Shimla", "shimla"),
+    ("(jasmine) weather in goa", "goa"),
+    ("forecast for Jaipur this weekend", "jaipur"),
+    ("Mumbai weather", "mumbai"),
+    ("delhi temperature now", "delhi"),
+    ("how hot is it in Ahmedabad", "ahmedabad"),
+    ("how cold is it in new york city today?", "new york"),
+    ("What's the weather in San Francisco on Saturday?", "san francisco"),
+    ("Is it sunny in London?", "london"),
+    ("tell me the weather forecast for tamil nadu", "tamil nadu"),
+    ("weather in west bengal", "west bengal"),
+    ("climate of kerala", "kerala"),
+    ("will it snow in Manali next week", "manali"),
+    ("temperature in Tokyo please", "tokyo"),
+    ("weather in paris france", "paris"),
+    ("Paris weather tomorrow", "paris"),
+    ("is it windy at the marina in chennai", "chennai"),
+    ("weather", ""),
+    ("what's the weather like today?", ""),
+    ("is it going to rain tomorrow", ""),
+    ("temperature outside right now please", ""),
+    ("how cold is it", ""),
+    ("I am feeling hot, what should I drink?", ""),
+    ("what will the weather be like in Nice this weekend", "nice"),
+    ("weather in Georgia", "georgia"),
+    ("Is Jordan cold in winter", ""),
+    ("will it rain in Varanasi on Monday", "varanasi"),
+    ("weather near Lucknow", "lucknow"),
+    ("how is the weather around Coimbatore today", "coimbatore"),
+    ("What's the temperature in Bengaluru and will it rain?", "bengaluru"),
+    ("weather in Thiruvananthapuram", "thiruvananthapuram"),
+    ("weather forecast in bombay", "mumbai"),
+    ("is it cloudy in calcutta", "kolkata"),
+    ("what's the weather in Madras right now", "chennai"),
+    ("hey jasmine could you please tell me whether it is going to rain in the evening today in "
+     "Indore because I have to travel there for a meeting with some clients and I need to know "
+     "whether I should carry an umbrella or not", "indore"),
+    ("I am planning a trip with my family next month and we are thinking about going somewhere in the "
+     "mountains, probably Darjeeling, so can you tell me what the weather is usually like there and "
+     "whether it will be cold", "darjeeling"),
+    ("my sister lives in Berlin and she says it is really cold there, what is the temperature in Berlin", "berlin"),
+    ("weather in Ranchi tomorrow morning", "ranchi"),
+    ("what's the forecast for Sydney, Australia", "sydney"),
+    ("rain in Dubai?", "dubai"),
+    ("weather in the Netherlands", "netherlands"),
+    ("how is the weather in Springfield today", "springfield"),
+    ("temperature in Kodaikanal hills", "kodaikanal"),
+    ("weather at my home", ""),
+    ("is it hot in here", ""),
+    ("weather in uttar pradesh", "uttar pradesh"),
+    ("cloudy skies over Nagpur?", "nagpur"),
+    ("snow in Kashmir this week?", "jammu and kashmir"),
+    ("What is the weather going to be like in Gurgaon at 5 pm", "gurugram"),
+    ("weather in Mysore on Sunday", "mysuru"),
+    ("sunny in singapore today?", "singapore"),
+    ("forecast of rain in Bhubaneswar", "bhubaneswar"),
+    ("what's the temperature in Toronto Canada today", "toronto"),
+    ("temperature of water", ""),
+    ("weather in north goa", "goa"),
+]
+
+
+def legacy_extract(prompt: str) -> str:
+    """Compact copy of the split-based cascade the extractor replaced in RealtimeSearchEngine"""
+    weather_keywords = ["weather", "temperature", "forecast", "climate", "rain", "snow", "sunny", "cloudy", "windy",
+                        "hot", "cold"]
+    trailing = ["today", "now", "currently", "please", "thanks", "thank"]
+    indian_states = ["andhra pradesh", "arunachal pradesh", "assam", "bihar", "chhattisgarh", "goa", "gujarat",
+                     "haryana", "himachal pradesh", "jharkhand", "karnataka", "kerala", "madhya pradesh",
+                     "maharashtra", "manipur", "meghalaya", "mizoram", "nagaland", "odisha", "punjab", "rajasthan",
+                     "sikkim", "tamil nadu", "telangana", "tripura", "uttar pradesh", "uttarakhand", "west bengal"]
+
+    def after(text, marker):
+        words = text.split(marker, 1)[1].strip("?").strip(".").split()
+        while words and words[-1] in trailing:
+            words = words[:-1]
+        return " ".join(words)
+
+    location = ""
+    clean = prompt.lower().replace("(", "").replace(")", "").strip()
+    if clean.startswith("jasmine "):
+        clean = clean[8:]
+    for pattern in ["temperature in ", "weather in ", "how is the temperature in ", "what is the weather like in "]:
+        if pattern in clean:
+            location = clean.split(pattern, 1)[1].strip()
+            break
+    else:
+        if " in " in clean:
+            location = after(clean, " in ")
+        elif " at " in clean:
+            location = after(clean, " at ")
+        else:
+            for keyword in weather_keywords:
+                if keyword in clean:
+                    rest = clean.split(keyword, 1)[1].strip()
+                    if " in " in rest:
+                        location = after(rest, " in ")
+                        break
+                    if " at " in rest:
+                        location = after(rest, " at ")
+                        break
+    if not location or len(location) < 2:
+        location = next((state for state in indian_states if state in clean), location)
+    if location:
+        location = location.strip().strip("?").strip(".").strip()
+        words = location.split()
+        if words and words[-1] in ["today", "now", "currently"]:
+            location = " ".join(words[:-1])
+    return location
+
+
+def new_extract(prompt: str) -> str:
+    location, confidence = extract_location(prompt)
+    return location if confidence >= LocationMinConfidence else ""
+
+
+def canonical(location: str) -> str:
+    """Gazetteer name of a location (aliases like "bombay" count as "mumbai"), else the text itself"""
+    place = geocoder.gazetteer.lookup(location) if location else None
+    return place["name"].lower() if place else location.lower()
+
+
+def evaluate(name, extractor, rounds=200):
+    correct = 0
+    misses = []
+    for prompt, expected in CORPUS:
+        got = extractor(prompt)
+        if canonical(got) == expected:
+            correct += 1
+        else:
+            misses.append((prompt, expected, got))
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for prompt, _ in CORPUS:
+            extractor(prompt)
+    per_prompt = (time.perf_counter() - started) / (rounds * len(CORPUS)) * 1e6
+
+    print(f"{name}: {correct}/{len(CORPUS)} correct ({correct / len(CORPUS):.0%}), {per_prompt:.1f} µs/prompt")
+    for prompt, expected, got in misses:
+        print(f"   ❌ {prompt[:70]!r}: expected {expected!r}, got {got!r}")
+    return correct
+
+
+def main():
+    print("Weather Location Extraction Benchmark")
+    print("=" * 40)
+    # Warm the gazetteer and phrase index so load time is not counted as per-prompt latency
+    started = time.perf_counter()
+    extract_location("weather in delhi")
+    print(f"Gazetteer and phrase index loaded in {(time.perf_counter() - started) * 1000:.1f} ms\n")
+
+    legacy = evaluate("Legacy cascade", legacy_extract)
+    print()
+    new = evaluate("Location extractor", new_extract)
+    print(f"\nAccuracy change: {new - legacy:+d} prompts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,519 @@
+#!/usr/bin/env python3
+"""
+Local stand-in server for every external API the assistant calls
+
+Imitates the request/response shapes used by the backends (Cohere chat, Gemini generateContent,
+Groq chat completions, Murf speech, Hugging Face inference, Open-Meteo geocoding/forecast,
+web search, exchange rates, stock quotes and sports results) with configurable latency distributions, error injection and streaming.
+
+Point the assistant at it by adding to .env:
+    MockAPIBase=http://127.0.0.1:8765
+
+Usage:
+    python utils/mock_server.py --port 8765
+    python utils/mock_server.py --latency gemini=lognormal:800:0.5 --error-rate groq=0.1
+    python utils/mock_server.py --config mock_config.json
+
+Runtime control:
+    GET  /__stats   request counts per service
+    POST /__config  merge a JSON config (same shape as --config) into the running server
+"""
+
+import argparse
+import base64
+import hashlib
+import io
+import json
+import math
+import random
+import struct
+import threading
+import time
+import uuid
+import wave
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote
+
+# Per-service behaviour. Latency distributions:
+#   {"dist": "fixed", "ms": 100}
+#   {"dist": "uniform", "min_ms": 50, "max_ms": 150}
+#   {"dist": "normal", "mean_ms": 100, "stddev_ms": 20}
+#   {"dist": "lognormal", "median_ms": 100, "sigma": 0.5}
+DEFAULT_CONFIG = {
+    "cohere": {"latency": {"dist": "lognormal", "median_ms": 400, "sigma": 0.4}},
+    "gemini": {"latency": {"dist": "lognormal", "median_ms": 700, "sigma": 0.5}},
+    "groq": {"latency": {"dist": "lognormal", "median_ms": 250, "sigma": 0.4}},
+    "murf": {"latency": {"dist": "lognormal", "median_ms": 900, "sigma": 0.4}},
+    "huggingface": {"latency": {"dist": "lognormal", "median_ms": 3000, "sigma": 0.3}},
+    "geocoding": {"latency": {"dist": "lognormal", "median_ms": 120, "sigma": 0.3}},
+    "weather": {"latency": {"dist": "lognormal", "median_ms": 150, "sigma": 0.3}},
+    "search": {"latency": {"dist": "lognormal", "median_ms": 600, "sigma": 0.5}},
+    "currency": {"latency": {"dist": "lognormal", "median_ms": 150, "sigma": 0.3}},
+    "stocks": {"latency": {"dist": "lognormal", "median_ms": 200, "sigma": 0.3}},
+    "sports": {"latency": {"dist": "lognormal", "median_ms": 250, "sigma": 0.3}},
+}
+# Defaults merged into every service entry
+SERVICE_DEFAULTS = {
+    "error_rate": 0.0,       # fraction of requests answered with error_status
+    "error_status": 503,
+    "timeout_rate": 0.0,     # fraction of requests that hang for hang_seconds
+    "hang_seconds": 30.0,
+    "stream_chunk_ms": 30,   # delay between streamed chunks
+}
+
+KNOWN_PLACES = {
+    "delhi": ("Delhi", 28.65, 77.23, "India"),
+    "new delhi": ("New Delhi", 28.61, 77.21, "India"),
+    "mumbai": ("Mumbai", 19.07, 72.88, "India"),
+    "chennai": ("Chennai", 13.08, 80.27, "India"),
+    "kolkata": ("Kolkata", 22.57, 88.36, "India"),
+    "bengaluru": ("Bengaluru", 12.97, 77.59, "India"),
+    "london": ("London", 51.51, -0.13, "United Kingdom"),
+    "new york": ("New York", 40.71, -74.01, "United States"),
+    "tokyo": ("Tokyo", 35.69, 139.69, "Japan"),
+    "paris": ("Paris", 48.85, 2.35, "France"),
+}
+
+# Units of each currency per US dollar
+MOCK_RATES = {"USD": 1.0, "INR": 83.2, "EUR": 0.92, "GBP": 0.79, "JPY": 149.5, "AUD": 1.52, "CAD": 1.36,
+              "CHF": 0.88, "CNY": 7.25, "SGD": 1.35, "HKD": 7.8, "NZD": 1.66, "KRW": 1340.0, "THB": 35.6,
+              "ZAR": 18.4, "MYR": 4.7, "IDR": 15600.0, "SEK": 10.6, "NOK": 10.8, "DKK": 6.9, "BRL": 5.0,
+              "MXN": 17.1, "TRY": 32.0, "PHP": 56.0, "PLN": 4.0, "ILS": 3.7, "CZK": 23.0, "HUF": 360.0}
+
+LOREM = ("This is a simulated response from the local mock server. It has the same shape as the real "
+         "API so latency, error handling and streaming paths can be exercised without spending quota.")
+
+
+def merge_config(base, update):
+    """Merge a {service: {...}} config into base, field by field"""
+    for service, values in update.items():
+        entry = base.setdefault(service, dict(SERVICE_DEFAULTS))
+        for key, value in values.items():
+            entry[key] = value
+    return base
+
+
+def sample_latency(spec):
+    """Draw one latency in seconds from a distribution spec"""
+    dist = spec.get("dist", "fixed")
+    if dist == "uniform":
+        ms = random.uniform(spec.get("min_ms", 0), spec.get("max_ms", 0))
+    elif dist == "normal":
+        ms = random.gauss(spec.get("mean_ms", 0), spec.get("stddev_ms", 0))
+    elif dist == "lognormal":
+        ms = random.lognormvariate(math.log(max(spec.get("median_ms", 1), 1e-3)), spec.get("sigma", 0.5))
+    else:
+        ms = spec.get("ms", 0)
+    return max(ms, 0) / 1000.0
+
+
+def fake_coordinates(name):
+    """Deterministic coordinates for places not in KNOWN_PLACES"""
+    digest = hashlib.md5(name.lower().encode("utf-8")).digest()
+    lat = (digest[0] / 255.0) * 140 - 60
+    lon = (digest[1] / 255.0) * 360 - 180
+    return round(lat, 4), round(lon, 4)
+
+
+def make_wav(seconds=1.0, rate=16000, frequency=440.0):
+    """A short sine tone as WAV bytes"""
+    buffer = io.BytesIO()
+    frames = b"".join(
+        struct.pack("<h", int(8000 * math.sin(2 * math.pi * frequency * i / rate)))
+        for i in range(int(seconds * rate))
+    )
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(frames)
+    return buffer.getvalue()
+
+
+def make_png(width=64, height=64, seed=0):
+    """A solid-colour PNG as bytes"""
+    rng = random.Random(seed)
+    pixel = bytes([rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)])
+    raw = b"".join(b"\x00" + pixel * width for _ in range(height))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+
+
+class MockState:
+    """Shared configuration and counters for the running server"""
+
+    def __init__(self, config):
+        self.lock = threading.Lock()
+        self.config = merge_config({}, DEFAULT_CONFIG)
+        merge_config(self.config, config)
+        self.counts = {}
+        self.errors = {}
+        self.audio = {}
+        self.teams = {}
+
+    def service(self, name):
+        with self.lock:
+            return dict(self.config.get(name, SERVICE_DEFAULTS))
+
+    def count(self, name, error=False):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+            if error:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state: MockState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    # ---- helpers -------------------------------------------------------
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            return json.loads(raw) if raw else {}
+        except ValueError:
+            return {}
+
+    def _send(self, status, payload, content_type="application/json"):
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+    def _event(self, payload):
+        data = payload if isinstance(payload, str) else json.dumps(payload)
+        self.wfile.write(f"data: {data}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def _simulate(self, service):
+        """Apply latency and error injection; returns False when an error was already sent"""
+        config = self.state.service(service)
+        roll = random.random()
+        if roll < config.get("timeout_rate", 0.0):
+            time.sleep(config.get("hang_seconds", 30.0))
+        time.sleep(sample_latency(config.get("latency", {})))
+        if random.random() < config.get("error_rate", 0.0):
+            self.state.count(service, error=True)
+            status = int(config.get("error_status", 503))
+            self._send(status, {"error": {"code": status, "message": f"Injected {service} error"}})
+            return False
+        self.state.count(service)
+        return True
+
+    def _chunk_delay(self, service):
+        time.sleep(self.state.service(service).get("stream_chunk_ms", 30) / 1000.0)
+
+    # ---- routing -------------------------------------------------------
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def _route(self, method):
+        url = urlparse(self.path)
+        path = url.path
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if path == "/__stats":
+            with self.state.lock:
+                return self._send(200, {"requests": self.state.counts, "errors": self.state.errors})
+        if path == "/__config" and method == "POST":
+            update = self._body()
+            with self.state.lock:
+                merge_config(self.state.config, update)
+            return self._send(200, {"config": self.state.config})
+
+        service, _, rest = path.lstrip("/").partition("/")
+        rest = "/" + rest
+        handler = getattr(self, f"_{service}", None)
+        if handler is None:
+            return self._send(404, {"error": f"Unknown mock service for {path}"})
+        if method == "GET" and service == "murf" and rest.startswith("/audio/"):
+            # Audio downloads are served without extra latency
+            return self._murf_audio(rest)
+        # Read the body first so injected errors leave the keep-alive connection clean
+        body = self._body() if method == "POST" else {}
+        if not self._simulate(service):
+            return
+        handler(method, rest, query, body)
+
+    # ---- services ------------------------------------------------------
+
+    def _cohere(self, method, path, query, body):
+        message = str(body.get("message", ""))
+        self._send(200, {
+            "response_id": str(uuid.uuid4()),
+            "generation_id": str(uuid.uuid4()),
+            "text": f"general {message.lower()}",
+            "chat_history": [],
+            "finish_reason": "COMPLETE",
+            "meta": {"billed_units": {"input_tokens": len(message.split()), "output_tokens": 3}},
+        })
+
+    def _gemini(self, method, path, query, body):
+        model = path.split("/models/", 1)[-1].split(":", 1)[0]
+        response = {
+            "candidates": [{
+                "content": {"parts": [{"text": LOREM}], "role": "model"},
+                "finishReason": "STOP",
+                "index": 0,
+            }],
+            "usageMetadata": {"promptTokenCount": 10, "candidatesTokenCount": len(LOREM.split()),
+                              "totalTokenCount": 10 + len(LOREM.split())},
+            "modelVersion": model,
+        }
+        if ":streamGenerateContent" not in path:
+            return self._send(200, response)
+
+        self._start_stream()
+        for word in LOREM.split(" "):
+            chunk = json.loads(json.dumps(response))
+            chunk["candidates"][0]["content"]["parts"][0]["text"] = word + " "
+            chunk["candidates"][0].pop("finishReason")
+            self._event(chunk)
+            self._chunk_delay("gemini")
+        self._event(response | {"candidates": [{"content": {"parts": [{"text": ""}], "role": "model"},
+                                                 "finishReason": "STOP", "index": 0}]})
+
+    def _groq(self, method, path, query, body):
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        model = body.get("model", "llama-3.3-70b-versatile")
+        if not body.get("stream"):
+            return self._send(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": LOREM},
+                             "finish_reason": "stop", "logprobs": None}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": len(LOREM.split()),
+                          "total_tokens": 10 + len(LOREM.split())},
+            })
+
+        self._start_stream()
+        for index, word in enumerate(LOREM.split(" ")):
+            delta = {"content": word + " "} if index else {"role": "assistant", "content": word + " "}
+            self._event({"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                         "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+            self._chunk_delay("groq")
+        self._event({"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        self._event("[DONE]")
+
+    def _murf(self, method, path, query, body):
+        audio_id = uuid.uuid4().hex
+        seconds = min(max(len(str(body.get("text", "")).split()) * 0.3, 0.5), 10.0)
+        with self.state.lock:
+            self.state.audio[audio_id] = seconds
+        host = self.headers.get("Host", f"127.0.0.1:{self.server.server_address[1]}")
+        self._send(200, {
+            "audioFile": f"http://{host}/murf/audio/{audio_id}.wav",
+            "audioLengthInSeconds": seconds,
+            "encodedAudio": None,
+        })
+
+    def _murf_audio(self, path):
+        audio_id = path.rsplit("/", 1)[-1].split(".", 1)[0]
+        with self.state.lock:
+            seconds = self.state.audio.pop(audio_id, None)
+        if seconds is None:
+            return self._send(404, {"error": "Unknown audio file"})
+        self._send(200, make_wav(seconds), "audio/wav")
+
+    def _huggingface(self, method, path, query, body):
+        png = make_png(seed=hash(str(body.get("inputs", ""))))
+        if "image/" in self.headers.get("Accept", ""):
+            return self._send(200, png, "image/png")
+        self._send(200, {"images": [base64.b64encode(png).decode("ascii")]})
+
+    def _geocoding(self, method, path, query, body):
+        name = query.get("name", "").strip()
+        if not name:
+            return self._send(200, {"generationtime_ms": 0.1})
+        known = KNOWN_PLACES.get(name.lower())
+        if known:
+            resolved, lat, lon, country = known
+        else:
+            resolved, country = name.title(), "Mockland"
+            lat, lon = fake_coordinates(name)
+        self._send(200, {"results": [{
+            "id": int(hashlib.md5(name.lower().encode()).hexdigest()[:8], 16),
+            "name": resolved, "latitude": lat, "longitude": lon, "country": country,
+            "timezone": "auto", "feature_code": "PPL",
+        }], "generationtime_ms": 0.5})
+
+    def _weather(self, method, path, query, body):
+        lat = float(query.get("latitude", 0))
+        lon = float(query.get("longitude", 0))
+        rng = random.Random(f"{round(lat, 1)},{round(lon, 1)},{time.strftime('%Y%m%d%H')}")
+        base_temperature = round(30 - abs(lat) * 0.4 + rng.uniform(-4, 4), 1)
+        codes = [0, 1, 2, 3, 45, 61, 63, 80, 95]
+        now = time.strftime("%Y-%m-%dT%H:00")
+        response = {
+            "latitude": lat, "longitude": lon, "timezone": "GMT", "utc_offset_seconds": 0,
+            "current_weather": {
+                "time": now, "temperature": base_temperature, "windspeed": round(rng.uniform(2, 25), 1),
+                "winddirection": rng.randint(0, 359), "weathercode": rng.choice(codes), "is_day": 1,
+            },
+        }
+        days = int(query.get("forecast_days", 7))
+        if "hourly" in query:
+            hours = days * 24
+            response["hourly"] = {
+                "time": [time.strftime("%Y-%m-%dT%H:00", time.gmtime(time.time() + h * 3600)) for h in range(hours)],
+                "temperature_2m": [round(base_temperature + 4 * math.sin(h / 24 * 2 * math.pi), 1) for h in range(hours)],
+                "precipitation_probability": [rng.randint(0, 100) for _ in range(hours)],
+                "weathercode": [rng.choice(codes) for _ in range(hours)],
+            }
+        if "daily" in query:
+            response["daily"] = {
+                "time": [time.strftime("%Y-%m-%d", time.gmtime(time.time() + d * 86400)) for d in range(days)],
+                "temperature_2m_max": [round(base_temperature + rng.uniform(1, 5), 1) for _ in range(days)],
+                "temperature_2m_min": [round(base_temperature - rng.uniform(1, 8), 1) for _ in range(days)],
+                "precipitation_probability_max": [rng.randint(0, 100) for _ in range(days)],
+                "precipitation_sum": [round(rng.uniform(0, 12), 1) for _ in range(days)],
+                "weathercode": [rng.choice(codes) for _ in range(days)],
+            }
+        self._send(200, response)
+
+    def _search(self, method, path, query, body):
+        q = query.get("q", "")
+        num = int(query.get("num", 5))
+        slug = "-".join(q.lower().split())[:60]
+        self._send(200, {"results": [{
+            "url": f"https://example{i}.com/{slug}",
+            "title": f"{q} - Result {i + 1}",
+            "description": f"Simulated search snippet {i + 1} about {q}. {LOREM}",
+        } for i in range(num)]})
+
+
+    def _currency(self, method, path, query, body):
+        base = query.get("from", "EUR").upper()
+        if base not in MOCK_RATES:
+            return self._send(404, {"message": "not found"})
+        targets = query.get("to", "").upper().split(",") if query.get("to") else list(MOCK_RATES)
+        rates = {code: round(MOCK_RATES[code] / MOCK_RATES[base], 5) for code in targets
+                 if code in MOCK_RATES and code != base}
+        self._send(200, {"amount": 1.0, "base": base, "date": time.strftime("%Y-%m-%d"), "rates": rates})
+
+    def _stocks(self, method, path, query, body):
+        if path.startswith("/v1/finance/search"):
+            q = query.get("q", "").strip()
+            symbol = "".join(c for c in q.upper() if c.isalpha())[:4]
+            quotes = [{"symbol": symbol, "shortname": f"{q.title()} Inc.", "quoteType": "EQUITY"}] if symbol else []
+            return self._send(200, {"quotes": quotes, "news": []})
+        symbol = unquote(path.rsplit("/", 1)[-1])
+        rng = random.Random(f"{symbol},{time.strftime('%Y%m%d%H')}")
+        previous = round(rng.uniform(20, 3000), 2)
+        self._send(200, {"chart": {"result": [{"meta": {
+            "symbol": symbol, "currency": "INR" if symbol.endswith(".NS") or symbol.startswith("^NSE") else "USD",
+            "shortName": f"{symbol} Mock Corp", "regularMarketPrice": round(previous * rng.uniform(0.97, 1.03), 2),
+            "chartPreviousClose": previous, "regularMarketTime": int(time.time()), "exchangeName": "MOCK",
+        }}], "error": None}})
+
+    def _sports(self, method, path, query, body):
+        if path.endswith("/searchteams.php"):
+            name = query.get("t", "").strip()
+            team_id = str(int(hashlib.md5(name.lower().encode()).hexdigest()[:6], 16))
+            with self.state.lock:
+                self.state.teams[team_id] = name.title()
+            return self._send(200, {"teams": [{"idTeam": team_id, "strTeam": name.title(), "strSport": "Soccer"}]})
+        if path.endswith("/eventslast.php"):
+            rng = random.Random(query.get("id", ""))
+            with self.state.lock:
+                home = self.state.teams.get(query.get("id", ""), f"Team {query.get('id', '')}")
+            away = rng.choice(["Rovers", "United", "City", "Athletic"])
+            return self._send(200, {"results": [{
+                "strEvent": f"{home} vs {away}", "strHomeTeam": home, "strAwayTeam": away,
+                "intHomeScore": str(rng.randint(0, 4)), "intAwayScore": str(rng.randint(0, 4)),
+                "dateEvent": time.strftime("%Y-%m-%d", time.gmtime(time.time() - 3 * 86400)),
+                "strLeague": "Mock League",
+            }]})
+        self._send(404, {"error": f"Unknown sports endpoint {path}"})
+
+
+def parse_overrides(latency_args, error_args):
+    """Turn --latency service=dist:a:b and --error-rate service=rate flags into a config dict"""
+    config = {}
+    for item in latency_args or []:
+        service, _, spec = item.partition("=")
+        parts = spec.split(":")
+        dist = parts[0]
+        values = [float(value) for value in parts[1:]]
+        if dist == "fixed":
+            latency = {"dist": "fixed", "ms": values[0]}
+        elif dist == "uniform":
+            latency = {"dist": "uniform", "min_ms": values[0], "max_ms": values[1]}
+        elif dist == "normal":
+            latency = {"dist": "normal", "mean_ms": values[0], "stddev_ms": values[1]}
+        else:
+            latency = {"dist": "lognormal", "median_ms": values[0], "sigma": values[1] if len(values) > 1 else 0.5}
+        config.setdefault(service, {})["latency"] = latency
+    for item in error_args or []:
+        service, _, rate = item.partition("=")
+        config.setdefault(service, {})["error_rate"] = float(rate)
+    return config
+
+
+def run_server(host="127.0.0.1", port=8765, config=None):
+    """Start the mock server (blocking)"""
+    MockHandler.state = MockState(config or {})
+    server = ThreadingHTTPServer((host, port), MockHandler)
+    server.daemon_threads = True
+    print(f"🧪 Mock API server listening on http://{host}:{port}")
+    print(f"   Add MockAPIBase=http://{host}:{port} to .env to use it")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the assistant's external APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--config", help="JSON file with per-service latency/error settings")
+    parser.add_argument("--latency", action="append", metavar="SERVICE=DIST:A[:B]",
+                        help="e.g. gemini=lognormal:800:0.5, groq=fixed:200, search=uniform:300:900")
+    parser.add_argument("--error-rate", action="append", metavar="SERVICE=RATE", help="e.g. groq=0.1")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible latency/error sequences")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    config = {}
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    merge_config(config, parse_overrides(args.latency, args.error_rate))
+    run_server(args.host, args.port, config)
+
+
+if __name__ == "__main__":
+    main()
@@ -39,12 +39,7 @@ def setup_data_files():
         os.makedirs("Data")
         print("📁 Created Data directory")
     
-    # Create ChatLog.json if it doesn't exist
-    chatlog_path = os.path.join("Data", "ChatLog.json")
-    if not os.path.exists(chatlog_path):
-        with open(chatlog_path, "w") as f:
-            json.dump([], f)
-        print("📄 Created ChatLog.json")
+    # The conversation store (Data/ChatLog.db) is created and migrated by Backend.ConversationStore
     
     # Create Frontend/Files directory if it doesn't exist
     frontend_files_path = os.path.join("Frontend", "Files")